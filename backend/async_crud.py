@@ -0,0 +1,59 @@
+"""
+Async variants of the CRUD classes for use with AsyncSession.
+
+Each async CRUD object exposes the same methods as its synchronous
+counterpart. A call runs the synchronous implementation through
+``AsyncSession.run_sync``, so the query logic lives in one place while every
+statement is awaited on the async driver and the event loop stays free for
+other requests. Lazy loads inside a CRUD method work as usual; objects returned
+to a route should already have the relationships its response model reads.
+"""
+from typing import Any, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import metrics
+from crud import inventory_crud
+from crud_extended import (
+    customer_crud, supplier_crud, order_crud, stock_movement_crud, reports_crud
+)
+
+
+async def run_sync(db: AsyncSession, fn: Callable, *args, **kwargs) -> Any:
+    """Run a synchronous function that takes a Session as its first argument."""
+    return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+
+
+class AsyncCRUD:
+    """Awaitable facade over a synchronous CRUD class."""
+
+    def __init__(self, crud):
+        self._crud = crud
+        self._methods = {}
+
+    def __getattr__(self, name: str):
+        method = getattr(self._crud, name)
+        if not callable(method):
+            return method
+
+        wrapper = self._methods.get(name)
+        if wrapper is None:
+            label = f"{type(self._crud).__name__}.{name}"
+
+            async def wrapper(db: AsyncSession, *args, **kwargs):
+                with metrics.db_function(label):
+                    return await run_sync(db, method, *args, **kwargs)
+
+            wrapper.__name__ = name
+            wrapper.__doc__ = method.__doc__
+            self._methods[name] = wrapper
+        return wrapper
+
+
+# Create async singleton instances
+async_inventory_crud = AsyncCRUD(inventory_crud)
+async_customer_crud = AsyncCRUD(customer_crud)
+async_supplier_crud = AsyncCRUD(supplier_crud)
+async_order_crud = AsyncCRUD(order_crud)
+async_stock_movement_crud = AsyncCRUD(stock_movement_crud)
+async_reports_crud = AsyncCRUD(reports_crud)
@@ -0,0 +1,247 @@
+"""
+Chunked bulk import of inventory items from CSV or NDJSON.
+
+Rows are parsed incrementally from a text stream and handled a chunk at a
+time: every row is validated against ``InventoryItemCreate``, existing SKUs
+are resolved with one ``IN`` lookup, new items are written with one
+executemany INSERT (and existing ones, when updating, with one executemany
+UPDATE), and the chunk is committed. Failed rows are reported with their row
+number and never stop the import.
+"""
+import csv
+import enum
+import io
+import json
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, TextIO, Tuple, Union
+
+from fastapi import Request
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from export import ExportFormatEnum
+from models import InventoryItem
+from schemas import InventoryItemCreate
+import live_updates
+import row_changes
+
+
+class ConflictModeEnum(str, enum.Enum):
+    """What to do with a row whose SKU already exists."""
+    ERROR = "error"    # Report the row as failed
+    UPDATE = "update"  # Overwrite the existing item with the row's fields
+
+
+async def spool_body(request: Request) -> BinaryIO:
+    """
+    Copy an uploaded request body into a temporary file (spilling to disk
+    past 10 MB), so its rows can be parsed incrementally off the event loop.
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+    async for chunk in request.stream():
+        upload.write(chunk)
+    upload.seek(0)
+    return upload
+
+
+def read_rows(stream: TextIO, import_format: ExportFormatEnum) -> Iterator[Tuple[int, Union[dict, str]]]:
+    """
+    Yield (row_number, row) pairs from a CSV (with a header row) or NDJSON
+    stream, or (row_number, error message) for rows that cannot be parsed.
+    Empty CSV cells are treated as missing fields.
+    """
+    if import_format == ExportFormatEnum.CSV:
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, {key: value for key, value in row.items() if key and value not in ("", None)}
+        return
+
+    row_number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield row_number, f"Invalid JSON: {exc}"
+            continue
+        yield row_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def validation_message(exc: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into one line for an error report."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def rollback_message(exc: SQLAlchemyError) -> str:
+    """Error reported for each row of a chunk whose transaction failed."""
+    return f"Chunk rolled back: {exc.__class__.__name__}: {getattr(exc, 'orig', exc)}"
+
+
+def lookup_items(db: Session, skus: list) -> dict:
+    """
+    Fetch (id, sku, quantity, min_stock_level, is_active, supplier_id) for
+    the given SKUs with one IN query, keyed by SKU.
+    """
+    if not skus:
+        return {}
+    rows = db.query(
+        InventoryItem.id, InventoryItem.sku, InventoryItem.quantity,
+        InventoryItem.min_stock_level, InventoryItem.is_active, InventoryItem.supplier_id
+    ).filter(InventoryItem.sku.in_(skus)).all()
+    return {row.sku: row for row in rows}
+
+
+def write_items(db: Session, new_rows: list, updates: list) -> dict:
+    """
+    Insert `new_rows` with one executemany INSERT and apply `updates`, a list
+    of (row from lookup_items, changed values), with one executemany UPDATE.
+    Queues the matching live dashboard updates; does not commit.
+    Returns {sku: id} for the inserted items.
+    """
+    inserted = {}
+    if new_rows:
+        result = db.execute(insert(InventoryItem).returning(InventoryItem.id, InventoryItem.sku), new_rows)
+        inserted = {row.sku: row.id for row in result}
+        row_changes.touch(db, "inventory_items", inserted.values())
+    if updates:
+        db.execute(update(InventoryItem), [{'id': current.id, **values} for current, values in updates])
+        row_changes.touch(db, "inventory_items", [current.id for current, _ in updates])
+    
+    # New items take the model's default minimum stock level unless given one
+    default_min = InventoryItem.min_stock_level.default.arg
+    live_updates.count_changed(
+        db,
+        total_inventory_items=len(new_rows),
+        low_stock_items=sum(
+            live_updates.is_low_stock(row['quantity'], row.get('min_stock_level', default_min), row.get('is_active', True))
+            for row in new_rows
+        )
+    )
+    for current, values in updates:
+        quantity = values.get('quantity', current.quantity)
+        is_active = values.get('is_active', current.is_active)
+        live_updates.stock_changed(
+            db, current.id,
+            was_low=live_updates.is_low_stock(current.quantity, current.min_stock_level, current.is_active),
+            is_low=live_updates.is_low_stock(quantity, current.min_stock_level, is_active),
+            quantity=quantity,
+            min_stock_level=current.min_stock_level
+        )
+    return inserted
+
+
+def _import_chunk(db: Session, chunk: list, on_conflict: ConflictModeEnum) -> dict:
+    """Validate, insert/update and commit one chunk of (row_number, row) pairs."""
+    errors = []
+    pending = {}  # sku -> (row_number, validated item), later rows win
+    for row_number, row in chunk:
+        if isinstance(row, str):
+            errors.append({'row': row_number, 'sku': None, 'error': row})
+            continue
+        try:
+            item = InventoryItemCreate(**row)
+        except ValidationError as exc:
+            errors.append({'row': row_number, 'sku': row.get('sku'), 'error': validation_message(exc)})
+            continue
+        if item.sku in pending:
+            if on_conflict == ConflictModeEnum.ERROR:
+                errors.append({'row': row_number, 'sku': item.sku, 'error': "Duplicate SKU in import"})
+                continue
+            # Reported, so every processed row is counted as inserted, updated or failed
+            errors.append({'row': pending[item.sku][0], 'sku': item.sku, 'error': f"Superseded by row {row_number}"})
+        pending[item.sku] = (row_number, item)
+
+    existing = lookup_items(db, list(pending))
+    
+    new_rows = []
+    updates = []
+    for sku, (row_number, item) in pending.items():
+        current = existing.get(sku)
+        if current is None:
+            new_rows.append(item.dict())
+        elif on_conflict == ConflictModeEnum.UPDATE:
+            updates.append((current, item.dict(exclude_unset=True)))
+        else:
+            errors.append({'row': row_number, 'sku': sku, 'error': f"Item with SKU '{sku}' already exists"})
+    
+    try:
+        write_items(db, new_rows, updates)
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        errors.extend(
+            {'row': row_number, 'sku': sku, 'error': rollback_message(exc)}
+            for sku, (row_number, _) in pending.items()
+            if sku not in existing or on_conflict == ConflictModeEnum.UPDATE
+        )
+        return {'inserted': 0, 'updated': 0, 'errors': errors}
+    
+    return {'inserted': len(new_rows), 'updated': len(updates), 'errors': errors}
+
+
+def _apply(db: Session, chunk: list, on_conflict: ConflictModeEnum, totals: dict) -> list:
+    """Import one chunk, add its results to `totals` and return its errors."""
+    result = _import_chunk(db, chunk, on_conflict)
+    totals['processed'] += len(chunk)
+    totals['inserted'] += result['inserted']
+    totals['updated'] += result['updated']
+    totals['failed'] += len(result['errors'])
+    return sorted(result['errors'], key=lambda error: error['row'])
+
+
+def import_items(
+    db: Session,
+    rows: Iterable[Tuple[int, Union[dict, str]]],
+    chunk_size: int = settings.import_chunk_size,
+    on_conflict: ConflictModeEnum = ConflictModeEnum.ERROR
+) -> Iterator[dict]:
+    """
+    Import rows from `read_rows` chunk by chunk, committing each chunk.
+
+    Yields a ``progress`` report after every chunk (running totals plus that
+    chunk's per-row errors) and a final ``summary`` report.
+    """
+    totals = {'processed': 0, 'inserted': 0, 'updated': 0, 'failed': 0}
+
+    def report(report_type: str, errors: list) -> dict:
+        return {'type': report_type, **totals, 'errors': errors}
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) < chunk_size:
+            continue
+        yield report('progress', _apply(db, chunk, on_conflict, totals))
+        chunk = []
+    if chunk:
+        yield report('progress', _apply(db, chunk, on_conflict, totals))
+    yield report('summary', [])
+
+
+def import_report(
+    upload: BinaryIO,
+    import_format: ExportFormatEnum,
+    chunk_size: int = settings.import_chunk_size,
+    on_conflict: ConflictModeEnum = ConflictModeEnum.ERROR
+) -> Iterator[str]:
+    """
+    Import an uploaded file and yield the reports as NDJSON lines.
+    A plain generator, so a StreamingResponse runs each chunk in its
+    threadpool instead of on the event loop. Closes `upload` when done.
+    """
+    db = SessionLocal()
+    try:
+        stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+        for report in import_items(db, read_rows(stream, import_format), chunk_size, on_conflict):
+            yield json.dumps(report) + "\n"
+    finally:
+        db.close()
+        upload.close()
@@ -0,0 +1,258 @@
+"""
+Supplier catalog sync with content-hash diffing.
+
+``supplier_catalog_entries`` keeps, per (supplier_id, sku), the item it maps
+to and a hash of the catalog fields last applied. A sync streams the
+supplier's file a chunk at a time, fetches the stored hashes for the chunk
+with one ``IN`` lookup and drops every row whose hash is unchanged before
+any validation or write happens. Only the remaining rows are validated and
+written, with the same executemany INSERT / UPDATE as the bulk import, so a
+daily sync of a mostly unchanged catalog costs a read of the file and the
+hash index plus writes proportional to the number of changes.
+
+A sync only writes the supplier's own items. A SKU that belongs to another
+supplier is reported as a conflict; one with no supplier is reported too,
+unless ``claim_unowned`` is set, which assigns it to the syncing supplier.
+
+With ``deactivate_missing``, items whose SKU no longer appears in the file
+are deactivated (``is_active = false``) and their hash cleared, so the item
+is reactivated if the SKU comes back.
+"""
+import hashlib
+import io
+import json
+from typing import BinaryIO, Iterable, Iterator, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from bulk_import import read_rows, lookup_items, write_items, validation_message, rollback_message
+from config import settings
+from database import SessionLocal, upsert
+from export import ExportFormatEnum
+from models import InventoryItem, SupplierCatalogEntry
+from schemas import InventoryItemCreate, InventoryItemUpdate
+import live_updates
+import row_changes
+
+# Only fields the sync can apply take part in the hash, so extra columns in
+# a supplier's file never count as changes
+_SYNCED_FIELDS = tuple(InventoryItemUpdate.model_fields)
+
+
+def content_hash(row: dict) -> str:
+    """Hash of a catalog row's synced fields, independent of key order."""
+    content = {field: row[field] for field in _SYNCED_FIELDS if field in row}
+    return hashlib.blake2b(json.dumps(content, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+def _lookup_entries(db: Session, supplier_id: int, skus: list) -> dict:
+    """Fetch the stored catalog entries for the given SKUs, keyed by SKU."""
+    rows = db.execute(
+        select(SupplierCatalogEntry.sku, SupplierCatalogEntry.content_hash)
+        .where(SupplierCatalogEntry.supplier_id == supplier_id, SupplierCatalogEntry.sku.in_(skus))
+    ).all()
+    return {row.sku: row for row in rows}
+
+
+def _save_entries(db: Session, entries: list) -> None:
+    """Insert or update catalog entries with one executemany upsert."""
+    table = SupplierCatalogEntry.__table__
+    statement = upsert(db.get_bind(), table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.supplier_id, table.c.sku],
+        set_={
+            "inventory_item_id": statement.excluded.inventory_item_id,
+            "content_hash": statement.excluded.content_hash,
+        }
+    )
+    db.execute(statement, entries)
+
+
+def _sync_chunk(db: Session, supplier_id: int, chunk: list, seen: set, claim_unowned: bool) -> dict:
+    """Diff one chunk of (row_number, row) pairs against stored hashes and apply the changes."""
+    errors = []
+    incoming = {}  # sku -> (row_number, row, hash), later rows win
+    for row_number, row in chunk:
+        if isinstance(row, str):
+            errors.append({'row': row_number, 'sku': None, 'error': row})
+            continue
+        if not isinstance(row.get('sku'), str) or not row['sku'].strip():
+            errors.append({'row': row_number, 'sku': None, 'error': "sku: Field required"})
+            continue
+        sku = row['sku'].strip().upper()
+        seen.add(sku)
+        if sku in incoming:
+            errors.append({'row': incoming[sku][0], 'sku': sku, 'error': f"Superseded by row {row_number}"})
+        incoming[sku] = (row_number, row, content_hash(row))
+
+    entries = _lookup_entries(db, supplier_id, list(incoming)) if incoming else {}
+    changed = {
+        sku: value for sku, value in incoming.items()
+        if sku not in entries or entries[sku].content_hash != value[2]
+    }
+    result = {'unchanged': len(incoming) - len(changed), 'created': 0, 'updated': 0, 'errors': errors}
+    if not changed:
+        return result
+
+    existing = lookup_items(db, list(changed))
+    new_rows = []
+    updates = []
+    applied = {}  # sku -> (row_number, hash) of rows that passed validation
+    for sku, (row_number, row, row_hash) in changed.items():
+        current = existing.get(sku)
+        if current is not None and current.supplier_id != supplier_id:
+            if current.supplier_id is not None:
+                errors.append({'row': row_number, 'sku': sku, 'error': "SKU belongs to another supplier's item"})
+                continue
+            if not claim_unowned:
+                errors.append({'row': row_number, 'sku': sku, 'error': "SKU belongs to an item without a supplier; sync with claim_unowned to take it over"})
+                continue
+        try:
+            if current is None:
+                new_rows.append({**InventoryItemCreate(**row).dict(), 'supplier_id': supplier_id})
+            else:
+                values = InventoryItemUpdate(**row).dict(exclude_unset=True)
+                values.pop('sku', None)
+                values['supplier_id'] = supplier_id
+                entry = entries.get(sku)
+                if entry is not None and entry.content_hash is None:
+                    # Back in the catalog after a sync deactivated it
+                    values['is_active'] = True
+                updates.append((current, values))
+        except ValidationError as exc:
+            errors.append({'row': row_number, 'sku': sku, 'error': validation_message(exc)})
+            continue
+        applied[sku] = (row_number, row_hash)
+    if not applied:
+        return result
+
+    try:
+        item_ids = {sku: row.id for sku, row in existing.items()}
+        item_ids.update(write_items(db, new_rows, updates))
+        _save_entries(db, [
+            {'supplier_id': supplier_id, 'sku': sku, 'inventory_item_id': item_ids[sku], 'content_hash': row_hash}
+            for sku, (_, row_hash) in applied.items()
+        ])
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        errors.extend(
+            {'row': row_number, 'sku': sku, 'error': rollback_message(exc)}
+            for sku, (row_number, _) in applied.items()
+        )
+        return result
+
+    result['created'] = len(new_rows)
+    result['updated'] = len(updates)
+    return result
+
+
+def _deactivate_missing(db: Session, supplier_id: int, seen: set, chunk_size: int) -> int:
+    """Deactivate the supplier's synced items whose SKU was not in the file; returns how many."""
+    missing = [
+        row for row in db.execute(
+            select(
+                SupplierCatalogEntry.sku, InventoryItem.id, InventoryItem.quantity,
+                InventoryItem.min_stock_level, InventoryItem.is_active
+            )
+            .join(InventoryItem, InventoryItem.id == SupplierCatalogEntry.inventory_item_id)
+            .where(
+                SupplierCatalogEntry.supplier_id == supplier_id,
+                SupplierCatalogEntry.content_hash.isnot(None),
+                InventoryItem.supplier_id == supplier_id
+            )
+        )
+        if row.sku not in seen
+    ]
+
+    for start in range(0, len(missing), chunk_size):
+        rows = missing[start:start + chunk_size]
+        db.execute(
+            update(InventoryItem)
+            .where(InventoryItem.id.in_([row.id for row in rows]))
+            .values(is_active=False)
+        )
+        row_changes.touch(db, "inventory_items", [row.id for row in rows])
+        db.execute(
+            update(SupplierCatalogEntry)
+            .where(SupplierCatalogEntry.supplier_id == supplier_id, SupplierCatalogEntry.sku.in_([row.sku for row in rows]))
+            .values(content_hash=None)
+        )
+        for row in rows:
+            live_updates.stock_changed(
+                db, row.id,
+                was_low=live_updates.is_low_stock(row.quantity, row.min_stock_level, row.is_active),
+                is_low=False,
+                quantity=row.quantity,
+                min_stock_level=row.min_stock_level
+            )
+        db.commit()
+    return len(missing)
+
+
+def sync_catalog(
+    db: Session,
+    supplier_id: int,
+    rows: Iterable[Tuple[int, Union[dict, str]]],
+    chunk_size: int = settings.import_chunk_size,
+    deactivate_missing: bool = False,
+    claim_unowned: bool = False
+) -> Iterator[dict]:
+    """
+    Sync a supplier's catalog rows from `read_rows` chunk by chunk,
+    committing each chunk.
+
+    Yields a ``progress`` report after every chunk (running totals plus that
+    chunk's per-row errors) and a final ``summary`` report.
+    """
+    totals = {'processed': 0, 'unchanged': 0, 'created': 0, 'updated': 0, 'deactivated': 0, 'failed': 0}
+    seen = set()
+
+    def apply(chunk: list) -> dict:
+        result = _sync_chunk(db, supplier_id, chunk, seen, claim_unowned)
+        totals['processed'] += len(chunk)
+        for key in ('unchanged', 'created', 'updated'):
+            totals[key] += result[key]
+        totals['failed'] += len(result['errors'])
+        return {'type': 'progress', **totals, 'errors': sorted(result['errors'], key=lambda error: error['row'])}
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) < chunk_size:
+            continue
+        yield apply(chunk)
+        chunk = []
+    if chunk:
+        yield apply(chunk)
+
+    if deactivate_missing:
+        totals['deactivated'] = _deactivate_missing(db, supplier_id, seen, chunk_size)
+    yield {'type': 'summary', **totals, 'errors': []}
+
+
+def sync_report(
+    upload: BinaryIO,
+    supplier_id: int,
+    import_format: ExportFormatEnum,
+    chunk_size: int = settings.import_chunk_size,
+    deactivate_missing: bool = False,
+    claim_unowned: bool = False
+) -> Iterator[str]:
+    """
+    Sync an uploaded catalog file and yield the reports as NDJSON lines.
+    A plain generator, so a StreamingResponse runs it in its threadpool.
+    Closes `upload` when done.
+    """
+    db = SessionLocal()
+    try:
+        stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+        rows = read_rows(stream, import_format)
+        for report in sync_catalog(db, supplier_id, rows, chunk_size, deactivate_missing, claim_unowned):
+            yield json.dumps(report) + "\n"
+    finally:
+        db.close()
+        upload.close()
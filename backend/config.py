@@ -2,6 +2,7 @@
 Configuration settings for the FastAPI application.
 """
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
@@ -9,10 +10,82 @@ class Settings(BaseSettings):
     """Application settings."""
     
     database_url: str = "sqlite:///./inventory.db"
+    # Async driver URL for the API routes; derived from database_url when unset
+    async_database_url: Optional[str] = None
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     debug: bool = True
     
+    # Database engine profile: "development" keeps SQLite defaults and echoes SQL
+    # in debug mode; "production" applies the sqlite_* tuning below, never echoes
+    # SQL and runs periodic WAL checkpoints and PRAGMA optimize
+    db_profile: str = "development"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 268435456  # 256 MiB
+    sqlite_checkpoint_interval: int = 300  # Seconds between WAL checkpoints
+    sqlite_optimize_interval: int = 3600  # Seconds between PRAGMA optimize runs
+    
+    # Cached counts for paginated list responses
+    count_cache_max_entries: int = 1024
+    count_cache_ttl: float = 60.0  # Seconds before a cached count is recomputed
+    count_estimate_cap: int = 10000  # Rows scanned at most for count=estimate
+    report_cache_ttl: float = 60.0  # Seconds a cached report aggregate is served
+    dashboard_max_staleness: float = 5.0  # Seconds a dashboard snapshot may lag behind writes
+    
+    # Live dashboard stream (/api/dashboard/stream)
+    live_updates_queue_size: int = 1000  # Events buffered per client before it must resync
+    live_updates_keepalive: float = 15.0  # Seconds between keepalive comments
+    
+    # Rows fetched per batch by the streaming /api/export endpoints
+    export_batch_size: int = 1000
+    
+    # Rows validated, inserted and committed together by bulk inventory imports
+    import_chunk_size: int = 1000
+    
+    # In-process SKU/barcode index for /api/inventory/lookup; other processes'
+    # writes are picked up when it is rebuilt after this many seconds
+    item_index_max_age: float = 300.0
+    
+    # Cached responses of single-entity GETs (items, customers, suppliers, orders)
+    entity_cache_max_entries: int = 10000
+    entity_cache_ttl: float = 60.0  # Seconds; bounds staleness from other processes' writes
+    
+    # Per-request SQL statistics: X-Query-* headers, and warnings for statement
+    # shapes repeated this many times (likely N+1 lazy loads) or routes over
+    # their query budget; enforcing budgets fails such requests (for CI)
+    query_stats_enabled: bool = True
+    query_repeat_threshold: int = 5
+    query_budget_enforce: bool = False
+    
+    # Prometheus text metrics at /metrics (request, SQL, pool and cache figures)
+    metrics_enabled: bool = True
+    
+    # Slow-query log (/api/admin/slow-queries): statements slower than the
+    # threshold are recorded with redacted parameters and their query plan
+    slow_query_enabled: bool = True
+    slow_query_threshold_ms: float = 100.0
+    slow_query_redact: bool = True  # Replace text and blob parameters with their type
+    slow_query_log_size: int = 200  # Recent slow queries kept for the endpoint
+    slow_query_log_file: str = ""  # JSON lines file, e.g. /var/log/inventory/slow_queries.log; empty to disable
+    slow_query_log_max_bytes: int = 10485760  # 10 MiB per file before rotating
+    slow_query_log_backups: int = 5
+    
+    # Request profiler: requests with an X-Profile header or ?profile= query
+    # parameter equal to profile_token, and a random sample of all requests,
+    # are profiled into profile_dir (pstats and collapsed stack files)
+    profile_enabled: bool = False
+    profile_token: Optional[str] = None  # Unset disables the header and query triggers
+    profile_sample_rate: float = 0.0  # Fraction of requests profiled at random
+    profile_interval_ms: float = 1.0  # Stack sampling interval for the collapsed stacks
+    profile_max_seconds: float = 30.0  # Longer requests keep running, but their profile ends here
+    profile_dir: str = "profiles"
+    profile_max_files: int = 100  # Profiles kept; older ones are deleted
+    
+    # Document number allocation: 1 allocates inside the caller's transaction
+    # (gap-free); larger values reserve blocks in-process (gaps after restarts)
+    sequence_block_size: int = 1
+    
     # CORS settings for React frontend
     cors_origins: list[str] = [
         "http://localhost:3000",
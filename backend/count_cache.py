@@ -0,0 +1,257 @@
+"""
+Cached and approximate row counts for paginated list queries.
+
+Counts are cached per table under the query's compiled SQL and parameters.
+Any committed ORM write (unit of work or bulk statement) to a table bumps
+that table's generation, which invalidates every cached count for it
+without scanning the cache. Report aggregates use the same mechanism
+through ``report_cache``.
+"""
+import enum
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Query, Session
+
+from config import settings
+import metrics
+
+
+class CountModeEnum(str, enum.Enum):
+    """How a list endpoint should compute its total."""
+    EXACT = "exact"        # Exact count, served from cache while the table is unchanged
+    ESTIMATE = "estimate"  # Any cached count, else a cheap approximation
+    NONE = "none"          # Skip counting entirely
+
+
+class CountCache:
+    """Bounded LRU cache of row counts or aggregates with per-table generations."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._generations: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, table_name: str, key: tuple, allow_stale: bool = False) -> Optional[Any]:
+        """Return a cached value, or None if missing or invalidated."""
+        with self._lock:
+            entry = self._entries.get((table_name, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            generation, value, stored_at = entry
+            if not allow_stale:
+                if generation != self._generations.get(table_name, 0):
+                    self.misses += 1
+                    return None
+                if time.monotonic() - stored_at > self.ttl:
+                    self.misses += 1
+                    return None
+            self._entries.move_to_end((table_name, key))
+            self.hits += 1
+            return value
+
+    def set(self, table_name: str, key: tuple, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store a value computed at `generation` of the table, taken from
+        ``generations()`` before the query ran, so a write committed while
+        it ran leaves the value out of date. Defaults to the current one.
+        """
+        with self._lock:
+            if generation is None:
+                generation = self._generations.get(table_name, 0)
+            self._entries[(table_name, key)] = (generation, value, time.monotonic())
+            self._entries.move_to_end((table_name, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *table_names: str) -> None:
+        """Mark every cached value for the given tables as out of date."""
+        with self._lock:
+            for table_name in table_names:
+                self._generations[table_name] = self._generations.get(table_name, 0) + 1
+
+    def generations(self, *table_names: str) -> tuple:
+        """Return the current generation of each of the given tables."""
+        with self._lock:
+            return tuple(self._generations.get(table_name, 0) for table_name in table_names)
+    
+    def clear(self) -> None:
+        """Drop all cached values."""
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache(
+    max_entries=settings.count_cache_max_entries,
+    ttl=settings.count_cache_ttl
+)
+
+# Aggregates for the reports endpoints, keyed by report name and parameters
+report_cache = CountCache(
+    max_entries=settings.count_cache_max_entries,
+    ttl=settings.report_cache_ttl
+)
+
+metrics.register_cache("count", lambda: (count_cache.hits, count_cache.misses))
+metrics.register_cache("report", lambda: (report_cache.hits, report_cache.misses))
+
+
+class Snapshot:
+    """
+    A single precomputed value derived from several tables.
+
+    The value is clean until a committed write to one of its tables bumps
+    that table's generation. A dirty value is still served until it is
+    `max_staleness` seconds old, so a burst of writes costs at most one
+    recomputation per window; a clean value is recomputed after `ttl`.
+    """
+
+    def __init__(self, cache: CountCache, table_names: tuple, max_staleness: float, ttl: float):
+        self.cache = cache
+        self.table_names = table_names
+        self.max_staleness = max_staleness
+        self.ttl = ttl
+        self._entry: Optional[tuple] = None
+
+    def begin(self) -> tuple:
+        """Capture table generations; call before computing a new value."""
+        return self.cache.generations(*self.table_names)
+
+    def get(self) -> Optional[Any]:
+        """Return the snapshot if it is clean or still within its staleness bound."""
+        entry = self._entry
+        if entry is None:
+            return None
+        generations, value, computed_at = entry
+        age = time.monotonic() - computed_at
+        if age > self.ttl:
+            return None
+        if age > self.max_staleness and generations != self.begin():
+            return None
+        return value
+
+    def set(self, value: Any, generations: tuple) -> None:
+        """Store a value computed after `begin()` returned `generations`."""
+        self._entry = (generations, value, time.monotonic())
+
+    def clear(self) -> None:
+        """Drop the snapshot."""
+        self._entry = None
+
+
+def _query_key(query: Query) -> tuple:
+    """Build a cache key from a query's SQL text and bound parameters."""
+    compiled = query.statement.compile()
+    params = tuple(sorted((name, repr(value)) for name, value in compiled.params.items()))
+    return str(compiled), params
+
+
+def _estimate(query: Query, model, filtered: bool) -> int:
+    """
+    Approximate the row count without a full scan: the highest id for an
+    unfiltered table, otherwise a count capped at `count_estimate_cap` rows.
+    """
+    session = query.session
+    if not filtered:
+        return session.execute(select(func.max(model.id))).scalar() or 0
+
+    capped = query.with_entities(model.id).order_by(None).limit(settings.count_estimate_cap).subquery()
+    return session.execute(select(func.count()).select_from(capped)).scalar() or 0
+
+
+def count_rows(
+    query: Query,
+    model,
+    mode: CountModeEnum = CountModeEnum.EXACT,
+    filtered: bool = True
+) -> Optional[int]:
+    """
+    Count the rows a list query would return according to `mode`.
+    Eager loads are disabled so joinedload options never inflate the count.
+    """
+    if mode == CountModeEnum.NONE:
+        return None
+
+    table_name = model.__tablename__
+    query = query.enable_eagerloads(False)
+    key = _query_key(query)
+
+    cached = count_cache.get(table_name, key, allow_stale=mode == CountModeEnum.ESTIMATE)
+    if cached is not None:
+        return cached
+
+    if mode == CountModeEnum.ESTIMATE:
+        return _estimate(query, model, filtered)
+
+    generation, = count_cache.generations(table_name)
+    total = query.count()
+    count_cache.set(table_name, key, total, generation)
+    return total
+
+
+def query_version(query: Query, model, related_tables: tuple = (), related_newest: tuple = ()) -> tuple:
+    """
+    Cheap version of a list query's result for building ETags: the row count
+    and newest ``updated_at`` of the matching rows, cached like exact counts,
+    plus this process's generations of the model's table and of
+    `related_tables` whose rows are embedded in the response.
+    `related_newest` are scalar subqueries for the newest ``updated_at`` of
+    those embedded rows, so other processes' writes to them show up too.
+    """
+    table_name = model.__tablename__
+    generations = count_cache.generations(table_name, *related_tables)
+    query = query.enable_eagerloads(False)
+    # The related generations are part of the key: a write to a related
+    # table must not be answered with an aggregate computed before it
+    key = ("version", generations) + _query_key(query)
+
+    aggregate = count_cache.get(table_name, key)
+    if aggregate is None:
+        total, *newest = query.with_entities(
+            func.count(model.id), func.max(model.updated_at), *related_newest
+        ).order_by(None).one()
+        aggregate = (total, *(str(value) for value in newest))
+        count_cache.set(table_name, key, aggregate, generations[0])
+    return generations + aggregate
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_dirty_tables(session, flush_context):
+    """Remember which tables this transaction wrote to."""
+    tables = session.info.setdefault("count_cache_tables", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            tables.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(orm_execute_state):
+    """Remember tables written by bulk INSERT/UPDATE/DELETE statements."""
+    state = orm_execute_state
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None:
+        tables = state.session.info.setdefault("count_cache_tables", set())
+        tables.add(state.bind_mapper.local_table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_dirty_tables(session):
+    """Invalidate cached counts and reports for tables written by the committed transaction."""
+    tables = session.info.pop("count_cache_tables", None)
+    if tables:
+        count_cache.invalidate(*tables)
+        report_cache.invalidate(*tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_tables(session):
+    """Forget tables written by a rolled back transaction."""
+    session.info.pop("count_cache_tables", None)
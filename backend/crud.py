@@ -3,11 +3,16 @@ CRUD operations for inventory items.
 """
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, select, Select
 from fastapi import HTTPException
 
 from models import InventoryItem, CategoryEnum
 from schemas import InventoryItemCreate, InventoryItemUpdate
+from pagination import apply_keyset
+import search_index
+import stock_status
+import live_updates
+from count_cache import count_rows, query_version, CountModeEnum
 
 
 class InventoryCRUD:
@@ -24,22 +29,15 @@ class InventoryCRUD:
         return db.query(InventoryItem).filter(InventoryItem.sku == sku.upper()).first()
     
     @staticmethod
-    def get_items(
-        db: Session,
-        skip: int = 0,
-        limit: int = 100,
-        search: Optional[str] = None,
-        category: Optional[CategoryEnum] = None
-    ) -> tuple[List[InventoryItem], int]:
+    def _filters(db: Session, search: Optional[str], category: Optional[CategoryEnum]):
         """
-        Get inventory items with optional filtering and pagination.
-        Returns (items, total_count).
+        Build the filters shared by the item list and export.
+        Returns (matches, filters): `matches` is the full-text search subquery
+        to join on, or None when the search falls back to ILIKE filters.
         """
-        query = db.query(InventoryItem)
-        
-        # Apply filters
         filters = []
-        if search:
+        matches = search_index.match_items(db, search) if search else None
+        if matches is None and search:
             search_filter = or_(
                 InventoryItem.name.ilike(f"%{search}%"),
                 InventoryItem.sku.ilike(f"%{search}%"),
@@ -49,18 +47,88 @@ class InventoryCRUD:
         
         if category:
             filters.append(InventoryItem.category == category)
-        
-        if filters:
-            query = query.filter(and_(*filters))
+        return matches, filters
+    
+    @staticmethod
+    def get_items(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None,
+        category: Optional[CategoryEnum] = None,
+        cursor: Optional[str] = None,
+        count: CountModeEnum = CountModeEnum.EXACT
+    ) -> tuple[List[InventoryItem], Optional[int]]:
+        """
+        Get inventory items with optional filtering and pagination.
+        When a cursor is given, `skip` is ignored and the page starts after
+        the cursor position (keyset pagination).
+        Search results come from the full-text index ranked by relevance and
+        are paginated by `skip` only.
+        Returns (items, total_count); total_count is None when count is NONE.
+        """
+        query, matches, filtered = InventoryCRUD._list_query(db, search, category)
         
         # Get total count for pagination
-        total = query.count()
+        total = count_rows(query, InventoryItem, count, filtered=filtered)
         
         # Apply pagination and ordering
-        items = query.order_by(InventoryItem.created_at.desc()).offset(skip).limit(limit).all()
+        if matches is not None:
+            query = query.order_by(matches.c.rank, InventoryItem.id).offset(skip)
+        else:
+            query = apply_keyset(query, InventoryItem, cursor)
+            if not cursor:
+                query = query.offset(skip)
+        items = query.limit(limit).all()
         
         return items, total
     
+    @staticmethod
+    def _list_query(db: Session, search: Optional[str], category: Optional[CategoryEnum]):
+        """
+        Build the filtered item list query.
+        Returns (query, matches, filtered); see ``_filters`` for `matches`.
+        """
+        query = db.query(InventoryItem)
+        matches, filters = InventoryCRUD._filters(db, search, category)
+        if matches is not None:
+            query = query.join(matches, matches.c.item_id == InventoryItem.id)
+        if filters:
+            query = query.filter(and_(*filters))
+        return query, matches, bool(filters) or matches is not None
+    
+    @staticmethod
+    def get_items_version(
+        db: Session,
+        search: Optional[str] = None,
+        category: Optional[CategoryEnum] = None
+    ) -> tuple:
+        """Version of the items matching the list filters, for ETags."""
+        query, _, _ = InventoryCRUD._list_query(db, search, category)
+        return query_version(query, InventoryItem)
+    
+    @staticmethod
+    def export_items(
+        db: Session,
+        search: Optional[str] = None,
+        category: Optional[CategoryEnum] = None
+    ) -> Select:
+        """Build a statement selecting every matching item row, in id order."""
+        matches, filters = InventoryCRUD._filters(db, search, category)
+        statement = select(InventoryItem.__table__)
+        if matches is not None:
+            statement = statement.join(matches, matches.c.item_id == InventoryItem.id)
+        return statement.where(*filters).order_by(InventoryItem.id)
+    
+    @staticmethod
+    def _track_low_stock(db: Session, db_item: InventoryItem, was_low: bool) -> None:
+        """Queue a live update if an item's write moved it across its minimum stock level."""
+        is_low = live_updates.is_low_stock(db_item.quantity, db_item.min_stock_level, db_item.is_active)
+        live_updates.stock_changed(
+            db, db_item.id, was_low, is_low,
+            quantity=db_item.quantity, min_stock_level=db_item.min_stock_level
+        )
+    
     @staticmethod
     def create_item(db: Session, item: InventoryItemCreate) -> InventoryItem:
         """Create a new inventory item."""
@@ -74,6 +142,9 @@ class InventoryCRUD:
         
         db_item = InventoryItem(**item.dict())
         db.add(db_item)
+        db.flush()
+        InventoryCRUD._track_low_stock(db, db_item, was_low=False)
+        live_updates.count_changed(db, total_inventory_items=1)
         db.commit()
         db.refresh(db_item)
         return db_item
@@ -98,11 +169,14 @@ class InventoryCRUD:
                     detail=f"Item with SKU '{item_update.sku}' already exists"
                 )
         
+        was_low = live_updates.is_low_stock(db_item.quantity, db_item.min_stock_level, db_item.is_active)
+        
         # Update only provided fields
         update_data = item_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_item, field, value)
         
+        InventoryCRUD._track_low_stock(db, db_item, was_low)
         db.commit()
         db.refresh(db_item)
         return db_item
@@ -114,6 +188,9 @@ class InventoryCRUD:
         if not db_item:
             return False
         
+        was_low = live_updates.is_low_stock(db_item.quantity, db_item.min_stock_level, db_item.is_active)
+        live_updates.stock_changed(db, item_id, was_low, is_low=False)
+        live_updates.count_changed(db, total_inventory_items=-1)
         db.delete(db_item)
         db.commit()
         return True
@@ -125,8 +202,11 @@ class InventoryCRUD:
     
     @staticmethod
     def get_low_stock_items(db: Session, threshold: int = 10) -> List[InventoryItem]:
-        """Get items with low stock."""
-        return db.query(InventoryItem).filter(InventoryItem.quantity <= threshold).all()
+        """Get items with low stock, using the indexed quantity in stock_status."""
+        statuses = stock_status.status_source(db)
+        return db.query(InventoryItem).join(
+            statuses, statuses.c.inventory_item_id == InventoryItem.id
+        ).filter(statuses.c.quantity <= threshold).order_by(statuses.c.inventory_item_id).all()
 
 
 # Create a singleton instance
@@ -1,11 +1,13 @@
 """
 Extended CRUD operations for the full inventory management system.
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 from datetime import datetime, timedelta
 from decimal import Decimal
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, desc, func, case
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy import or_, and_, desc, func, case, update, insert, select, Select
 from fastapi import HTTPException
 
 from models import (
@@ -15,8 +17,17 @@ from models import (
 from schemas_extended import (
     CustomerCreate, CustomerUpdate, SupplierCreate, SupplierUpdate,
     OrderCreate, OrderUpdate, PurchaseOrderCreate, PurchaseOrderUpdate,
-    StockMovementCreate
+    StockMovementCreate, SalesGroupByEnum
 )
+from pagination import apply_keyset
+from count_cache import count_rows, query_version, report_cache, CountModeEnum
+import live_updates
+import stock_status
+import row_changes
+from sequences import next_document_number
+
+# Items per IN list / CASE expression in batch statements (keeps under SQLite's variable limit)
+BATCH_CHUNK_SIZE = 500
 
 
 class CustomerCRUD:
@@ -33,37 +44,68 @@ class CustomerCRUD:
         return db.query(Customer).filter(Customer.email == email).first()
     
     @staticmethod
-    def get_customers(
-        db: Session,
-        skip: int = 0,
-        limit: int = 100,
-        search: Optional[str] = None,
-        is_active: Optional[bool] = None
-    ) -> Tuple[List[Customer], int]:
-        """Get customers with optional filtering and pagination."""
-        query = db.query(Customer)
-        
+    def _filters(search: Optional[str], is_active: Optional[bool]) -> list:
+        """Build the filters shared by the customer list and export."""
         filters = []
         if search:
             search_filter = or_(
                 Customer.first_name.ilike(f"%{search}%"),
                 Customer.last_name.ilike(f"%{search}%"),
                 Customer.email.ilike(f"%{search}%"),
-                func.concat(Customer.first_name, ' ', Customer.last_name).ilike(f"%{search}%")
+                (Customer.first_name + ' ' + Customer.last_name).ilike(f"%{search}%")
             )
             filters.append(search_filter)
         
         if is_active is not None:
             filters.append(Customer.is_active == is_active)
+        return filters
+    
+    @staticmethod
+    def get_customers(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        count: CountModeEnum = CountModeEnum.EXACT
+    ) -> Tuple[List[Customer], Optional[int]]:
+        """Get customers with optional filtering and pagination."""
+        query = db.query(Customer)
         
+        filters = CustomerCRUD._filters(search, is_active)
         if filters:
             query = query.filter(and_(*filters))
         
-        total = query.count()
-        customers = query.order_by(Customer.created_at.desc()).offset(skip).limit(limit).all()
+        total = count_rows(query, Customer, count, filtered=bool(filters))
+        query = apply_keyset(query, Customer, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        customers = query.limit(limit).all()
         
         return customers, total
     
+    @staticmethod
+    def get_customers_version(
+        db: Session,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> tuple:
+        """Version of the customers matching the list filters, for ETags."""
+        query = db.query(Customer).filter(*CustomerCRUD._filters(search, is_active))
+        return query_version(query, Customer)
+    
+    @staticmethod
+    def export_customers(
+        db: Session,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> Select:
+        """Build a statement selecting every matching customer row, in id order."""
+        return select(Customer.__table__).where(
+            *CustomerCRUD._filters(search, is_active)
+        ).order_by(Customer.id)
+    
     @staticmethod
     def create_customer(db: Session, customer: CustomerCreate) -> Customer:
         """Create a new customer."""
@@ -76,6 +118,7 @@ class CustomerCRUD:
         
         db_customer = Customer(**customer.dict())
         db.add(db_customer)
+        live_updates.count_changed(db, total_customers=1)
         db.commit()
         db.refresh(db_customer)
         return db_customer
@@ -124,6 +167,7 @@ class CustomerCRUD:
         else:
             # Hard delete if no orders
             db.delete(db_customer)
+            live_updates.count_changed(db, total_customers=-1)
             db.commit()
         
         return True
@@ -143,16 +187,8 @@ class SupplierCRUD:
         return db.query(Supplier).filter(Supplier.email == email).first()
     
     @staticmethod
-    def get_suppliers(
-        db: Session,
-        skip: int = 0,
-        limit: int = 100,
-        search: Optional[str] = None,
-        is_active: Optional[bool] = None
-    ) -> Tuple[List[Supplier], int]:
-        """Get suppliers with optional filtering and pagination."""
-        query = db.query(Supplier)
-        
+    def _filters(search: Optional[str], is_active: Optional[bool]) -> list:
+        """Build the supplier list filters."""
         filters = []
         if search:
             search_filter = or_(
@@ -164,15 +200,43 @@ class SupplierCRUD:
         
         if is_active is not None:
             filters.append(Supplier.is_active == is_active)
+        return filters
+    
+    @staticmethod
+    def get_suppliers(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        count: CountModeEnum = CountModeEnum.EXACT
+    ) -> Tuple[List[Supplier], Optional[int]]:
+        """Get suppliers with optional filtering and pagination."""
+        query = db.query(Supplier)
         
+        filters = SupplierCRUD._filters(search, is_active)
         if filters:
             query = query.filter(and_(*filters))
         
-        total = query.count()
-        suppliers = query.order_by(Supplier.created_at.desc()).offset(skip).limit(limit).all()
+        total = count_rows(query, Supplier, count, filtered=bool(filters))
+        query = apply_keyset(query, Supplier, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        suppliers = query.limit(limit).all()
         
         return suppliers, total
     
+    @staticmethod
+    def get_suppliers_version(
+        db: Session,
+        search: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> tuple:
+        """Version of the suppliers matching the list filters, for ETags."""
+        query = db.query(Supplier).filter(*SupplierCRUD._filters(search, is_active))
+        return query_version(query, Supplier)
+    
     @staticmethod
     def create_supplier(db: Session, supplier: SupplierCreate) -> Supplier:
         """Create a new supplier."""
@@ -185,6 +249,7 @@ class SupplierCRUD:
         
         db_supplier = Supplier(**supplier.dict())
         db.add(db_supplier)
+        live_updates.count_changed(db, total_suppliers=1)
         db.commit()
         db.refresh(db_supplier)
         return db_supplier
@@ -235,6 +300,7 @@ class SupplierCRUD:
         else:
             # Hard delete if no references
             db.delete(db_supplier)
+            live_updates.count_changed(db, total_suppliers=-1)
             db.commit()
         
         return True
@@ -245,12 +311,8 @@ class OrderCRUD:
     
     @staticmethod
     def generate_order_number(db: Session) -> str:
-        """Generate a unique order number."""
-        today = datetime.now().strftime("%Y%m%d")
-        count = db.query(Order).filter(
-            Order.order_number.like(f"ORD-{today}-%")
-        ).count()
-        return f"ORD-{today}-{count + 1:04d}"
+        """Generate a unique order number from the per-day ORD sequence."""
+        return next_document_number(db, "ORD", Order.order_number)
     
     @staticmethod
     def get_order(db: Session, order_id: int) -> Optional[Order]:
@@ -260,6 +322,25 @@ class OrderCRUD:
             joinedload(Order.order_items).joinedload(OrderItem.inventory_item)
         ).filter(Order.id == order_id).first()
     
+    @staticmethod
+    def _filters(
+        status: Optional[OrderStatusEnum],
+        customer_id: Optional[int],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime]
+    ) -> list:
+        """Build the filters shared by the order list and export."""
+        filters = []
+        if status:
+            filters.append(Order.status == status)
+        if customer_id:
+            filters.append(Order.customer_id == customer_id)
+        if date_from:
+            filters.append(Order.order_date >= date_from)
+        if date_to:
+            filters.append(Order.order_date <= date_to)
+        return filters
+    
     @staticmethod
     def get_orders(
         db: Session,
@@ -268,64 +349,130 @@ class OrderCRUD:
         status: Optional[OrderStatusEnum] = None,
         customer_id: Optional[int] = None,
         date_from: Optional[datetime] = None,
-        date_to: Optional[datetime] = None
-    ) -> Tuple[List[Order], int]:
-        """Get orders with optional filtering and pagination."""
+        date_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        count: CountModeEnum = CountModeEnum.EXACT
+    ) -> Tuple[List[Order], Optional[int]]:
+        """
+        Get orders with optional filtering and pagination.
+        Items are loaded with a second IN query so the page itself stays an
+        index range scan (a joined collection would wrap it in a subquery
+        and sort again).
+        """
         query = db.query(Order).options(
             joinedload(Order.customer),
-            joinedload(Order.order_items)
+            selectinload(Order.order_items).joinedload(OrderItem.inventory_item)
         )
         
-        filters = []
-        if status:
-            filters.append(Order.status == status)
-        if customer_id:
-            filters.append(Order.customer_id == customer_id)
-        if date_from:
-            filters.append(Order.order_date >= date_from)
-        if date_to:
-            filters.append(Order.order_date <= date_to)
-        
+        filters = OrderCRUD._filters(status, customer_id, date_from, date_to)
         if filters:
             query = query.filter(and_(*filters))
         
-        total = query.count()
-        orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+        total = count_rows(query, Order, count, filtered=bool(filters))
+        query = apply_keyset(query, Order, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        orders = query.limit(limit).all()
         
         return orders, total
     
+    @staticmethod
+    def get_orders_version(
+        db: Session,
+        status: Optional[OrderStatusEnum] = None,
+        customer_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> tuple:
+        """
+        Version of the orders matching the list filters, for ETags. Order
+        responses embed customers and items, so their tables count too, as
+        does the newest ``updated_at`` of the orders' customers and items.
+        """
+        query = db.query(Order).filter(*OrderCRUD._filters(status, customer_id, date_from, date_to))
+        matching = query.with_entities(Order.id, Order.customer_id).order_by(None).subquery()
+        newest_customer = select(func.max(Customer.updated_at)).where(
+            Customer.id.in_(select(matching.c.customer_id))
+        ).scalar_subquery()
+        newest_item = select(func.max(InventoryItem.updated_at)).join(
+            OrderItem, OrderItem.inventory_item_id == InventoryItem.id
+        ).where(OrderItem.order_id.in_(select(matching.c.id))).scalar_subquery()
+        return query_version(
+            query, Order, ("customers", "order_items", "inventory_items"), (newest_customer, newest_item)
+        )
+    
+    @staticmethod
+    def export_orders(
+        db: Session,
+        status: Optional[OrderStatusEnum] = None,
+        customer_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> Select:
+        """Build a statement selecting every matching order row, in id order."""
+        return select(Order.__table__).where(
+            *OrderCRUD._filters(status, customer_id, date_from, date_to)
+        ).order_by(Order.id)
+    
+    @staticmethod
+    def _track_status(
+        db: Session,
+        order_id: int,
+        previous_status: Optional[OrderStatusEnum],
+        status: OrderStatusEnum
+    ) -> None:
+        """Queue live updates for an order entering or changing status."""
+        if previous_status is not None and previous_status != status:
+            live_updates.emit(db, "order_status", id=order_id, previous_status=previous_status, status=status)
+        pending = (status == OrderStatusEnum.PENDING) - (previous_status == OrderStatusEnum.PENDING)
+        if pending:
+            live_updates.count_changed(db, pending_orders=pending)
+    
     @staticmethod
     def create_order(db: Session, order: OrderCreate) -> Order:
-        """Create a new order with items."""
+        """
+        Create a new order with items.
+        All lines are loaded with one IN query and stock is decremented with a
+        single conditional UPDATE, so the whole order commits once or not at all.
+        """
         # Verify customer exists
         customer = db.query(Customer).filter(Customer.id == order.customer_id).first()
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
         
-        # Generate order number
-        order_number = OrderCRUD.generate_order_number(db)
+        # Total requested quantity per inventory item (an item may appear on several lines)
+        requested = {}
+        for item in order.items:
+            requested[item.inventory_item_id] = requested.get(item.inventory_item_id, 0) + item.quantity
         
-        # Calculate totals
-        subtotal = Decimal('0.00')
-        order_items_data = []
+        inventory_items = {
+            inventory_item.id: inventory_item
+            for inventory_item in db.query(InventoryItem).filter(InventoryItem.id.in_(requested)).all()
+        }
         
-        for item in order.items:
-            # Verify inventory item exists and has enough stock
-            inventory_item = db.query(InventoryItem).filter(
-                InventoryItem.id == item.inventory_item_id
-            ).first()
+        # Verify inventory items exist and have enough stock
+        for item_id, quantity in requested.items():
+            inventory_item = inventory_items.get(item_id)
             if not inventory_item:
                 raise HTTPException(
                     status_code=404, 
-                    detail=f"Inventory item {item.inventory_item_id} not found"
+                    detail=f"Inventory item {item_id} not found"
                 )
             
-            if inventory_item.quantity < item.quantity:
+            if inventory_item.quantity < quantity:
                 raise HTTPException(
                     status_code=400,
-                    detail=f"Insufficient stock for item {inventory_item.name}. Available: {inventory_item.quantity}, Requested: {item.quantity}"
+                    detail=f"Insufficient stock for item {inventory_item.name}. Available: {inventory_item.quantity}, Requested: {quantity}"
                 )
-            
+        
+        # Generate order number
+        order_number = OrderCRUD.generate_order_number(db)
+        
+        # Calculate totals
+        subtotal = Decimal('0.00')
+        order_items_data = []
+        
+        for item in order.items:
             total_price = item.unit_price * item.quantity
             subtotal += total_price
             
@@ -333,8 +480,7 @@ class OrderCRUD:
                 'inventory_item_id': item.inventory_item_id,
                 'quantity': item.quantity,
                 'unit_price': item.unit_price,
-                'total_price': total_price,
-                'inventory_item': inventory_item
+                'total_price': total_price
             })
         
         # Calculate tax and total
@@ -355,32 +501,59 @@ class OrderCRUD:
         db.add(db_order)
         db.flush()  # Get the order ID
         
-        # Create order items and update inventory
-        for item_data in order_items_data:
-            db_order_item = OrderItem(
-                order_id=db_order.id,
-                inventory_item_id=item_data['inventory_item_id'],
-                quantity=item_data['quantity'],
-                unit_price=item_data['unit_price'],
-                total_price=item_data['total_price']
-            )
-            db.add(db_order_item)
-            
-            # Update inventory quantity
-            inventory_item = item_data['inventory_item']
-            StockMovementCRUD.create_movement(
-                db=db,
-                inventory_item_id=inventory_item.id,
-                movement_type=StockMovementTypeEnum.OUT,
-                quantity=-item_data['quantity'],
-                reference_type='order',
-                reference_id=db_order.id,
-                notes=f"Sold via order {order_number}"
+        db.execute(insert(OrderItem), [
+            {'order_id': db_order.id, **item_data}
+            for item_data in order_items_data
+        ])
+        row_changes.touch(db, "order_items", [])
+        
+        # Decrement stock; a concurrent order may have taken it since the check above
+        new_quantities = StockMovementCRUD.adjust_quantities(
+            db, {item_id: -quantity for item_id, quantity in requested.items()}
+        )
+        if len(new_quantities) != len(requested):
+            db.rollback()
+            item_id = next(item_id for item_id in requested if item_id not in new_quantities)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock for item {inventory_items[item_id].name}. Requested: {requested[item_id]}"
             )
         
+        # Record one OUT movement per line, chaining quantities for repeated items
+        running = {item_id: new_quantities[item_id] + quantity for item_id, quantity in requested.items()}
+        movements = []
+        for item_data in order_items_data:
+            item_id = item_data['inventory_item_id']
+            previous_quantity = running[item_id]
+            running[item_id] = previous_quantity - item_data['quantity']
+            movements.append({
+                'inventory_item_id': item_id,
+                'movement_type': StockMovementTypeEnum.OUT,
+                'quantity': -item_data['quantity'],
+                'previous_quantity': previous_quantity,
+                'new_quantity': running[item_id],
+                'reference_type': 'order',
+                'reference_id': db_order.id,
+                'notes': f"Sold via order {order_number}"
+            })
+        db.execute(insert(StockMovement), movements)
+        row_changes.touch(db, "stock_movements", [])
+        
+        live_updates.emit(
+            db, "order_created",
+            id=db_order.id,
+            order_number=order_number,
+            customer_id=db_order.customer_id,
+            status=db_order.status,
+            total_amount=total_amount,
+            item_count=len(order_items_data)
+        )
+        OrderCRUD._track_status(db, db_order.id, None, db_order.status)
+        for movement in movements:
+            StockMovementCRUD._emit_movement(db, movement)
+        
         db.commit()
-        db.refresh(db_order)
-        return db_order
+        return OrderCRUD.get_order(db, db_order.id)
     
     @staticmethod
     def update_order(
@@ -393,10 +566,12 @@ class OrderCRUD:
         if not db_order:
             return None
         
+        previous_status = db_order.status
         update_data = order_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_order, field, value)
         
+        OrderCRUD._track_status(db, db_order.id, previous_status, db_order.status)
         db.commit()
         db.refresh(db_order)
         return db_order
@@ -423,9 +598,11 @@ class OrderCRUD:
                 quantity=order_item.quantity,
                 reference_type='order_cancellation',
                 reference_id=order_id,
-                notes=f"Order {db_order.order_number} cancelled"
+                notes=f"Order {db_order.order_number} cancelled",
+                commit=False
             )
         
+        OrderCRUD._track_status(db, db_order.id, db_order.status, OrderStatusEnum.CANCELLED)
         db_order.status = OrderStatusEnum.CANCELLED
         db.commit()
         db.refresh(db_order)
@@ -435,6 +612,88 @@ class OrderCRUD:
 class StockMovementCRUD:
     """CRUD operations for stock movements."""
     
+    @staticmethod
+    def _sync_loaded_quantity(db: Session, item_id: int, quantity: int) -> None:
+        """Update an already-loaded item's quantity without marking it dirty."""
+        loaded = db.identity_map.get(identity_key(InventoryItem, item_id))
+        if loaded is not None:
+            set_committed_value(loaded, 'quantity', quantity)
+    
+    @staticmethod
+    def _quantity_adjusted(db: Session, row, delta: int) -> None:
+        """
+        Bookkeeping after an UPDATE ... RETURNING (id, quantity, min_stock_level,
+        is_active) row: refresh the loaded item and queue low stock updates.
+        """
+        StockMovementCRUD._sync_loaded_quantity(db, row.id, row.quantity)
+        live_updates.stock_changed(
+            db, row.id,
+            was_low=live_updates.is_low_stock(row.quantity - delta, row.min_stock_level, row.is_active),
+            is_low=live_updates.is_low_stock(row.quantity, row.min_stock_level, row.is_active),
+            quantity=row.quantity,
+            min_stock_level=row.min_stock_level
+        )
+    
+    @staticmethod
+    def _emit_movement(db: Session, movement: dict) -> None:
+        """Queue a live update for a recorded stock movement."""
+        live_updates.emit(db, "stock_movement", **{
+            field: movement.get(field)
+            for field in (
+                'inventory_item_id', 'movement_type', 'quantity', 'previous_quantity',
+                'new_quantity', 'reference_type', 'reference_id'
+            )
+        })
+    
+    @staticmethod
+    def adjust_quantity(db: Session, inventory_item_id: int, delta: int) -> Optional[int]:
+        """
+        Atomically add `delta` to an item's quantity, without committing.
+        A single conditional UPDATE ... RETURNING does the read and the write, so
+        concurrent changes to the same item can never be lost or overdraw stock.
+        Returns the new quantity, or None if the item does not exist or the
+        change would take its stock below zero.
+        """
+        row = db.execute(
+            update(InventoryItem)
+            .where(InventoryItem.id == inventory_item_id, InventoryItem.quantity + delta >= 0)
+            .values(quantity=InventoryItem.quantity + delta)
+            .returning(InventoryItem.id, InventoryItem.quantity, InventoryItem.min_stock_level, InventoryItem.is_active)
+            .execution_options(synchronize_session=False)
+        ).one_or_none()
+        row_changes.touch(db, "inventory_items", [row.id] if row else [])
+        
+        if row is None:
+            return None
+        StockMovementCRUD._quantity_adjusted(db, row, delta)
+        return row.quantity
+    
+    @staticmethod
+    def adjust_quantities(db: Session, deltas: Dict[int, int]) -> Dict[int, int]:
+        """
+        Apply per-item quantity deltas with one conditional UPDATE, without committing.
+        Returns {item_id: new_quantity} for the items that were updated; items that
+        do not exist or whose stock would go negative are left unchanged and omitted.
+        """
+        if not deltas:
+            return {}
+        
+        delta = case(deltas, value=InventoryItem.id)
+        result = db.execute(
+            update(InventoryItem)
+            .where(InventoryItem.id.in_(deltas), InventoryItem.quantity + delta >= 0)
+            .values(quantity=InventoryItem.quantity + delta)
+            .returning(InventoryItem.id, InventoryItem.quantity, InventoryItem.min_stock_level, InventoryItem.is_active)
+            .execution_options(synchronize_session=False)
+        )
+        new_quantities = {}
+        for row in result:
+            new_quantities[row.id] = row.quantity
+            StockMovementCRUD._quantity_adjusted(db, row, deltas[row.id])
+        row_changes.touch(db, "inventory_items", new_quantities)
+        
+        return new_quantities
+    
     @staticmethod
     def create_movement(
         db: Session,
@@ -445,24 +704,25 @@ class StockMovementCRUD:
         reference_id: Optional[int] = None,
         notes: Optional[str] = None,
         unit_cost: Optional[Decimal] = None,
-        created_by: Optional[str] = None
+        created_by: Optional[str] = None,
+        commit: bool = True
     ) -> StockMovement:
-        """Create a stock movement and update inventory quantity."""
-        # Get current inventory item
-        inventory_item = db.query(InventoryItem).filter(
-            InventoryItem.id == inventory_item_id
-        ).first()
-        if not inventory_item:
-            raise HTTPException(status_code=404, detail="Inventory item not found")
-        
-        previous_quantity = inventory_item.quantity
-        new_quantity = previous_quantity + quantity
-        
-        # Ensure quantity doesn't go negative
-        if new_quantity < 0:
+        """
+        Create a stock movement and update inventory quantity.
+        Pass commit=False to leave the transaction open for the caller.
+        """
+        new_quantity = StockMovementCRUD.adjust_quantity(db, inventory_item_id, quantity)
+        if new_quantity is None:
+            current_quantity = db.query(InventoryItem.quantity).filter(
+                InventoryItem.id == inventory_item_id
+            ).scalar()
+            if current_quantity is None:
+                raise HTTPException(status_code=404, detail="Inventory item not found")
+            
+            # Ensure quantity doesn't go negative
             raise HTTPException(
                 status_code=400,
-                detail=f"Insufficient stock. Current: {previous_quantity}, Requested change: {quantity}"
+                detail=f"Insufficient stock. Current: {current_quantity}, Requested change: {quantity}"
             )
         
         # Create stock movement record
@@ -470,7 +730,7 @@ class StockMovementCRUD:
             inventory_item_id=inventory_item_id,
             movement_type=movement_type,
             quantity=quantity,
-            previous_quantity=previous_quantity,
+            previous_quantity=new_quantity - quantity,
             new_quantity=new_quantity,
             unit_cost=unit_cost,
             reference_type=reference_type,
@@ -479,13 +739,127 @@ class StockMovementCRUD:
             created_by=created_by
         )
         db.add(db_movement)
+        StockMovementCRUD._emit_movement(db, {
+            'inventory_item_id': inventory_item_id,
+            'movement_type': movement_type,
+            'quantity': quantity,
+            'previous_quantity': new_quantity - quantity,
+            'new_quantity': new_quantity,
+            'reference_type': reference_type,
+            'reference_id': reference_id
+        })
         
-        # Update inventory quantity
-        inventory_item.quantity = new_quantity
+        if commit:
+            db.commit()
+            db.refresh(db_movement)
+        else:
+            db.flush()
+        # Responses read the item after the async facade has left the session's
+        # greenlet, where a lazy load fails, so load it here
+        db.refresh(db_movement, attribute_names=["inventory_item"])
+        return db_movement
+    
+    @staticmethod
+    def create_movements_batch(db: Session, movements: List[StockMovementCreate]) -> List[dict]:
+        """
+        Apply many stock movements in one transaction.
+        Items are looked up in bulk, accepted deltas are summed per item and
+        applied with one conditional UPDATE per chunk, and all movement rows
+        are inserted together before a single commit. Rows that reference a
+        missing item or would take stock below zero (applying the batch in
+        order) are reported as errors and skipped; the rest are applied.
+        Returns one result dict per submitted movement, in order.
+        """
+        item_ids = list({movement.inventory_item_id for movement in movements})
+        quantities = {}
+        for start in range(0, len(item_ids), BATCH_CHUNK_SIZE):
+            chunk = item_ids[start:start + BATCH_CHUNK_SIZE]
+            quantities.update(db.query(InventoryItem.id, InventoryItem.quantity).filter(
+                InventoryItem.id.in_(chunk)
+            ).all())
+        
+        results = []
+        accepted = []
+        running = dict(quantities)
+        for index, movement in enumerate(movements):
+            result = {'index': index, 'inventory_item_id': movement.inventory_item_id}
+            results.append(result)
+            item_id = movement.inventory_item_id
+            if item_id not in running:
+                result.update(status='error', error="Inventory item not found")
+            elif running[item_id] + movement.quantity < 0:
+                result.update(
+                    status='error',
+                    error=f"Insufficient stock. Current: {running[item_id]}, Requested change: {movement.quantity}"
+                )
+            else:
+                running[item_id] += movement.quantity
+                accepted.append((result, movement))
+        
+        deltas = {}
+        for _, movement in accepted:
+            deltas[movement.inventory_item_id] = deltas.get(movement.inventory_item_id, 0) + movement.quantity
+        
+        new_quantities = {}
+        delta_items = list(deltas.items())
+        for start in range(0, len(delta_items), BATCH_CHUNK_SIZE):
+            new_quantities.update(StockMovementCRUD.adjust_quantities(
+                db, dict(delta_items[start:start + BATCH_CHUNK_SIZE])
+            ))
+        
+        # Rebuild each item's quantity chain from the value the UPDATE returned
+        chain = {item_id: new_quantities[item_id] - delta for item_id, delta in deltas.items() if item_id in new_quantities}
+        rows = []
+        applied = []
+        for result, movement in accepted:
+            item_id = movement.inventory_item_id
+            if item_id not in chain:
+                # Stock changed concurrently and the item's total no longer fits
+                result.update(status='error', error="Stock changed concurrently; movement not applied")
+                continue
+            previous_quantity = chain[item_id]
+            chain[item_id] = previous_quantity + movement.quantity
+            result.update(status='applied', previous_quantity=previous_quantity, new_quantity=chain[item_id])
+            rows.append({
+                **movement.dict(),
+                'previous_quantity': previous_quantity,
+                'new_quantity': chain[item_id]
+            })
+            StockMovementCRUD._emit_movement(db, rows[-1])
+            applied.append(result)
+        
+        if rows:
+            # Multi-row INSERT ... RETURNING, with the ids returned in the order
+            # of `rows` so they line up with `applied`
+            movement_ids = db.scalars(
+                insert(StockMovement).returning(StockMovement.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            for result, movement_id in zip(applied, movement_ids):
+                result['movement_id'] = movement_id
+            row_changes.touch(db, "stock_movements", movement_ids)
         
         db.commit()
-        db.refresh(db_movement)
-        return db_movement
+        return results
+    
+    @staticmethod
+    def _filters(
+        inventory_item_id: Optional[int],
+        movement_type: Optional[StockMovementTypeEnum],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime]
+    ) -> list:
+        """Build the filters shared by the stock movement list and export."""
+        filters = []
+        if inventory_item_id:
+            filters.append(StockMovement.inventory_item_id == inventory_item_id)
+        if movement_type:
+            filters.append(StockMovement.movement_type == movement_type)
+        if date_from:
+            filters.append(StockMovement.created_at >= date_from)
+        if date_to:
+            filters.append(StockMovement.created_at <= date_to)
+        return filters
     
     @staticmethod
     def get_stock_movements(
@@ -495,30 +869,39 @@ class StockMovementCRUD:
         inventory_item_id: Optional[int] = None,
         movement_type: Optional[StockMovementTypeEnum] = None,
         date_from: Optional[datetime] = None,
-        date_to: Optional[datetime] = None
-    ) -> Tuple[List[StockMovement], int]:
+        date_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        count: CountModeEnum = CountModeEnum.EXACT
+    ) -> Tuple[List[StockMovement], Optional[int]]:
         """Get stock movements with optional filtering and pagination."""
         query = db.query(StockMovement).options(
             joinedload(StockMovement.inventory_item)
         )
         
-        filters = []
-        if inventory_item_id:
-            filters.append(StockMovement.inventory_item_id == inventory_item_id)
-        if movement_type:
-            filters.append(StockMovement.movement_type == movement_type)
-        if date_from:
-            filters.append(StockMovement.created_at >= date_from)
-        if date_to:
-            filters.append(StockMovement.created_at <= date_to)
-        
+        filters = StockMovementCRUD._filters(inventory_item_id, movement_type, date_from, date_to)
         if filters:
             query = query.filter(and_(*filters))
         
-        total = query.count()
-        movements = query.order_by(StockMovement.created_at.desc()).offset(skip).limit(limit).all()
+        total = count_rows(query, StockMovement, count, filtered=bool(filters))
+        query = apply_keyset(query, StockMovement, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        movements = query.limit(limit).all()
         
         return movements, total
+    
+    @staticmethod
+    def export_stock_movements(
+        db: Session,
+        inventory_item_id: Optional[int] = None,
+        movement_type: Optional[StockMovementTypeEnum] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> Select:
+        """Build a statement selecting every matching stock movement row, in id order."""
+        return select(StockMovement.__table__).where(
+            *StockMovementCRUD._filters(inventory_item_id, movement_type, date_from, date_to)
+        ).order_by(StockMovement.id)
 
 
 class ReportsCRUD:
@@ -526,73 +909,304 @@ class ReportsCRUD:
     
     @staticmethod
     def get_low_stock_items(db: Session, threshold: Optional[int] = None) -> List[InventoryItem]:
-        """Get items with low stock levels."""
+        """
+        Get active items with low stock levels.
+        Served from the stock_status projection: an index lookup on status,
+        or a range scan on quantity when a threshold is given.
+        """
+        statuses = stock_status.status_source(db)
+        query = db.query(InventoryItem).join(
+            statuses, statuses.c.inventory_item_id == InventoryItem.id
+        ).filter(statuses.c.is_active == True)
+        
         if threshold is None:
             # Use each item's min_stock_level
-            return db.query(InventoryItem).filter(
-                InventoryItem.quantity <= InventoryItem.min_stock_level,
-                InventoryItem.is_active == True
-            ).all()
-        else:
-            # Use provided threshold
-            return db.query(InventoryItem).filter(
-                InventoryItem.quantity <= threshold,
-                InventoryItem.is_active == True
-            ).all()
+            query = query.filter(statuses.c.status == stock_status.LOW)
+            return query.order_by(statuses.c.inventory_item_id).all()
+        
+        # Use provided threshold. The matches are sorted here: ordering in
+        # SQL makes SQLite prefer a full scan in id order over the quantity index
+        items = query.filter(statuses.c.quantity <= threshold).all()
+        return sorted(items, key=lambda item: item.id)
+    
+    @staticmethod
+    def get_stock_levels(
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        low_stock_only: bool = False
+    ) -> List[dict]:
+        """
+        Get items with their stock status, ordered by item id.
+        Low stock pages are index reads on the stock_status projection.
+        """
+        statuses = stock_status.status_source(db)
+        query = db.query(
+            InventoryItem.id,
+            InventoryItem.name,
+            InventoryItem.sku,
+            InventoryItem.min_stock_level,
+            InventoryItem.max_stock_level,
+            statuses.c.quantity,
+            statuses.c.status
+        ).join(statuses, statuses.c.inventory_item_id == InventoryItem.id)
+        
+        if low_stock_only:
+            query = query.filter(
+                statuses.c.status == stock_status.LOW,
+                statuses.c.is_active == True
+            )
+        
+        rows = query.order_by(statuses.c.inventory_item_id).offset(skip).limit(limit).all()
+        return [
+            {
+                'inventory_item_id': row.id,
+                'item_name': row.name,
+                'sku': row.sku,
+                'current_quantity': row.quantity,
+                'min_stock_level': row.min_stock_level,
+                'max_stock_level': row.max_stock_level,
+                'status': row.status
+            }
+            for row in rows
+        ]
+    
+    @staticmethod
+    def get_dashboard_counts(db: Session) -> dict:
+        """Get the dashboard's record counts in a single statement."""
+        def count(model, *filters):
+            return select(func.count(model.id)).where(*filters).scalar_subquery()
+        
+        statuses = stock_status.status_source(db)
+        
+        row = db.execute(select(
+            count(InventoryItem).label('total_inventory_items'),
+            count(Customer).label('total_customers'),
+            count(Supplier).label('total_suppliers'),
+            count(Order, Order.status == OrderStatusEnum.PENDING).label('pending_orders'),
+            select(func.count()).select_from(statuses).where(
+                statuses.c.status == stock_status.LOW,
+                statuses.c.is_active == True
+            ).scalar_subquery().label('low_stock_items')
+        )).one()
+        return dict(row._mapping)
     
     @staticmethod
     def get_inventory_valuation(db: Session) -> dict:
-        """Get inventory valuation report."""
-        result = db.query(
+        """
+        Get inventory valuation report with a per-category breakdown.
+        Computed by one grouped query and cached until inventory items change.
+        """
+        cached = report_cache.get(InventoryItem.__tablename__, ('inventory_valuation',))
+        if cached is not None:
+            return cached
+        
+        # Taken before the query: a write committed while it runs must leave the result out of date
+        generation, = report_cache.generations(InventoryItem.__tablename__)
+        rows = db.query(
+            InventoryItem.category,
             func.count(InventoryItem.id).label('total_items'),
             func.sum(InventoryItem.quantity).label('total_quantity'),
             func.sum(InventoryItem.quantity * InventoryItem.cost_price).label('total_cost_value'),
             func.sum(InventoryItem.quantity * InventoryItem.price).label('total_retail_value')
-        ).filter(InventoryItem.is_active == True).first()
+        ).filter(InventoryItem.is_active == True).group_by(
+            InventoryItem.category
+        ).order_by(InventoryItem.category).all()
         
-        total_cost_value = result.total_cost_value or Decimal('0.00')
-        total_retail_value = result.total_retail_value or Decimal('0.00')
+        categories_breakdown = []
+        for row in rows:
+            cost_value = row.total_cost_value or Decimal('0.00')
+            retail_value = row.total_retail_value or Decimal('0.00')
+            categories_breakdown.append({
+                'category': row.category.value,
+                'total_items': row.total_items,
+                'total_quantity': row.total_quantity or 0,
+                'total_cost_value': cost_value,
+                'total_retail_value': retail_value,
+                'potential_profit': retail_value - cost_value
+            })
         
-        return {
-            'total_items': result.total_items or 0,
-            'total_quantity': result.total_quantity or 0,
+        # Overall totals are the sum of the (few) category rows
+        total_cost_value = sum((c['total_cost_value'] for c in categories_breakdown), Decimal('0.00'))
+        total_retail_value = sum((c['total_retail_value'] for c in categories_breakdown), Decimal('0.00'))
+        
+        valuation = {
+            'total_items': sum(c['total_items'] for c in categories_breakdown),
+            'total_quantity': sum(c['total_quantity'] for c in categories_breakdown),
             'total_cost_value': total_cost_value,
             'total_retail_value': total_retail_value,
-            'potential_profit': total_retail_value - total_cost_value
+            'potential_profit': total_retail_value - total_cost_value,
+            'categories_breakdown': categories_breakdown
         }
+        report_cache.set(InventoryItem.__tablename__, ('inventory_valuation',), valuation, generation)
+        return valuation
+    
+    @staticmethod
+    def _sales_filters(date_from: Optional[datetime], date_to: Optional[datetime]) -> list:
+        """Filters selecting the orders that count as sales."""
+        filters = [Order.status.in_([OrderStatusEnum.DELIVERED, OrderStatusEnum.SHIPPED])]
+        if date_from:
+            filters.append(Order.order_date >= date_from)
+        if date_to:
+            filters.append(Order.order_date <= date_to)
+        return filters
     
     @staticmethod
     def get_sales_summary(
         db: Session,
         date_from: Optional[datetime] = None,
-        date_to: Optional[datetime] = None
+        date_to: Optional[datetime] = None,
+        group_by: Optional[SalesGroupByEnum] = None,
+        top_n: int = 10
     ) -> dict:
-        """Get sales summary for a period."""
-        query = db.query(Order).filter(
-            Order.status.in_([OrderStatusEnum.DELIVERED, OrderStatusEnum.SHIPPED])
-        )
+        """
+        Get sales summary for a period.
+        Totals, top selling items and the optional breakdown are each computed
+        by one grouped query, so the cost does not grow with rows loaded into Python.
+        """
+        filters = ReportsCRUD._sales_filters(date_from, date_to)
         
-        if date_from:
-            query = query.filter(Order.order_date >= date_from)
-        if date_to:
-            query = query.filter(Order.order_date <= date_to)
+        totals = db.query(
+            func.count(Order.id).label('total_orders'),
+            func.sum(Order.total_amount).label('total_revenue')
+        ).filter(*filters).one()
         
-        orders = query.all()
+        total_items_sold = db.query(func.sum(OrderItem.quantity)).join(
+            Order, OrderItem.order_id == Order.id
+        ).filter(*filters).scalar()
         
-        total_orders = len(orders)
-        total_revenue = sum(order.total_amount for order in orders)
-        total_items_sold = sum(
-            sum(item.quantity for item in order.order_items) 
-            for order in orders
-        )
+        total_orders = totals.total_orders or 0
+        total_revenue = totals.total_revenue or Decimal('0.00')
         average_order_value = total_revenue / total_orders if total_orders > 0 else Decimal('0.00')
         
         return {
             'total_orders': total_orders,
             'total_revenue': total_revenue,
-            'total_items_sold': total_items_sold,
-            'average_order_value': average_order_value
+            'total_items_sold': total_items_sold or 0,
+            'average_order_value': average_order_value,
+            'top_selling_items': ReportsCRUD.get_top_selling_items(db, filters, top_n),
+            'breakdown': ReportsCRUD.get_sales_breakdown(db, filters, group_by) if group_by else []
         }
+    
+    @staticmethod
+    def get_top_selling_items(db: Session, filters: list, limit: int = 10) -> List[dict]:
+        """Get the best selling items by quantity for orders matching `filters`."""
+        quantity_sold = func.sum(OrderItem.quantity)
+        rows = db.query(
+            InventoryItem.id,
+            InventoryItem.name,
+            InventoryItem.sku,
+            quantity_sold.label('quantity_sold'),
+            func.sum(OrderItem.total_price).label('revenue')
+        ).select_from(OrderItem).join(
+            Order, OrderItem.order_id == Order.id
+        ).join(
+            InventoryItem, OrderItem.inventory_item_id == InventoryItem.id
+        ).filter(*filters).group_by(
+            InventoryItem.id, InventoryItem.name, InventoryItem.sku
+        ).order_by(quantity_sold.desc(), InventoryItem.id).limit(limit).all()
+        
+        return [
+            {
+                'inventory_item_id': row.id,
+                'name': row.name,
+                'sku': row.sku,
+                'quantity_sold': row.quantity_sold,
+                'revenue': row.revenue
+            }
+            for row in rows
+        ]
+    
+    @staticmethod
+    def _sales_period(db: Session, group_by: SalesGroupByEnum, column):
+        """
+        Label `column` with its day, month or week as text; a week is labelled
+        with the date of its Monday, so weeks never split at a year boundary.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            if group_by == SalesGroupByEnum.WEEK:
+                column = func.date_trunc('week', column)
+            return func.to_char(column, 'YYYY-MM' if group_by == SalesGroupByEnum.MONTH else 'YYYY-MM-DD')
+        if group_by == SalesGroupByEnum.WEEK:
+            # Six days back, then forward to a Monday: the Monday on or before the date
+            return func.date(column, '-6 days', 'weekday 1')
+        return func.strftime('%Y-%m' if group_by == SalesGroupByEnum.MONTH else '%Y-%m-%d', column)
+    
+    @staticmethod
+    def get_sales_breakdown(db: Session, filters: list, group_by: SalesGroupByEnum) -> List[dict]:
+        """Get order count, revenue and items sold per group for orders matching `filters`."""
+        if group_by == SalesGroupByEnum.CATEGORY:
+            # Orders can span categories, so revenue comes from the order lines
+            revenue = func.sum(OrderItem.total_price)
+            rows = db.query(
+                InventoryItem.category.label('group'),
+                func.count(func.distinct(Order.id)).label('total_orders'),
+                revenue.label('total_revenue'),
+                func.sum(OrderItem.quantity).label('total_items_sold')
+            ).select_from(OrderItem).join(
+                Order, OrderItem.order_id == Order.id
+            ).join(
+                InventoryItem, OrderItem.inventory_item_id == InventoryItem.id
+            ).filter(*filters).group_by(InventoryItem.category).order_by(revenue.desc()).all()
+            return [
+                {
+                    'group': row.group.value,
+                    'total_orders': row.total_orders,
+                    'total_revenue': row.total_revenue or Decimal('0.00'),
+                    'total_items_sold': row.total_items_sold or 0
+                }
+                for row in rows
+            ]
+        
+        # Items per order, pre-aggregated so joining it does not repeat order totals
+        items_per_order = db.query(
+            OrderItem.order_id.label('order_id'),
+            func.sum(OrderItem.quantity).label('quantity')
+        ).group_by(OrderItem.order_id).subquery()
+        
+        revenue = func.sum(Order.total_amount)
+        columns = [
+            func.count(Order.id).label('total_orders'),
+            revenue.label('total_revenue'),
+            func.sum(items_per_order.c.quantity).label('total_items_sold')
+        ]
+        
+        if group_by == SalesGroupByEnum.CUSTOMER:
+            query = db.query(
+                Customer.id.label('customer_id'),
+                Customer.first_name,
+                Customer.last_name,
+                *columns
+            ).select_from(Order).join(Customer, Order.customer_id == Customer.id)
+            group_columns = [Customer.id, Customer.first_name, Customer.last_name]
+            order_by = [revenue.desc(), Customer.id]
+        else:
+            period = ReportsCRUD._sales_period(db, group_by, Order.order_date)
+            query = db.query(period.label('group'), *columns).select_from(Order)
+            group_columns = [period]
+            order_by = [period]
+        
+        rows = query.outerjoin(
+            items_per_order, items_per_order.c.order_id == Order.id
+        ).filter(*filters).group_by(*group_columns).order_by(*order_by).all()
+        
+        breakdown = []
+        for row in rows:
+            entry = {
+                'total_orders': row.total_orders,
+                'total_revenue': row.total_revenue or Decimal('0.00'),
+                'total_items_sold': row.total_items_sold or 0
+            }
+            if group_by == SalesGroupByEnum.CUSTOMER:
+                entry = {
+                    'group': f"{row.first_name} {row.last_name}",
+                    'customer_id': row.customer_id,
+                    **entry
+                }
+            else:
+                entry = {'group': row.group, **entry}
+            breakdown.append(entry)
+        return breakdown
 
 
 # Create singleton instances
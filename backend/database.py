@@ -1,25 +1,157 @@
 """
 Database configuration and session management.
 """
-from sqlalchemy import create_engine
+import asyncio
+import logging
+import time
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from config import settings
+import metrics
+import slow_queries
+from search_index import install_search_index
+from stock_status import install_stock_status
+
+logger = logging.getLogger(__name__)
+
+# INSERT constructs with ON CONFLICT support, by dialect
+_UPSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+IS_SQLITE = "sqlite" in settings.database_url
+PRODUCTION_PROFILE = settings.db_profile == "production"
+
+# SQL echo is a development aid only
+SQL_ECHO = settings.debug and not PRODUCTION_PROFILE
+
+# Per-connection settings for the production profile: WAL lets readers run
+# alongside a writer, NORMAL sync is durable in WAL mode without an fsync per
+# commit, and the cache/mmap/temp_store settings keep hot pages in memory
+SQLITE_PRODUCTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+    f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+    f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+    "PRAGMA temp_store=MEMORY",
+]
 
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-    echo=settings.debug
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    echo=SQL_ECHO
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_url(url: str) -> str:
+    """Map a sync database URL to its async driver equivalent."""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+# Async engine and sessions used by the API routes, so database I/O does not
+# block the event loop
+async_engine = create_async_engine(
+    settings.async_database_url or _async_url(settings.database_url),
+    echo=SQL_ECHO
+)
+
+# expire_on_commit=False: attributes must stay readable after commit because
+# responses are serialized outside the session's greenlet
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the production PRAGMAs to each new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRODUCTION_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+if IS_SQLITE and PRODUCTION_PROFILE:
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+
+
+def _engine_name(session) -> str:
+    return "async" if session.bind is async_engine.sync_engine else "sync"
+
+
+def _count_commit(session):
+    metrics.COMMITS.inc((_engine_name(session),))
+
+
+def _count_rollback(session):
+    metrics.ROLLBACKS.inc((_engine_name(session),))
+
+
+if settings.metrics_enabled:
+    for _engine, _name in ((engine, "sync"), (async_engine.sync_engine, "async")):
+        event.listen(_engine, "before_cursor_execute", metrics.start_statement)
+        event.listen(_engine, "after_cursor_execute", metrics.finish_statement)
+        metrics.instrument_pool(_engine, _name)
+    # Session events: closing a read-only session is not counted as a rollback
+    event.listen(Session, "after_commit", _count_commit)
+    event.listen(Session, "after_rollback", _count_rollback)
+
+if settings.slow_query_enabled:
+    for _engine in (engine, async_engine.sync_engine):
+        event.listen(_engine, "before_cursor_execute", slow_queries.start_statement)
+        event.listen(_engine, "after_cursor_execute", slow_queries.finish_statement)
+    # Plans are taken on the sync engine's own connections
+    slow_queries.slow_query_log.engine = engine
+
 # Create Base class for declarative models
 Base = declarative_base()
 
+# Keep the inventory full-text index alongside the regular tables
+event.listen(Base.metadata, "after_create", install_search_index)
+event.listen(Base.metadata, "after_create", install_stock_status)
+
+
+def missing_indexes(metadata, connection) -> list:
+    """Indexes declared on the models that the database's tables lack."""
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def install_missing_indexes(target, connection, **kw):
+    """
+    Create declared indexes that existing tables lack. ``create_all`` only
+    builds indexes along with new tables, so this carries indexes added to
+    the models over to existing databases.
+    """
+    for index in missing_indexes(target, connection):
+        logger.info("Creating index %s on %s", index.name, index.table.name)
+        index.create(connection)
+
+
+event.listen(Base.metadata, "after_create", install_missing_indexes)
+
 
 def get_db():
     """Dependency to get database session."""
@@ -30,6 +162,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def create_tables():
     """Create all database tables."""
     Base.metadata.create_all(bind=engine)
@@ -38,3 +176,37 @@ def create_tables():
 def drop_tables():
     """Drop all database tables."""
     Base.metadata.drop_all(bind=engine)
+
+
+async def run_sqlite_maintenance():
+    """
+    Periodically checkpoint the WAL and refresh query planner statistics.
+    Runs until cancelled; failures are logged and retried on the next tick.
+    """
+    tick = min(settings.sqlite_checkpoint_interval, settings.sqlite_optimize_interval)
+    last_checkpoint = last_optimize = time.monotonic()
+    while True:
+        await asyncio.sleep(tick)
+        now = time.monotonic()
+        try:
+            async with async_engine.connect() as connection:
+                if now - last_checkpoint >= settings.sqlite_checkpoint_interval:
+                    await connection.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+                    last_checkpoint = now
+                if now - last_optimize >= settings.sqlite_optimize_interval:
+                    await connection.exec_driver_sql("PRAGMA optimize")
+                    last_optimize = now
+        except SQLAlchemyError:
+            logger.exception("SQLite maintenance failed")
+
+
+def start_sqlite_maintenance():
+    """Start the maintenance loop for the production SQLite profile, if enabled."""
+    if not (IS_SQLITE and PRODUCTION_PROFILE):
+        return None
+    return asyncio.create_task(run_sqlite_maintenance())
+
+
+def upsert(bind, table):
+    """An INSERT on `table` for `bind`'s dialect that supports ``on_conflict_do_update``."""
+    return _UPSERTS[bind.dialect.name](table)
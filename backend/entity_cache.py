@@ -0,0 +1,184 @@
+"""
+Read-through cache of serialized single-entity responses.
+
+The single-item GET routes keep the JSON body they built for an inventory
+item, customer, supplier or order, with its ETag, in a bounded LRU with a
+TTL, so a hit (or a ``304``) is returned without a query or any
+re-serialization. Each entry records the
+rows it was built from (an order also depends on its customer, its order
+items and their inventory items). ``row_changes`` delivers the rows every
+committed transaction wrote, whichever write path it was — updates,
+deletes, stock movements, imports — and entries depending on them are
+dropped. A load that overlaps a commit to one of its rows is not stored,
+so a stale read can never be cached.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Iterable, Optional, Type
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from config import settings
+from etag import body_response, make_etag
+import metrics
+import row_changes
+
+# Invalidations remembered for checking loads that were in flight
+_HISTORY = 256
+
+
+class EntityCache:
+    """Bounded LRU/TTL cache of entity response bodies with dependency invalidation."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._dependents: dict = {}  # (table, id) -> keys of entries built from that row
+        self._version = 0
+        self._history: deque = deque(maxlen=_HISTORY)  # (version, changes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def begin(self) -> int:
+        """Mark the start of a load; pass the result to ``set``."""
+        return self._version
+
+    def get(self, table_name: str, entity_id: int) -> Optional[Any]:
+        """Return a cached (body, etag) pair, or None on a miss."""
+        key = (table_name, entity_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, table_name: str, entity_id: int, value: Any, dependencies: Iterable[tuple], version: int) -> None:
+        """
+        Store a response body built from the entity's row and `dependencies`
+        ((table, id) pairs), unless one of them was written since `version`.
+        """
+        key = (table_name, entity_id)
+        depends_on = {key, *dependencies}
+        with self._lock:
+            if self._changed_since(version, depends_on):
+                return
+            self._drop(key)
+            self._entries[key] = (value, time.monotonic(), depends_on)
+            for dependency in depends_on:
+                self._dependents.setdefault(dependency, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, changes: dict) -> None:
+        """Drop entries built from changed rows; `changes` as delivered by ``row_changes``."""
+        with self._lock:
+            self._version += 1
+            self._history.append((self._version, changes))
+            for table_name, ids in changes.items():
+                if ids is None:
+                    rows = [dependency for dependency in self._dependents if dependency[0] == table_name]
+                else:
+                    rows = [(table_name, row_id) for row_id in ids]
+                for row in rows:
+                    for key in list(self._dependents.get(row, ())):
+                        self._drop(key)
+                        self.invalidations += 1
+
+    def _changed_since(self, version: int, depends_on: set) -> bool:
+        if version == self._version:
+            return False
+        if not self._history or self._history[0][0] > version + 1:
+            return True  # Too many commits since the load started to tell
+        for changed_version, changes in self._history:
+            if changed_version <= version:
+                continue
+            for table_name, row_id in depends_on:
+                ids = changes.get(table_name, ())
+                if ids is None or row_id in ids:
+                    return True
+        return False
+
+    def _drop(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for dependency in entry[2]:
+            keys = self._dependents.get(dependency)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._dependents[dependency]
+
+    def stats(self) -> dict:
+        """Counters since startup and the current size."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dependents.clear()
+
+
+entity_cache = EntityCache(max_entries=settings.entity_cache_max_entries, ttl=settings.entity_cache_ttl)
+row_changes.subscribe(entity_cache.invalidate)
+metrics.register_cache("entity", lambda: (entity_cache.hits, entity_cache.misses))
+
+
+async def cached_response(
+    request: Request,
+    table_name: str,
+    entity_id: int,
+    load: Callable[[], Awaitable[Any]],
+    schema: Type[BaseModel],
+    dependencies: Callable[[Any], Iterable[tuple]] = lambda obj: ()
+) -> Optional[Response]:
+    """
+    Return an entity's `schema` JSON response from the cache, or await
+    `load()`, serialize its result and cache the body and its ETag.
+    Answers ``304`` when the request's If-None-Match matches. Returns None
+    when `load` finds nothing; misses are not cached.
+    """
+    entry = entity_cache.get(table_name, entity_id)
+    if entry is None:
+        version = entity_cache.begin()
+        obj = await load()
+        if obj is None:
+            return None
+        body = schema.model_validate(obj).model_dump_json().encode()
+        entry = (body, make_etag(body))
+        entity_cache.set(table_name, entity_id, entry, dependencies(obj), version)
+    return body_response(request, *entry)
+
+
+def order_dependencies(order) -> list:
+    """Rows an order response is built from besides the order itself."""
+    dependencies = [("customers", order.customer_id)]
+    for order_item in order.order_items:
+        dependencies.append(("order_items", order_item.id))
+        dependencies.append(("inventory_items", order_item.inventory_item_id))
+    return dependencies
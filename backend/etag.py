@@ -0,0 +1,72 @@
+"""
+ETag / If-None-Match support for read endpoints.
+
+List endpoints get a weak ETag derived from a cheap version of their query
+(``count_cache.query_version``) and the request's path and query string, so
+an unchanged list is answered with ``304 Not Modified`` before any row is
+loaded or serialized. Single entities and reports get a strong ETag of
+their serialized body.
+"""
+import hashlib
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+# Browsers must revalidate before reusing a response
+_HEADERS = {"Cache-Control": "no-cache"}
+
+_adapters: dict = {}
+
+
+def make_etag(*parts: Any, weak: bool = False) -> str:
+    """Build an ETag from a bytes body or any repr-able values."""
+    data = parts[0] if len(parts) == 1 and isinstance(parts[0], bytes) else repr(parts).encode()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def list_etag(request: Request, version: tuple) -> str:
+    """Weak ETag of a list page: its query's version plus the request's path and parameters."""
+    return make_etag(request.url.path, sorted(request.query_params.multi_items()), version, weak=True)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches `etag` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **_HEADERS})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Add the ETag headers to a route's response."""
+    response.headers["ETag"] = etag
+    response.headers.update(_HEADERS)
+
+
+def body_response(request: Request, body: bytes, etag: str = None) -> Response:
+    """Send a serialized JSON body with its strong ETag; ``304`` if the client already has it."""
+    etag = etag or make_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, **_HEADERS})
+
+
+def json_response(request: Request, response_type: Any, value: Any) -> Response:
+    """
+    Serialize `value` (models or ORM objects) as `response_type` and send
+    it with ``body_response``.
+    """
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return body_response(request, adapter.dump_json(adapter.validate_python(value, from_attributes=True)))
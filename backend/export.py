@@ -0,0 +1,82 @@
+"""
+Streaming NDJSON and CSV exports of whole tables.
+
+Rows are read through a server-side cursor in batches of
+``export_batch_size`` and written to the response as each batch arrives, so
+memory use stays flat however many rows match.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from config import settings
+from database import AsyncSessionLocal
+
+
+class ExportFormatEnum(str, enum.Enum):
+    """Output format for export endpoints."""
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+_MEDIA_TYPES = {
+    ExportFormatEnum.NDJSON: "application/x-ndjson",
+    ExportFormatEnum.CSV: "text/csv",
+}
+
+
+def _plain(value):
+    """Convert a column value to a JSON/CSV friendly scalar."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _format_ndjson(columns: list, rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, (_plain(value) for value in row)))) + "\n"
+        for row in rows
+    )
+
+
+def _format_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def stream_rows(statement: Select, export_format: ExportFormatEnum) -> AsyncIterator[str]:
+    """
+    Yield a statement's rows as NDJSON lines or CSV (with a header row).
+    Uses its own session, because the response outlives the request's.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=settings.export_batch_size))
+        columns = list(result.keys())
+        if export_format == ExportFormatEnum.CSV:
+            yield _format_csv([columns])
+        async for rows in result.partitions():
+            if export_format == ExportFormatEnum.CSV:
+                yield _format_csv(rows)
+            else:
+                yield _format_ndjson(columns, rows)
+
+
+def export_response(statement: Select, export_format: ExportFormatEnum, name: str) -> StreamingResponse:
+    """Stream a statement's rows as a downloadable `name`.ndjson / `name`.csv file."""
+    return StreamingResponse(
+        stream_rows(statement, export_format),
+        media_type=_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format.value}"'}
+    )
@@ -0,0 +1,60 @@
+"""
+Bulk import inventory items from a CSV or NDJSON file.
+
+Usage:
+    python import_inventory.py catalog.csv
+    python import_inventory.py catalog.ndjson --chunk-size 5000 --on-conflict update
+"""
+import argparse
+import sys
+
+from bulk_import import ConflictModeEnum, import_items, read_rows
+from config import settings
+from database import SessionLocal, create_tables
+from export import ExportFormatEnum
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import inventory items from CSV or NDJSON.")
+    parser.add_argument("path", help="File to import")
+    parser.add_argument(
+        "--format", choices=[f.value for f in ExportFormatEnum],
+        help="File format (default: from the file extension, csv otherwise)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=settings.import_chunk_size, help="Rows committed per chunk")
+    parser.add_argument(
+        "--on-conflict", choices=[m.value for m in ConflictModeEnum], default=ConflictModeEnum.ERROR.value,
+        help="What to do with rows whose SKU already exists"
+    )
+    args = parser.parse_args()
+
+    if args.format:
+        import_format = ExportFormatEnum(args.format)
+    elif args.path.endswith((".ndjson", ".jsonl")):
+        import_format = ExportFormatEnum.NDJSON
+    else:
+        import_format = ExportFormatEnum.CSV
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            reports = import_items(
+                db, read_rows(stream, import_format), args.chunk_size, ConflictModeEnum(args.on_conflict)
+            )
+            for report in reports:
+                for error in report['errors']:
+                    print(f"  row {error['row']} ({error['sku']}): {error['error']}", file=sys.stderr)
+                label = "✅ Done" if report['type'] == 'summary' else "📦"
+                print(
+                    f"{label} {report['processed']} rows: {report['inserted']} inserted, "
+                    f"{report['updated']} updated, {report['failed']} failed"
+                )
+    finally:
+        db.close()
+
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Index advisor for the list and report query shapes.
+
+Replays the CRUD queries behind the list endpoints (each filter, the first
+page and a cursor page) and the low stock reports, captures the SQL they
+run and prints SQLite's ``EXPLAIN QUERY PLAN`` for each statement, flagging
+full table scans and sorts through a temporary B-tree. It also lists the
+indexes declared on the models that the database lacks, which ``--apply``
+creates (the server does the same at startup), and indexes made redundant
+by a longer one with the same leading columns.
+
+Usage:
+    python index_advisor.py
+    python index_advisor.py --plans
+    python index_advisor.py --apply
+"""
+import argparse
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from count_cache import CountModeEnum, count_cache
+from crud import inventory_crud
+from crud_extended import customer_crud, supplier_crud, order_crud, stock_movement_crud, reports_crud
+from database import Base, SessionLocal, engine, missing_indexes
+from models import CategoryEnum, OrderStatusEnum, StockMovementTypeEnum
+from pagination import encode_cursor
+from slow_queries import full_scans
+
+_EXACT = {"count": CountModeEnum.EXACT}
+
+
+def _shapes() -> List[tuple]:
+    """(name, call) pairs replaying each query shape with representative values."""
+    cursor = {"cursor": encode_cursor(datetime.utcnow(), 1), **_EXACT}
+    since = {"date_from": datetime.utcnow() - timedelta(days=30), "date_to": datetime.utcnow()}
+    return [
+        ("inventory", lambda db: inventory_crud.get_items(db, **_EXACT)),
+        ("inventory, cursor page", lambda db: inventory_crud.get_items(db, **cursor)),
+        ("inventory by category", lambda db: inventory_crud.get_items(db, category=CategoryEnum.ELECTRONICS, **_EXACT)),
+        ("inventory by category, cursor page", lambda db: inventory_crud.get_items(db, category=CategoryEnum.ELECTRONICS, **cursor)),
+        ("customers", lambda db: customer_crud.get_customers(db, **_EXACT)),
+        ("active customers", lambda db: customer_crud.get_customers(db, is_active=True, **_EXACT)),
+        ("active customers, cursor page", lambda db: customer_crud.get_customers(db, is_active=True, **cursor)),
+        ("suppliers", lambda db: supplier_crud.get_suppliers(db, **_EXACT)),
+        ("active suppliers", lambda db: supplier_crud.get_suppliers(db, is_active=True, **_EXACT)),
+        ("orders", lambda db: order_crud.get_orders(db, **_EXACT)),
+        ("orders by status", lambda db: order_crud.get_orders(db, status=OrderStatusEnum.PENDING, **_EXACT)),
+        ("orders by status, cursor page", lambda db: order_crud.get_orders(db, status=OrderStatusEnum.PENDING, **cursor)),
+        ("orders by customer", lambda db: order_crud.get_orders(db, customer_id=1, **_EXACT)),
+        ("orders by date", lambda db: order_crud.get_orders(db, **since, **_EXACT)),
+        ("stock movements", lambda db: stock_movement_crud.get_stock_movements(db, **_EXACT)),
+        ("stock movements by item", lambda db: stock_movement_crud.get_stock_movements(db, inventory_item_id=1, **_EXACT)),
+        ("stock movements by item, cursor page", lambda db: stock_movement_crud.get_stock_movements(db, inventory_item_id=1, **cursor)),
+        ("stock movements by type", lambda db: stock_movement_crud.get_stock_movements(db, movement_type=StockMovementTypeEnum.IN, **_EXACT)),
+        ("stock movements by date", lambda db: stock_movement_crud.get_stock_movements(db, **since, **_EXACT)),
+        ("low stock items", lambda db: reports_crud.get_low_stock_items(db)),
+        ("low stock items under a threshold", lambda db: reports_crud.get_low_stock_items(db, threshold=5)),
+        ("low stock levels", lambda db: reports_crud.get_stock_levels(db, low_stock_only=True)),
+    ]
+
+
+@contextmanager
+def _capture() -> Iterator[list]:
+    """Collect the (statement, parameters) pairs run on the engine inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(db: Session, name: str, call: Callable[[Session], object]) -> dict:
+    """Run one query shape and return the plan of every SELECT it issued."""
+    count_cache.clear()
+    with _capture() as statements:
+        call(db)
+    report = {"shape": name, "statements": []}
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plan = [row[-1] for row in rows]
+        report["statements"].append({
+            "sql": statement,
+            "plan": plan,
+            "full_scans": full_scans(plan),
+            "temp_sort": any(detail.startswith("USE TEMP B-TREE") for detail in plan),
+        })
+    return report
+
+
+def redundant_indexes(connection) -> List[tuple]:
+    """(table, index, covered by) for non-unique indexes whose columns lead a longer index."""
+    inspector = inspect(connection)
+    redundant = []
+    for table_name in inspector.get_table_names():
+        indexes = inspector.get_indexes(table_name)
+        for index in indexes:
+            if index["unique"]:
+                continue
+            columns = index["column_names"]
+            for other in indexes:
+                if other is not index and len(other["column_names"]) > len(columns) \
+                        and other["column_names"][:len(columns)] == columns:
+                    redundant.append((table_name, index["name"], other["name"]))
+                    break
+    return redundant
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report query plans of the list queries and missing indexes.")
+    parser.add_argument("--apply", action="store_true", help="Create the missing indexes")
+    parser.add_argument("--plans", action="store_true", help="Print every plan, not just the problems")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "sqlite":
+        print("The index advisor reads SQLite query plans only", file=sys.stderr)
+        return 2
+
+    with engine.begin() as connection:
+        missing = missing_indexes(Base.metadata, connection)
+        if missing and args.apply:
+            for index in missing:
+                print(f"🔨 Creating {index.name} on {index.table.name}")
+                index.create(connection)
+            for table_name in sorted({index.table.name for index in missing}):
+                connection.execute(text(f"ANALYZE {table_name}"))
+            missing = []
+        for index in missing:
+            columns = ", ".join(column.name for column in index.columns)
+            print(f"➕ Missing index {index.name} on {index.table.name} ({columns})")
+        for table_name, index_name, covered_by in redundant_indexes(connection):
+            print(f"➖ {index_name} on {table_name} is redundant with {covered_by}")
+
+    problems = 0
+    with SessionLocal() as db:
+        for name, call in _shapes():
+            report = explain(db, name, call)
+            for statement in report["statements"]:
+                issues = [f"full scan of {table_name}" for table_name in statement["full_scans"]]
+                if statement["temp_sort"]:
+                    issues.append("sorts in a temporary B-tree")
+                problems += bool(issues)
+                if issues or args.plans:
+                    label = "⚠️ " if issues else "✅"
+                    print(f"{label} {name}: {'; '.join(issues) or 'index plan'}")
+                    for detail in statement["plan"]:
+                        print(f"      {detail}")
+
+    print(f"{problems} statement(s) with a full scan or temporary sort")
+    return 1 if problems or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -406,7 +406,7 @@ def init_extended_database():
         print(f"   • Customers: {len(customers)}")
         print(f"   • Inventory Items: {len(inventory_items)}")
         print(f"   • Orders: {len(orders)}")
-        print(f"   • Stock Movements: {len(stock_movements_data) + sum(len(o['items']) for o in orders_data if orders[orders_data.index(o)].status == OrderStatusEnum.DELIVERED)}")
+        print(f"   • Stock Movements: {len(stock_movements_data) + sum(len(order.order_items) for order in orders if order.status == OrderStatusEnum.DELIVERED)}")
         
         print("\n🔗 API Endpoints Available:")
         print("   • Customers: http://localhost:8000/api/customers")
@@ -0,0 +1,170 @@
+"""
+In-process SKU and barcode index for item lookups.
+
+Every SKU and barcode maps to a compact ``ItemRecord`` held in memory, so a
+lookup is a couple of dict reads. The index is loaded once and kept coherent
+with committed writes: the item ids ``row_changes`` delivers after each
+commit are reloaded, with one ``IN`` query on the next lookup. A bulk write
+to ``inventory_items`` that did not report its ids schedules a full rebuild
+instead, as does an index older than
+``item_index_max_age`` (which picks up writes made by other processes).
+"""
+import threading
+import time
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from config import settings
+from database import SessionLocal
+from models import InventoryItem
+import row_changes
+
+# Ids per IN query when reloading changed items
+_RELOAD_BATCH = 500
+
+
+class ItemRecord(NamedTuple):
+    """Compact, immutable copy of the item fields a lookup returns."""
+    id: int
+    sku: str
+    barcode: Optional[str]
+    name: str
+    category: str
+    price: float
+    quantity: int
+    is_active: bool
+
+
+_COLUMNS = (
+    InventoryItem.id, InventoryItem.sku, InventoryItem.barcode, InventoryItem.name,
+    InventoryItem.category, InventoryItem.price, InventoryItem.quantity, InventoryItem.is_active
+)
+
+
+def _record(row) -> ItemRecord:
+    return ItemRecord(
+        id=row.id,
+        sku=row.sku,
+        barcode=row.barcode,
+        name=row.name,
+        category=row.category.value,
+        price=float(row.price),
+        quantity=row.quantity,
+        is_active=row.is_active is not False
+    )
+
+
+class ItemIndex:
+    """SKU and barcode hash index over inventory items."""
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._by_id: dict = {}
+        self._by_sku: dict = {}
+        self._by_barcode: dict = {}
+        self._epoch = 1          # Bumped to request a full rebuild
+        self._loaded_epoch = 0   # Epoch of the last full rebuild
+        self._loaded_at = 0.0
+        self._dirty_ids: set = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def needs_refresh(self) -> bool:
+        """Whether the next lookup must reload anything first."""
+        return (
+            self._loaded_epoch != self._epoch
+            or bool(self._dirty_ids)
+            or time.monotonic() - self._loaded_at > self.max_age
+        )
+
+    def mark_dirty(self, item_ids: Iterable[int]) -> None:
+        """Reload these items before the next lookup."""
+        with self._lock:
+            self._dirty_ids.update(item_ids)
+
+    def invalidate(self) -> None:
+        """Rebuild the whole index before the next lookup."""
+        with self._lock:
+            self._epoch += 1
+
+    def refresh(self) -> None:
+        """Apply pending reloads, or rebuild if requested or too old. Blocking."""
+        with self._refresh_lock:
+            with self._lock:
+                epoch = self._epoch
+                rebuild = self._loaded_epoch != epoch or time.monotonic() - self._loaded_at > self.max_age
+                dirty, self._dirty_ids = self._dirty_ids, set()
+            if rebuild:
+                self._rebuild(epoch)
+            elif dirty:
+                self._reload(dirty)
+
+    def _rebuild(self, epoch: int) -> None:
+        started = time.monotonic()
+        by_id, by_sku, by_barcode = {}, {}, {}
+        with SessionLocal() as db:
+            for row in db.execute(select(*_COLUMNS).execution_options(yield_per=5000)):
+                record = _record(row)
+                by_id[record.id] = by_sku[record.sku] = record
+                if record.barcode:
+                    by_barcode[record.barcode] = record
+        self._by_id, self._by_sku, self._by_barcode = by_id, by_sku, by_barcode
+        self._loaded_epoch = epoch
+        self._loaded_at = started
+
+    def _reload(self, item_ids: set) -> None:
+        ids = list(item_ids)
+        found = {}
+        with SessionLocal() as db:
+            for start in range(0, len(ids), _RELOAD_BATCH):
+                rows = db.execute(select(*_COLUMNS).where(InventoryItem.id.in_(ids[start:start + _RELOAD_BATCH])))
+                found.update((row.id, _record(row)) for row in rows)
+
+        for item_id in ids:
+            old = self._by_id.pop(item_id, None)
+            if old is not None:
+                if self._by_sku.get(old.sku) is old:
+                    del self._by_sku[old.sku]
+                if old.barcode and self._by_barcode.get(old.barcode) is old:
+                    del self._by_barcode[old.barcode]
+            record = found.get(item_id)
+            if record is not None:
+                self._by_id[item_id] = self._by_sku[record.sku] = record
+                if record.barcode:
+                    self._by_barcode[record.barcode] = record
+
+    def get_by_sku(self, sku: str) -> Optional[ItemRecord]:
+        return self._by_sku.get(sku.strip().upper())
+
+    def get_by_barcode(self, barcode: str) -> Optional[ItemRecord]:
+        return self._by_barcode.get(barcode.strip())
+
+    def lookup(self, skus: Iterable[str] = (), barcodes: Iterable[str] = ()) -> dict:
+        """
+        Resolve many codes at once. Returns {'skus': {sku: record or None},
+        'barcodes': {barcode: record or None}} keyed by the codes as given.
+        Call ``refresh`` first when ``needs_refresh`` is set.
+        """
+        return {
+            'skus': {sku: self.get_by_sku(sku) for sku in skus},
+            'barcodes': {barcode: self.get_by_barcode(barcode) for barcode in barcodes},
+        }
+
+
+item_index = ItemIndex(max_age=settings.item_index_max_age)
+
+
+def _apply_changes(changes: dict) -> None:
+    """Queue committed item changes for reloading, or a rebuild if some were not reported."""
+    if "inventory_items" not in changes:
+        return
+    item_ids = changes["inventory_items"]
+    if item_ids is None:
+        item_index.invalidate()
+    else:
+        item_index.mark_dirty(item_ids)
+
+
+row_changes.subscribe(_apply_changes)
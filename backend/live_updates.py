@@ -0,0 +1,183 @@
+"""
+Live dashboard updates pushed to clients over Server-Sent Events.
+
+CRUD write paths queue compact events on their session with the helpers
+below. Events are published to subscribers only once the transaction
+commits and are dropped on rollback, the same way the count cache tracks
+written tables. Count changes made in one transaction are merged into a
+single ``counts`` event of deltas.
+
+Every published batch is stamped with the broker's next sequence number.
+A stream's ``snapshot`` carries the number of the last batch it includes,
+so queued events at or below it are dropped instead of being counted twice.
+Subscribers only see writes made in this process.
+"""
+import asyncio
+import json
+import threading
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import settings
+
+
+class LiveUpdateBroker:
+    """Fans committed events out to the queues of connected clients."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.sequence = 0  # Number of the last published batch
+        self.committing = 0  # Transactions with queued events between commit and publish
+        self._subscribers: dict = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client on the running event loop and return its queue."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Stop delivering events to a client."""
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def commit_started(self) -> None:
+        with self._lock:
+            self.committing += 1
+
+    def commit_finished(self) -> None:
+        with self._lock:
+            self.committing -= 1
+
+    @property
+    def settled(self) -> bool:
+        """No transaction is between its commit and the publishing of its events."""
+        return self.committing <= 0
+
+    def publish(self, events: list) -> None:
+        """Deliver events to every subscriber; safe to call from any thread."""
+        with self._lock:
+            self.sequence += 1
+            events = [{**item, "seq": self.sequence} for item in events]
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, events)
+            except RuntimeError:
+                # The subscriber's event loop has been closed
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, events: list) -> None:
+        """
+        Enqueue events for one client. A client that falls a whole queue
+        behind gets a single ``resync`` event instead, telling it to refetch
+        the dashboard summary rather than apply a partial stream of deltas.
+        """
+        if queue.qsize() + len(events) > queue.maxsize:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync", "data": {}})
+            return
+        for item in events:
+            queue.put_nowait(item)
+
+
+broker = LiveUpdateBroker(queue_size=settings.live_updates_queue_size)
+
+
+def _pending(db: Session) -> dict:
+    return db.info.setdefault("live_updates", {"events": [], "counts": {}})
+
+
+def emit(db: Session, event_type: str, **data) -> None:
+    """Queue an event to publish when the session's transaction commits."""
+    _pending(db)["events"].append({"type": event_type, "data": data})
+
+
+def count_changed(db: Session, **deltas: int) -> None:
+    """Queue changes to dashboard counts, e.g. ``count_changed(db, pending_orders=1)``."""
+    counts = _pending(db)["counts"]
+    for name, delta in deltas.items():
+        counts[name] = counts.get(name, 0) + delta
+
+
+def is_low_stock(quantity: int, min_stock_level: int, is_active: bool = True) -> bool:
+    """Whether an item counts towards the dashboard's low stock total."""
+    return bool(is_active) and min_stock_level is not None and quantity <= min_stock_level
+
+
+def stock_changed(
+    db: Session,
+    inventory_item_id: int,
+    was_low: bool,
+    is_low: bool,
+    quantity: Optional[int] = None,
+    min_stock_level: Optional[int] = None
+) -> None:
+    """Queue a ``low_stock`` event and count change when an item crosses its minimum level."""
+    if was_low == is_low:
+        return
+    emit(
+        db, "low_stock",
+        inventory_item_id=inventory_item_id,
+        low=is_low,
+        quantity=quantity,
+        min_stock_level=min_stock_level
+    )
+    count_changed(db, low_stock_items=1 if is_low else -1)
+
+
+def format_sse(item: dict) -> str:
+    """Render an event in the text/event-stream wire format, with its sequence number as the id."""
+    event_id = f"id: {item['seq']}\n" if item.get("seq") is not None else ""
+    return f"{event_id}event: {item['type']}\ndata: {json.dumps(item['data'], default=str)}\n\n"
+
+
+@event.listens_for(Session, "before_commit")
+def _mark_committing(session):
+    """Tell snapshot readers that a transaction with queued events is committing."""
+    pending = session.info.get("live_updates")
+    if pending and (pending["events"] or pending["counts"]) and not pending.get("committing"):
+        pending["committing"] = True
+        broker.commit_started()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    """Publish the events queued by the committed transaction."""
+    pending = session.info.pop("live_updates", None)
+    if not pending:
+        return
+    try:
+        if broker.subscriber_count:
+            _publish(pending)
+    finally:
+        if pending.get("committing"):
+            broker.commit_finished()
+
+
+def _publish(pending: dict) -> None:
+    """Publish a transaction's events, with its count deltas merged into one ``counts`` event."""
+    events = pending["events"]
+    counts = {name: delta for name, delta in pending["counts"].items() if delta}
+    if counts:
+        events.append({"type": "counts", "data": counts})
+    if events:
+        broker.publish(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    """Forget events queued by a rolled back transaction."""
+    pending = session.info.pop("live_updates", None)
+    if pending and pending.get("committing"):
+        broker.commit_finished()
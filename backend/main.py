@@ -3,24 +3,37 @@ FastAPI main application for inventory management system.
 """
 from datetime import datetime
 from typing import Optional, List
-import math
 
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
-from database import get_db, create_tables
+from database import get_async_db, create_tables, start_sqlite_maintenance
 from models import CategoryEnum
 from schemas import (
     InventoryItemCreate,
     InventoryItemUpdate,
     InventoryItemResponse,
     InventoryItemsResponse,
+    ItemLookupRequest,
+    ItemLookupResponse,
     HealthResponse,
     ErrorResponse
 )
-from crud import inventory_crud
+from async_crud import async_inventory_crud
+from pagination import next_cursor, page_count
+from count_cache import CountModeEnum
+from export import ExportFormatEnum
+from bulk_import import ConflictModeEnum, import_report, spool_body
+from item_index import item_index
+from entity_cache import cached_response
+from etag import list_etag, etag_matches, not_modified, set_etag, json_response
+from query_stats import QueryStatsMiddleware, query_budget
+from profiler import ProfilerMiddleware
+import metrics
 
 # Import extended routes
 from routes_extended import extended_routers
@@ -43,6 +56,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count SQL statements per request (X-Query-* headers, N+1 warnings)
+app.add_middleware(QueryStatsMiddleware)
+
+# Request latency and concurrency by route for /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Opt-in request profiling into profile_dir (see the profile_* settings)
+app.add_middleware(ProfilerMiddleware)
+
 # Include extended routers
 for router in extended_routers:
     app.include_router(router)
@@ -52,10 +74,19 @@ for router in extended_routers:
 async def startup_event():
     """Initialize database on startup."""
     create_tables()
+    item_index.refresh()
+    app.state.maintenance_task = start_sqlite_maintenance()
     print(f"🚀 FastAPI server starting on {settings.api_host}:{settings.api_port}")
     print(f"📚 API documentation available at: http://{settings.api_host}:{settings.api_port}/docs")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background database maintenance."""
+    if app.state.maintenance_task:
+        app.state.maintenance_task.cancel()
+
+
 # Health check endpoint
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
@@ -67,40 +98,58 @@ async def health_check():
     )
 
 
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"], summary="Prometheus metrics")
+async def get_metrics():
+    """Request, database and cache metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # Inventory endpoints
 @app.get(
     "/api/inventory",
     response_model=InventoryItemsResponse,
     tags=["Inventory"],
     summary="Get inventory items",
-    description="Get inventory items with optional filtering, searching, and pagination"
+    description="Get inventory items with optional filtering, searching, and pagination",
+    dependencies=[query_budget(4)]
 )
 async def get_inventory_items(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Items per page"),
     search: Optional[str] = Query(None, description="Search in name, SKU, or description"),
     category: Optional[CategoryEnum] = Query(None, description="Filter by category"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor; overrides page"),
+    count: CountModeEnum = Query(CountModeEnum.EXACT, description="How to compute total: exact, estimate or none"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get inventory items with filtering and pagination."""
+    etag = list_etag(request, await async_inventory_crud.get_items_version(db=db, search=search, category=category))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     skip = (page - 1) * size
     
-    items, total = inventory_crud.get_items(
+    items, total = await async_inventory_crud.get_items(
         db=db,
         skip=skip,
         limit=size,
         search=search,
-        category=category
+        category=category,
+        cursor=cursor,
+        count=count
     )
     
-    pages = math.ceil(total / size) if total > 0 else 1
+    pages = page_count(total, size)
     
     return InventoryItemsResponse(
         items=items,
         total=total,
         page=page,
         size=size,
-        pages=pages
+        pages=pages,
+        next_cursor=None if search else next_cursor(items, size)
     )
 
 
@@ -109,28 +158,77 @@ async def get_inventory_items(
     response_model=List[InventoryItemResponse],
     tags=["Inventory"],
     summary="Get low stock items",
-    description="Get items with low stock levels"
+    description="Get items with low stock levels",
+    dependencies=[query_budget(2)]
 )
 async def get_low_stock_items(
+    request: Request,
     threshold: int = Query(10, ge=0, description="Stock threshold"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get items with low stock."""
-    return inventory_crud.get_low_stock_items(db=db, threshold=threshold)
+    items = await async_inventory_crud.get_low_stock_items(db=db, threshold=threshold)
+    return json_response(request, List[InventoryItemResponse], items)
+
+
+async def _lookup_items(skus: List[str], barcodes: List[str]) -> dict:
+    """Resolve codes from the in-memory item index, reloading changed items first."""
+    if item_index.needs_refresh:
+        await run_in_threadpool(item_index.refresh)
+    found = item_index.lookup(skus, barcodes)
+    return {
+        kind: {code: record._asdict() if record else None for code, record in records.items()}
+        for kind, records in found.items()
+    }
+
+
+@app.get(
+    "/api/inventory/lookup",
+    response_model=ItemLookupResponse,
+    tags=["Inventory"],
+    summary="Look up items by SKU or barcode",
+    description="Resolve many SKUs and barcodes at once from an in-memory index",
+    dependencies=[query_budget(2)]
+)
+async def lookup_inventory_items(
+    sku: List[str] = Query([], max_length=1000, description="SKUs to resolve (repeatable)"),
+    barcode: List[str] = Query([], max_length=1000, description="Barcodes to resolve (repeatable)")
+):
+    """Look up items by SKU or barcode."""
+    return await _lookup_items(sku, barcode)
+
+
+@app.post(
+    "/api/inventory/lookup",
+    response_model=ItemLookupResponse,
+    tags=["Inventory"],
+    summary="Look up items by SKU or barcode",
+    description="Resolve many SKUs and barcodes at once from an in-memory index"
+)
+async def lookup_inventory_items_bulk(lookup: ItemLookupRequest):
+    """Look up items by SKU or barcode from a JSON body."""
+    return await _lookup_items(lookup.skus, lookup.barcodes)
+
 
 @app.get(
     "/api/inventory/{item_id}",
     response_model=InventoryItemResponse,
     tags=["Inventory"],
     summary="Get inventory item",
-    description="Get a specific inventory item by ID"
+    description="Get a specific inventory item by ID",
+    dependencies=[query_budget(2)]
 )
 async def get_inventory_item(
     item_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific inventory item."""
-    item = inventory_crud.get_item(db=db, item_id=item_id)
+    item = await cached_response(
+        request, "inventory_items", item_id,
+        lambda: async_inventory_crud.get_item(db=db, item_id=item_id),
+        InventoryItemResponse
+    )
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return item
@@ -146,17 +244,38 @@ async def get_inventory_item(
 )
 async def create_inventory_item(
     item: InventoryItemCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new inventory item."""
     try:
-        return inventory_crud.create_item(db=db, item=item)
+        return await async_inventory_crud.create_item(db=db, item=item)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post(
+    "/api/inventory/import",
+    tags=["Inventory"],
+    summary="Bulk import inventory items",
+    description="Import inventory items from a CSV or NDJSON request body, streaming NDJSON progress reports with per-row errors"
+)
+async def import_inventory_items(
+    request: Request,
+    import_format: ExportFormatEnum = Query(ExportFormatEnum.CSV, alias="format", description="csv or ndjson"),
+    chunk_size: int = Query(settings.import_chunk_size, ge=1, le=10000, description="Rows committed per chunk"),
+    on_conflict: ConflictModeEnum = Query(ConflictModeEnum.ERROR, description="For existing SKUs: error or update")
+):
+    """Bulk import inventory items."""
+    upload = await spool_body(request)
+    
+    return StreamingResponse(
+        import_report(upload, import_format, chunk_size, on_conflict),
+        media_type="application/x-ndjson"
+    )
+
+
 @app.put(
     "/api/inventory/{item_id}",
     response_model=InventoryItemResponse,
@@ -167,11 +286,11 @@ async def create_inventory_item(
 async def update_inventory_item(
     item_id: int,
     item_update: InventoryItemUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing inventory item."""
     try:
-        updated_item = inventory_crud.update_item(db=db, item_id=item_id, item_update=item_update)
+        updated_item = await async_inventory_crud.update_item(db=db, item_id=item_id, item_update=item_update)
         if not updated_item:
             raise HTTPException(status_code=404, detail="Item not found")
         return updated_item
@@ -190,10 +309,10 @@ async def update_inventory_item(
 )
 async def delete_inventory_item(
     item_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an inventory item."""
-    success = inventory_crud.delete_item(db=db, item_id=item_id)
+    success = await async_inventory_crud.delete_item(db=db, item_id=item_id)
     if not success:
         raise HTTPException(status_code=404, detail="Item not found")
 
@@ -205,9 +324,9 @@ async def delete_inventory_item(
     summary="Get categories",
     description="Get all available inventory categories"
 )
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
     """Get all available categories."""
-    return inventory_crud.get_categories(db=db)
+    return await async_inventory_crud.get_categories(db=db)
 
 
 # Exception handlers
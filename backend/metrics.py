@@ -0,0 +1,240 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+``MetricsMiddleware`` times every HTTP request by route template and tracks
+requests in flight; the engine listeners in ``database`` record SQL
+statement latency by CRUD function (set by the ``AsyncCRUD`` facade),
+connection pool checkout waits, commits and rollbacks. Cache counters are
+read when ``/metrics`` is scraped. Everything is kept in this process, so
+no client library or push gateway is needed.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from config import settings
+
+# Upper bounds in seconds of the latency histogram buckets
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics: list = []
+_collectors: list = []
+
+# CRUD method whose statements are running, for the statement metrics
+_db_function: ContextVar[str] = ContextVar("db_function", default="other")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A counter or gauge with optional labels."""
+
+    def __init__(self, name: str, kind: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.labels = labels
+        self._values: dict = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple = (), value: float = 0) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_label_text(self.labels, labels)} {_number(value)}"
+
+
+class Histogram(Metric):
+    """Cumulative bucket histogram with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = REQUEST_BUCKETS):
+        super().__init__(name, "histogram", help_text, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(labels, (list(counts), total)) for labels, (counts, total) in self._values.items()]
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_label_text(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labels, labels)} {_number(total)}"
+            yield f"{self.name}_count{_label_text(self.labels, labels)} {cumulative}"
+
+
+def register_collector(collect: Callable[[], None]) -> None:
+    """Call `collect` on every scrape to refresh metrics read from elsewhere."""
+    _collectors.append(collect)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format."""
+    for collect in _collectors:
+        collect()
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+REQUESTS = Metric(
+    "inventory_api_requests_total", "counter", "HTTP requests handled.", ("method", "route", "status")
+)
+REQUEST_DURATION = Histogram(
+    "inventory_api_request_duration_seconds", "HTTP request latency, including streaming the body.",
+    ("method", "route")
+)
+IN_FLIGHT = Metric("inventory_api_requests_in_flight", "gauge", "HTTP requests being handled.")
+STATEMENT_DURATION = Histogram(
+    "inventory_api_db_statement_duration_seconds", "SQL statement latency by CRUD method.",
+    ("function",), DB_BUCKETS
+)
+CHECKOUT_WAIT = Histogram(
+    "inventory_api_db_pool_checkout_seconds", "Time to get a connection from the pool, including opening one.",
+    ("engine",), DB_BUCKETS
+)
+COMMITS = Metric("inventory_api_db_commits_total", "counter", "Committed transactions.", ("engine",))
+ROLLBACKS = Metric("inventory_api_db_rollbacks_total", "counter", "Transactions rolled back, explicitly or after an error.", ("engine",))
+CACHE_HITS = Metric("inventory_api_cache_hits_total", "counter", "In-process cache hits.", ("cache",))
+CACHE_MISSES = Metric("inventory_api_cache_misses_total", "counter", "In-process cache misses.", ("cache",))
+CACHE_HIT_RATIO = Metric(
+    "inventory_api_cache_hit_ratio", "gauge", "Hits over lookups since startup.", ("cache",)
+)
+
+
+def register_cache(name: str, stats: Callable[[], tuple]) -> None:
+    """Export a cache's counters; `stats` returns its (hits, misses) since startup."""
+    def collect():
+        hits, misses = stats()
+        CACHE_HITS.set((name,), hits)
+        CACHE_MISSES.set((name,), misses)
+        CACHE_HIT_RATIO.set((name,), hits / (hits + misses) if hits + misses else 0)
+    register_collector(collect)
+
+
+@contextmanager
+def db_function(name: str) -> Iterator[None]:
+    """Attribute the statements run inside the block to `name`."""
+    token = _db_function.set(name)
+    try:
+        yield
+    finally:
+        _db_function.reset(token)
+
+
+def current_db_function() -> str:
+    """The CRUD method running statements in this context, or ``other``."""
+    return _db_function.get()
+
+
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_started"] = time.perf_counter()
+
+
+def finish_statement(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("metrics_started", None)
+    if started is not None:
+        STATEMENT_DURATION.observe(time.perf_counter() - started, (_db_function.get(),))
+
+
+def instrument_pool(engine, name: str) -> None:
+    """Time connection checkouts from `engine`'s pool."""
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            CHECKOUT_WAIT.observe(time.perf_counter() - started, (name,))
+
+    pool.connect = timed_connect
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and concurrency by route template."""
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: dict = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            # Routes are known once the app is running; refresh on a miss
+            self._templates = {
+                route.endpoint: route.path
+                for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+            template = self._templates.get(endpoint, "unmatched")
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status: Optional[int] = None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            route = self._route(scope)
+            REQUEST_DURATION.observe(time.perf_counter() - started, (scope["method"], route))
+            REQUESTS.inc((scope["method"], route, str(status or 500)))
@@ -2,7 +2,7 @@
 SQLAlchemy models for the inventory management system.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, ForeignKey, Boolean, Numeric
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, ForeignKey, Boolean, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -44,11 +44,16 @@ class InventoryItem(Base):
     """SQLAlchemy model for inventory items."""
     
     __tablename__ = "inventory_items"
+    # List pages are ordered by (created_at, id), optionally within a category
+    __table_args__ = (
+        Index("ix_inventory_items_created_at_id", "created_at", "id"),
+        Index("ix_inventory_items_category_created_at_id", "category", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(200), nullable=False, index=True)
     description = Column(Text, nullable=True)
-    category = Column(Enum(CategoryEnum), nullable=False, index=True)
+    category = Column(Enum(CategoryEnum), nullable=False)
     quantity = Column(Integer, nullable=False, default=0)
     price = Column(Numeric(10, 2), nullable=False)
     cost_price = Column(Numeric(10, 2), nullable=True)  # Purchase cost
@@ -75,6 +80,10 @@ class Customer(Base):
     """SQLAlchemy model for customers."""
     
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_created_at_id", "created_at", "id"),
+        Index("ix_customers_is_active_created_at_id", "is_active", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     first_name = Column(String(100), nullable=False)
@@ -106,6 +115,10 @@ class Supplier(Base):
     """SQLAlchemy model for suppliers."""
     
     __tablename__ = "suppliers"
+    __table_args__ = (
+        Index("ix_suppliers_created_at_id", "created_at", "id"),
+        Index("ix_suppliers_is_active_created_at_id", "is_active", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(200), nullable=False, index=True)
@@ -136,6 +149,12 @@ class Order(Base):
     """SQLAlchemy model for customer orders."""
     
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_orders_customer_id_created_at_id", "customer_id", "created_at", "id"),
+        Index("ix_orders_order_date", "order_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     order_number = Column(String(50), unique=True, nullable=False, index=True)
@@ -175,8 +194,8 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
     total_price = Column(Numeric(10, 2), nullable=False)
@@ -241,6 +260,11 @@ class StockMovement(Base):
     """SQLAlchemy model for tracking all stock movements."""
     
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        Index("ix_stock_movements_created_at_id", "created_at", "id"),
+        Index("ix_stock_movements_inventory_item_id_created_at_id", "inventory_item_id", "created_at", "id"),
+        Index("ix_stock_movements_movement_type_created_at_id", "movement_type", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
@@ -280,3 +304,62 @@ class AuditLog(Base):
     
     def __repr__(self):
         return f"<AuditLog(id={self.id}, table='{self.table_name}', action='{self.action}')>"
+
+
+class NumberSequence(Base):
+    """SQLAlchemy model for per-period document number counters."""
+    
+    __tablename__ = "number_sequences"
+    
+    name = Column(String(50), primary_key=True)  # e.g. 'ORD', 'PO'
+    period = Column(String(20), primary_key=True)  # e.g. '20240131'
+    value = Column(Integer, nullable=False, default=0)  # Last allocated number
+    
+    def __repr__(self):
+        return f"<NumberSequence(name='{self.name}', period='{self.period}', value={self.value})>"
+
+
+class StockStatus(Base):
+    """
+    Stock status projection of inventory items ('low', 'normal' or 'high').
+    Maintained by triggers on inventory_items (see stock_status.py).
+    """
+    
+    __tablename__ = "stock_status"
+    __table_args__ = (
+        Index("ix_stock_status_status_active", "status", "is_active"),
+    )
+    
+    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), primary_key=True)
+    status = Column(String(10), nullable=False)
+    quantity = Column(Integer, nullable=False, index=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+    
+    # Relationships
+    inventory_item = relationship("InventoryItem")
+    
+    def __repr__(self):
+        return f"<StockStatus(item_id={self.inventory_item_id}, status='{self.status}', qty={self.quantity})>"
+
+
+class SupplierCatalogEntry(Base):
+    """
+    Content hash of the last synced catalog row for a supplier SKU
+    (see catalog_sync.py). A NULL hash marks an item the sync deactivated
+    because it was missing from the supplier's catalog.
+    """
+    
+    __tablename__ = "supplier_catalog_entries"
+    
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), primary_key=True)
+    sku = Column(String(100), primary_key=True)
+    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False, index=True)
+    content_hash = Column(String(32), nullable=True)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    supplier = relationship("Supplier")
+    inventory_item = relationship("InventoryItem")
+    
+    def __repr__(self):
+        return f"<SupplierCatalogEntry(supplier_id={self.supplier_id}, sku='{self.sku}', item_id={self.inventory_item_id})>"
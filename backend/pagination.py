@@ -0,0 +1,69 @@
+"""
+Pagination helpers (keyset cursors and page counts) shared by the list endpoints.
+"""
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Optional, List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import or_, and_, select, func, literal
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque cursor string."""
+    payload = json.dumps({"c": created_at.isoformat() if created_at else None, "i": record_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode an opaque cursor back into its (created_at, id) position."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["c"]) if payload["c"] else None
+        return created_at, int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_keyset(query: Query, model, cursor: Optional[str] = None) -> Query:
+    """
+    Order a query by the stable (created_at desc, id desc) key and, when a
+    cursor is given, restrict it to the rows that come after that position.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if not cursor:
+        return query
+
+    created_at, record_id = decode_cursor(cursor)
+
+    # Compare against the stored created_at of the cursor row rather than the
+    # re-bound datetime: SQLite keeps timestamps as text and server defaults
+    # lack the microsecond suffix SQLAlchemy renders for bound parameters.
+    # The decoded value is only used if that row has since been deleted.
+    boundary = func.coalesce(
+        select(model.created_at).where(model.id == record_id).scalar_subquery(),
+        literal(created_at, model.created_at.type)
+    )
+    return query.filter(or_(
+        model.created_at < boundary,
+        and_(model.created_at == boundary, model.id < record_id)
+    ))
+
+
+def next_cursor(items: List, limit: int) -> Optional[str]:
+    """Return the cursor for the page after `items`, or None on a short page."""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
+
+
+def page_count(total: Optional[int], size: int) -> Optional[int]:
+    """Number of pages for `total` rows, or None when the total was not counted."""
+    if total is None:
+        return None
+    return math.ceil(total / size) if total > 0 else 1
@@ -0,0 +1,286 @@
+"""
+Opt-in request profiler.
+
+``ProfilerMiddleware`` profiles a request when it carries an ``X-Profile``
+header or ``profile`` query parameter equal to ``profile_token``, or when
+it is picked at random with probability ``profile_sample_rate``. cProfile
+records every call on the event loop thread: the routes, the CRUD methods
+run through ``run_sync`` and pydantic validation and serialization. A
+sampler thread also records the stacks of the busy threads every
+``profile_interval_ms``, which covers the database driver and threadpool
+threads that cProfile does not see.
+
+Each profile is written to ``profile_dir`` as ``<id>.pstats`` (for
+``pstats``/snakeviz), ``<id>.collapsed`` (folded stacks for flamegraph.pl
+or speedscope) and ``<id>.json`` (request details). The response carries
+the id in ``X-Profile-Id``, and ``/api/admin/profiles`` lists and serves
+the files to requests carrying the same token. Only one request is
+profiled at a time. A profile ends when a ``text/event-stream`` response
+starts or after ``profile_max_seconds``, so a long-lived stream does not
+keep the profiler running and block every other profile. Other requests running
+on the event loop meanwhile show up in the same profile.
+"""
+import asyncio
+import cProfile
+import enum
+import hmac
+import json
+import linecache
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# "20240131T120000123456-1a2b3c4d": sortable by time, safe as a file name
+_PROFILE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+
+# A thread whose innermost Python frame is in these modules is waiting
+# (on a lock, a queue or the selector), not working
+_IDLE_MODULES = frozenset({"threading", "queue", "selectors"})
+
+# Innermost frames that wait in C, e.g. on a SimpleQueue, with no Python
+# frame below them: the frame and the line it waits on
+_IDLE_LINES = {"aiosqlite.core.Connection.run": "tx_item = self._tx.get()"}
+
+# Requests under these paths are never profiled: they carry the token to
+# read profiles or slow queries, not to record a profile
+_TOKEN_PATHS = ("/api/admin/profiles", "/api/admin/slow-queries")
+
+# Held while a request is being profiled
+_busy = threading.Lock()
+
+
+class ProfileKindEnum(str, enum.Enum):
+    """Downloadable profile file."""
+    PSTATS = "pstats"
+    COLLAPSED = "collapsed"
+
+
+_MEDIA_TYPES = {
+    ProfileKindEnum.PSTATS: "application/octet-stream",
+    ProfileKindEnum.COLLAPSED: "text/plain; charset=utf-8",
+}
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)  # co_qualname is new in Python 3.11
+    return f"{frame.f_globals.get('__name__', '?')}.{name}".replace(";", ":")
+
+
+def _is_idle(frame) -> bool:
+    """Whether a thread whose innermost Python frame is `frame` is waiting."""
+    if frame.f_globals.get("__name__") in _IDLE_MODULES:
+        return True
+    waiting_line = _IDLE_LINES.get(_frame_name(frame))
+    return waiting_line is not None and linecache.getline(frame.f_code.co_filename, frame.f_lineno).strip() == waiting_line
+
+
+class StackSampler:
+    """Counts the stacks of the busy threads, sampled from a background thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class ProfileStore:
+    """Profiles in a local directory, pruned to the newest ``max_profiles``."""
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def path(self, profile_id: str, kind: str) -> Optional[str]:
+        """The file of a stored profile, or None."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.{kind}")
+        return path if os.path.exists(path) else None
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, sampler: StackSampler, details: dict) -> None:
+        """Write the pstats, collapsed stacks and details files of a profile."""
+        base = os.path.join(self.directory, profile_id)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            profiler.dump_stats(f"{base}.pstats")
+            with open(f"{base}.collapsed", "w") as collapsed:
+                for stack, count in sampler.stacks.most_common():
+                    collapsed.write(f"{stack} {count}\n")
+            with open(f"{base}.json", "w") as details_file:
+                json.dump({**details, "samples": sampler.samples}, details_file)
+            self._prune()
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        names = (name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json"))
+        return sorted(name for name in names if _PROFILE_ID.match(name))
+
+    def _prune(self) -> None:
+        ids = self._ids()
+        for profile_id in ids[:max(len(ids) - self.max_profiles, 0)]:
+            for suffix in ("json", *(kind.value for kind in ProfileKindEnum)):
+                try:
+                    os.remove(os.path.join(self.directory, f"{profile_id}.{suffix}"))
+                except FileNotFoundError:
+                    pass
+
+    def entries(self, limit: int) -> List[dict]:
+        """Details of the most recent profiles first."""
+        entries = []
+        for profile_id in reversed(self._ids()):
+            if len(entries) == limit:
+                break
+            try:
+                with open(os.path.join(self.directory, f"{profile_id}.json")) as details_file:
+                    entries.append(json.load(details_file))
+            except (FileNotFoundError, ValueError):
+                continue  # Pruned or being written by another process
+        return entries
+
+
+profile_store = ProfileStore(settings.profile_dir, settings.profile_max_files)
+
+
+def profile_response(profile_id: str, kind: ProfileKindEnum) -> FileResponse:
+    """Download response for one file of a stored profile."""
+    path = profile_store.path(profile_id, kind.value)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type=_MEDIA_TYPES[kind], filename=f"{profile_id}.{kind.value}")
+
+
+def _matches_token(value: Optional[str]) -> bool:
+    token = settings.profile_token
+    return bool(token and value) and hmac.compare_digest(value.encode(), token.encode())
+
+
+def require_profile_token(request: Request) -> None:
+    """Route dependency: reject requests without the ``profile_token``."""
+    if not (_matches_token(request.headers.get("x-profile")) or _matches_token(request.query_params.get("profile"))):
+        raise HTTPException(status_code=403, detail="Send PROFILE_TOKEN in the X-Profile header or profile parameter")
+
+
+def _trigger(scope) -> Optional[str]:
+    """Why this request should be profiled, or None."""
+    if scope["path"].startswith(_TOKEN_PATHS):
+        return None
+    if _matches_token(Headers(scope=scope).get("x-profile")):
+        return "header"
+    if _matches_token(QueryParams(scope.get("query_string", b"")).get("profile")):
+        return "query"
+    if settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate:
+        return "sample"
+    return None
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling requests that ask for it or are sampled."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profile_enabled:
+            await self.app(scope, receive, send)
+            return
+        trigger = _trigger(scope)
+        if trigger is None or not _busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{secrets.token_hex(4)}"
+        status: Optional[int] = None
+        finished = False
+
+        def finish(stopped: Optional[str]) -> None:
+            """End the profile and save it; with `stopped`, the request carries on."""
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            time_limit.cancel()
+            profiler.disable()
+            sampler.stop()
+            _busy.release()
+            details = {
+                "id": profile_id,
+                "recorded_at": datetime.utcnow().isoformat(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status if status is not None or stopped else 500,
+                "trigger": trigger,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "stopped": stopped,
+            }
+            # Written inline: the response may have been sent, and a cancelled
+            # request could not await a thread
+            try:
+                profile_store.save(profile_id, profiler, sampler, details)
+            except OSError:
+                logger.exception("Could not write profile %s", profile_id)
+            else:
+                logger.info("Profiled %s %s (%s): %s", scope["method"], scope["path"], trigger, profile_id)
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Profile-Id"] = profile_id
+                if headers.get("content-type", "").startswith("text/event-stream"):
+                    finish("event_stream")  # Open for as long as the client stays
+            await send(message)
+
+        profiler = cProfile.Profile()
+        sampler = StackSampler(settings.profile_interval_ms / 1000)
+        started = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        time_limit = asyncio.get_running_loop().call_later(settings.profile_max_seconds, finish, "time_limit")
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            finish(None)
@@ -0,0 +1,187 @@
+"""
+Per-request SQL statement statistics.
+
+Cursor execution hooks on every engine count the statements a request runs
+and the time spent in the database, and group statements by shape (their
+SQL with expanded ``IN`` lists collapsed), so the same query issued over
+and over — typically lazy loads in a loop (N+1) — shows up.
+``QueryStatsMiddleware`` reports the figures in ``X-Query-*`` response
+headers and logs requests with repeated shapes or over their budget.
+
+Routes declare a budget with ``dependencies=[query_budget(n)]``. With
+``query_budget_enforce`` set (for CI), the statement that exceeds it raises
+``QueryBudgetExceeded``; tests can also check responses with
+``assert_query_budget`` or wrap direct calls in ``track_queries``.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+_PARAM = r"(?:\?|%s|\$\d+|%\(\w+\)s|:\w+)"
+# "(?, ?, ?)" -> "(?)", then repeated VALUES groups "(?), (?)" -> "(?)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_GROUP_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+
+# Characters of a repeated statement quoted in log messages
+_LOG_SQL_LENGTH = 200
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request ran more SQL statements than its route's budget allows."""
+
+
+def statement_shape(statement: str) -> str:
+    """A statement's SQL with parameter lists collapsed, for grouping repeats."""
+    return _GROUP_LIST.sub("(?)", _PARAM_LIST.sub("(?)", statement))
+
+
+class QueryStats:
+    """Statements run and database time spent on behalf of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+        self.budget: Optional[int] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.db_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    @property
+    def max_repeats(self) -> int:
+        """Most runs of any one statement shape."""
+        return max(self.shapes.values(), default=0)
+
+    def repeated(self) -> list:
+        """(shape, runs) pairs run at least ``query_repeat_threshold`` times, most first."""
+        return [
+            (shape, runs) for shape, runs in self.shapes.most_common()
+            if runs >= settings.query_repeat_threshold
+        ]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def headers(self) -> dict:
+        headers = {
+            "X-Query-Count": str(self.count),
+            "X-Query-Time-Ms": f"{self.db_time * 1000:.2f}",
+            "X-Query-Repeats": str(self.max_repeats),
+        }
+        if self.budget is not None:
+            headers["X-Query-Budget"] = str(self.budget)
+        return headers
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Statistics of the request being handled, if any."""
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    if stats.budget is not None and stats.count >= stats.budget and settings.query_budget_enforce:
+        raise QueryBudgetExceeded(f"Query budget of {stats.budget} statements exceeded: {statement[:_LOG_SQL_LENGTH]}")
+    conn.info["query_stats_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.pop("query_stats_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def query_budget(max_queries: int):
+    """Route dependency declaring how many SQL statements one request may run."""
+    async def declare_budget():
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = max_queries
+    return Depends(declare_budget)
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware collecting ``QueryStats`` for each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.query_stats_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(stats.headers())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            _log_request(scope, stats)
+
+
+def _log_request(scope, stats: QueryStats) -> None:
+    request = f"{scope['method']} {scope['path']}"
+    logger.debug("%s: %d statements, %.2f ms in the database", request, stats.count, stats.db_time * 1000)
+    if stats.over_budget:
+        logger.warning("%s ran %d statements, over its budget of %d", request, stats.count, stats.budget)
+    for shape, runs in stats.repeated():
+        logger.warning("%s ran the same statement %d times (possible N+1): %s", request, runs, shape[:_LOG_SQL_LENGTH])
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements run inside the block, outside of any request."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def assert_query_budget(response, max_queries: Optional[int] = None, max_repeats: Optional[int] = None) -> None:
+    """
+    Test helper: fail if the request behind `response` ran more statements
+    than `max_queries` (default: its route's declared budget) or repeated a
+    statement shape ``max_repeats`` times or more (default:
+    ``query_repeat_threshold``).
+    """
+    headers = response.headers
+    assert "X-Query-Count" in headers, "Response has no query statistics; is query_stats_enabled set?"
+    count = int(headers["X-Query-Count"])
+    limit = max_queries if max_queries is not None else headers.get("X-Query-Budget")
+    if limit is not None:
+        assert count <= int(limit), f"Request ran {count} SQL statements, budget is {limit}"
+    repeats = int(headers["X-Query-Repeats"])
+    threshold = max_repeats if max_repeats is not None else settings.query_repeat_threshold
+    assert repeats < threshold, f"Request ran one statement shape {repeats} times (possible N+1)"
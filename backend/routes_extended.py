@@ -1,25 +1,40 @@
 """
 Extended API routes for the full inventory management system.
 """
-import math
+import asyncio
 from datetime import datetime
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
-from models import OrderStatusEnum, StockMovementTypeEnum
+from database import get_async_db, AsyncSessionLocal
+from models import OrderStatusEnum, StockMovementTypeEnum, CategoryEnum
 from schemas_extended import (
     CustomerCreate, CustomerUpdate, CustomerResponse, PaginatedCustomersResponse,
     SupplierCreate, SupplierUpdate, SupplierResponse, PaginatedSuppliersResponse,
     OrderCreate, OrderUpdate, OrderResponse, PaginatedOrdersResponse,
     StockMovementCreate, StockMovementResponse, PaginatedStockMovementsResponse,
-    StockLevelReport, SalesReport, InventoryValuation, DashboardSummary
+    StockMovementBatchCreate, StockMovementBatchResponse,
+    StockLevelReport, SalesReport, SalesGroupByEnum, InventoryValuation, DashboardSummary,
+    EntityCacheStats, SlowQueryRecord, ProfileRecord
 )
-from crud_extended import (
-    customer_crud, supplier_crud, order_crud, stock_movement_crud, reports_crud
+from async_crud import (
+    async_inventory_crud, async_customer_crud, async_supplier_crud,
+    async_order_crud, async_stock_movement_crud, async_reports_crud
 )
-from crud import inventory_crud
+from config import settings
+from pagination import next_cursor, page_count
+from count_cache import CountModeEnum, Snapshot, report_cache
+import live_updates
+from export import ExportFormatEnum, export_response
+from bulk_import import spool_body
+from catalog_sync import sync_report
+from entity_cache import entity_cache, cached_response, order_dependencies
+from etag import list_etag, etag_matches, not_modified, set_etag, json_response
+from query_stats import query_budget
+from slow_queries import slow_query_log
+from profiler import ProfileKindEnum, profile_store, profile_response, require_profile_token
 
 # Create routers
 customers_router = APIRouter(prefix="/api/customers", tags=["Customers"])
@@ -28,6 +43,16 @@ orders_router = APIRouter(prefix="/api/orders", tags=["Orders"])
 stock_router = APIRouter(prefix="/api/stock", tags=["Stock Management"])
 reports_router = APIRouter(prefix="/api/reports", tags=["Reports & Analytics"])
 dashboard_router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
+export_router = APIRouter(prefix="/api/export", tags=["Export"])
+admin_router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+# Precomputed dashboard summary, marked dirty by writes to these tables
+dashboard_snapshot = Snapshot(
+    report_cache,
+    ("inventory_items", "customers", "suppliers", "orders", "order_items", "stock_movements"),
+    max_staleness=settings.dashboard_max_staleness,
+    ttl=settings.report_cache_ttl
+)
 
 
 # Customer Routes
@@ -35,34 +60,46 @@ dashboard_router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
     "/",
     response_model=PaginatedCustomersResponse,
     summary="Get customers",
-    description="Get customers with optional filtering, searching, and pagination"
+    description="Get customers with optional filtering, searching, and pagination",
+    dependencies=[query_budget(4)]
 )
 async def get_customers(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Items per page"),
     search: Optional[str] = Query(None, description="Search in name or email"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor; overrides page"),
+    count: CountModeEnum = Query(CountModeEnum.EXACT, description="How to compute total: exact, estimate or none"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get customers with filtering and pagination."""
+    etag = list_etag(request, await async_customer_crud.get_customers_version(db=db, search=search, is_active=is_active))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     skip = (page - 1) * size
     
-    customers, total = customer_crud.get_customers(
+    customers, total = await async_customer_crud.get_customers(
         db=db,
         skip=skip,
         limit=size,
         search=search,
-        is_active=is_active
+        is_active=is_active,
+        cursor=cursor,
+        count=count
     )
     
-    pages = math.ceil(total / size) if total > 0 else 1
+    pages = page_count(total, size)
     
     return PaginatedCustomersResponse(
         items=customers,
         total=total,
         page=page,
         size=size,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor(customers, size)
     )
 
 
@@ -70,11 +107,16 @@ async def get_customers(
     "/{customer_id}",
     response_model=CustomerResponse,
     summary="Get customer",
-    description="Get a specific customer by ID"
+    description="Get a specific customer by ID",
+    dependencies=[query_budget(2)]
 )
-async def get_customer(customer_id: int, db: Session = Depends(get_db)):
+async def get_customer(customer_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get a specific customer."""
-    customer = customer_crud.get_customer(db=db, customer_id=customer_id)
+    customer = await cached_response(
+        request, "customers", customer_id,
+        lambda: async_customer_crud.get_customer(db=db, customer_id=customer_id),
+        CustomerResponse
+    )
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     return customer
@@ -87,9 +129,9 @@ async def get_customer(customer_id: int, db: Session = Depends(get_db)):
     summary="Create customer",
     description="Create a new customer"
 )
-async def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
+async def create_customer(customer: CustomerCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new customer."""
-    return customer_crud.create_customer(db=db, customer=customer)
+    return await async_customer_crud.create_customer(db=db, customer=customer)
 
 
 @customers_router.put(
@@ -101,10 +143,10 @@ async def create_customer(customer: CustomerCreate, db: Session = Depends(get_db
 async def update_customer(
     customer_id: int,
     customer_update: CustomerUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing customer."""
-    updated_customer = customer_crud.update_customer(
+    updated_customer = await async_customer_crud.update_customer(
         db=db, customer_id=customer_id, customer_update=customer_update
     )
     if not updated_customer:
@@ -118,9 +160,9 @@ async def update_customer(
     summary="Delete customer",
     description="Delete a customer"
 )
-async def delete_customer(customer_id: int, db: Session = Depends(get_db)):
+async def delete_customer(customer_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a customer."""
-    success = customer_crud.delete_customer(db=db, customer_id=customer_id)
+    success = await async_customer_crud.delete_customer(db=db, customer_id=customer_id)
     if not success:
         raise HTTPException(status_code=404, detail="Customer not found")
 
@@ -130,34 +172,46 @@ async def delete_customer(customer_id: int, db: Session = Depends(get_db)):
     "/",
     response_model=PaginatedSuppliersResponse,
     summary="Get suppliers",
-    description="Get suppliers with optional filtering, searching, and pagination"
+    description="Get suppliers with optional filtering, searching, and pagination",
+    dependencies=[query_budget(4)]
 )
 async def get_suppliers(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Items per page"),
     search: Optional[str] = Query(None, description="Search in name, contact, or email"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor; overrides page"),
+    count: CountModeEnum = Query(CountModeEnum.EXACT, description="How to compute total: exact, estimate or none"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get suppliers with filtering and pagination."""
+    etag = list_etag(request, await async_supplier_crud.get_suppliers_version(db=db, search=search, is_active=is_active))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     skip = (page - 1) * size
     
-    suppliers, total = supplier_crud.get_suppliers(
+    suppliers, total = await async_supplier_crud.get_suppliers(
         db=db,
         skip=skip,
         limit=size,
         search=search,
-        is_active=is_active
+        is_active=is_active,
+        cursor=cursor,
+        count=count
     )
     
-    pages = math.ceil(total / size) if total > 0 else 1
+    pages = page_count(total, size)
     
     return PaginatedSuppliersResponse(
         items=suppliers,
         total=total,
         page=page,
         size=size,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor(suppliers, size)
     )
 
 
@@ -165,11 +219,16 @@ async def get_suppliers(
     "/{supplier_id}",
     response_model=SupplierResponse,
     summary="Get supplier",
-    description="Get a specific supplier by ID"
+    description="Get a specific supplier by ID",
+    dependencies=[query_budget(2)]
 )
-async def get_supplier(supplier_id: int, db: Session = Depends(get_db)):
+async def get_supplier(supplier_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get a specific supplier."""
-    supplier = supplier_crud.get_supplier(db=db, supplier_id=supplier_id)
+    supplier = await cached_response(
+        request, "suppliers", supplier_id,
+        lambda: async_supplier_crud.get_supplier(db=db, supplier_id=supplier_id),
+        SupplierResponse
+    )
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
     return supplier
@@ -182,9 +241,9 @@ async def get_supplier(supplier_id: int, db: Session = Depends(get_db)):
     summary="Create supplier",
     description="Create a new supplier"
 )
-async def create_supplier(supplier: SupplierCreate, db: Session = Depends(get_db)):
+async def create_supplier(supplier: SupplierCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new supplier."""
-    return supplier_crud.create_supplier(db=db, supplier=supplier)
+    return await async_supplier_crud.create_supplier(db=db, supplier=supplier)
 
 
 @suppliers_router.put(
@@ -196,10 +255,10 @@ async def create_supplier(supplier: SupplierCreate, db: Session = Depends(get_db
 async def update_supplier(
     supplier_id: int,
     supplier_update: SupplierUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing supplier."""
-    updated_supplier = supplier_crud.update_supplier(
+    updated_supplier = await async_supplier_crud.update_supplier(
         db=db, supplier_id=supplier_id, supplier_update=supplier_update
     )
     if not updated_supplier:
@@ -213,50 +272,91 @@ async def update_supplier(
     summary="Delete supplier",
     description="Delete a supplier"
 )
-async def delete_supplier(supplier_id: int, db: Session = Depends(get_db)):
+async def delete_supplier(supplier_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a supplier."""
-    success = supplier_crud.delete_supplier(db=db, supplier_id=supplier_id)
+    success = await async_supplier_crud.delete_supplier(db=db, supplier_id=supplier_id)
     if not success:
         raise HTTPException(status_code=404, detail="Supplier not found")
 
 
+@suppliers_router.post(
+    "/{supplier_id}/catalog-sync",
+    summary="Sync supplier catalog",
+    description="Sync a supplier's CSV or NDJSON catalog, applying only rows whose content changed since the last sync and streaming NDJSON progress reports"
+)
+async def sync_supplier_catalog(
+    supplier_id: int,
+    request: Request,
+    import_format: ExportFormatEnum = Query(ExportFormatEnum.CSV, alias="format", description="csv or ndjson"),
+    chunk_size: int = Query(settings.import_chunk_size, ge=1, le=10000, description="Rows committed per chunk"),
+    deactivate_missing: bool = Query(False, description="Deactivate the supplier's items missing from the catalog"),
+    claim_unowned: bool = Query(False, description="Assign matching items that have no supplier to this supplier"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Sync a supplier's catalog."""
+    supplier = await async_supplier_crud.get_supplier(db=db, supplier_id=supplier_id)
+    if not supplier:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+    
+    upload = await spool_body(request)
+    
+    return StreamingResponse(
+        sync_report(upload, supplier_id, import_format, chunk_size, deactivate_missing, claim_unowned),
+        media_type="application/x-ndjson"
+    )
+
+
 # Order Routes
 @orders_router.get(
     "/",
     response_model=PaginatedOrdersResponse,
     summary="Get orders",
-    description="Get orders with optional filtering and pagination"
+    description="Get orders with optional filtering and pagination",
+    dependencies=[query_budget(4)]
 )
 async def get_orders(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Items per page"),
     status: Optional[OrderStatusEnum] = Query(None, description="Filter by status"),
     customer_id: Optional[int] = Query(None, description="Filter by customer"),
     date_from: Optional[datetime] = Query(None, description="Filter from date"),
     date_to: Optional[datetime] = Query(None, description="Filter to date"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor; overrides page"),
+    count: CountModeEnum = Query(CountModeEnum.EXACT, description="How to compute total: exact, estimate or none"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get orders with filtering and pagination."""
+    etag = list_etag(request, await async_order_crud.get_orders_version(
+        db=db, status=status, customer_id=customer_id, date_from=date_from, date_to=date_to
+    ))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     skip = (page - 1) * size
     
-    orders, total = order_crud.get_orders(
+    orders, total = await async_order_crud.get_orders(
         db=db,
         skip=skip,
         limit=size,
         status=status,
         customer_id=customer_id,
         date_from=date_from,
-        date_to=date_to
+        date_to=date_to,
+        cursor=cursor,
+        count=count
     )
     
-    pages = math.ceil(total / size) if total > 0 else 1
+    pages = page_count(total, size)
     
     return PaginatedOrdersResponse(
         items=orders,
         total=total,
         page=page,
         size=size,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor(orders, size)
     )
 
 
@@ -264,11 +364,17 @@ async def get_orders(
     "/{order_id}",
     response_model=OrderResponse,
     summary="Get order",
-    description="Get a specific order by ID"
+    description="Get a specific order by ID",
+    dependencies=[query_budget(2)]
 )
-async def get_order(order_id: int, db: Session = Depends(get_db)):
+async def get_order(order_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get a specific order."""
-    order = order_crud.get_order(db=db, order_id=order_id)
+    order = await cached_response(
+        request, "orders", order_id,
+        lambda: async_order_crud.get_order(db=db, order_id=order_id),
+        OrderResponse,
+        order_dependencies
+    )
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
@@ -281,9 +387,9 @@ async def get_order(order_id: int, db: Session = Depends(get_db)):
     summary="Create order",
     description="Create a new order"
 )
-async def create_order(order: OrderCreate, db: Session = Depends(get_db)):
+async def create_order(order: OrderCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new order."""
-    return order_crud.create_order(db=db, order=order)
+    return await async_order_crud.create_order(db=db, order=order)
 
 
 @orders_router.put(
@@ -295,10 +401,10 @@ async def create_order(order: OrderCreate, db: Session = Depends(get_db)):
 async def update_order(
     order_id: int,
     order_update: OrderUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing order."""
-    updated_order = order_crud.update_order(
+    updated_order = await async_order_crud.update_order(
         db=db, order_id=order_id, order_update=order_update
     )
     if not updated_order:
@@ -312,9 +418,9 @@ async def update_order(
     summary="Cancel order",
     description="Cancel an order and restore inventory"
 )
-async def cancel_order(order_id: int, db: Session = Depends(get_db)):
+async def cancel_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
     """Cancel an order and restore inventory."""
-    cancelled_order = order_crud.cancel_order(db=db, order_id=order_id)
+    cancelled_order = await async_order_crud.cancel_order(db=db, order_id=order_id)
     if not cancelled_order:
         raise HTTPException(status_code=404, detail="Order not found")
     return cancelled_order
@@ -325,7 +431,8 @@ async def cancel_order(order_id: int, db: Session = Depends(get_db)):
     "/movements",
     response_model=PaginatedStockMovementsResponse,
     summary="Get stock movements",
-    description="Get stock movements with optional filtering and pagination"
+    description="Get stock movements with optional filtering and pagination",
+    dependencies=[query_budget(3)]
 )
 async def get_stock_movements(
     page: int = Query(1, ge=1, description="Page number"),
@@ -334,29 +441,34 @@ async def get_stock_movements(
     movement_type: Optional[StockMovementTypeEnum] = Query(None, description="Filter by movement type"),
     date_from: Optional[datetime] = Query(None, description="Filter from date"),
     date_to: Optional[datetime] = Query(None, description="Filter to date"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor; overrides page"),
+    count: CountModeEnum = Query(CountModeEnum.EXACT, description="How to compute total: exact, estimate or none"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get stock movements with filtering and pagination."""
     skip = (page - 1) * size
     
-    movements, total = stock_movement_crud.get_stock_movements(
+    movements, total = await async_stock_movement_crud.get_stock_movements(
         db=db,
         skip=skip,
         limit=size,
         inventory_item_id=inventory_item_id,
         movement_type=movement_type,
         date_from=date_from,
-        date_to=date_to
+        date_to=date_to,
+        cursor=cursor,
+        count=count
     )
     
-    pages = math.ceil(total / size) if total > 0 else 1
+    pages = page_count(total, size)
     
     return PaginatedStockMovementsResponse(
         items=movements,
         total=total,
         page=page,
         size=size,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor(movements, size)
     )
 
 
@@ -369,10 +481,10 @@ async def get_stock_movements(
 )
 async def create_stock_movement(
     movement: StockMovementCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a manual stock movement."""
-    return stock_movement_crud.create_movement(
+    return await async_stock_movement_crud.create_movement(
         db=db,
         inventory_item_id=movement.inventory_item_id,
         movement_type=movement.movement_type,
@@ -385,42 +497,49 @@ async def create_stock_movement(
     )
 
 
+@stock_router.post(
+    "/movements/batch",
+    response_model=StockMovementBatchResponse,
+    summary="Create stock movements in bulk",
+    description="Apply many stock movements in one transaction with per-row results"
+)
+async def create_stock_movements_batch(
+    batch: StockMovementBatchCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply a batch of stock movements."""
+    results = await async_stock_movement_crud.create_movements_batch(db=db, movements=batch.movements)
+    applied = sum(1 for result in results if result['status'] == 'applied')
+    
+    return StockMovementBatchResponse(
+        applied=applied,
+        failed=len(results) - applied,
+        results=results
+    )
+
+
 @stock_router.get(
     "/levels",
     response_model=List[StockLevelReport],
     summary="Get stock levels",
-    description="Get current stock levels with status indicators"
+    description="Get current stock levels with status indicators",
+    dependencies=[query_budget(2)]
 )
 async def get_stock_levels(
+    request: Request,
     low_stock_only: bool = Query(False, description="Show only low stock items"),
-    db: Session = Depends(get_db)
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(1000, ge=1, le=1000, description="Items per page"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current stock levels."""
-    if low_stock_only:
-        items = reports_crud.get_low_stock_items(db=db)
-    else:
-        items, _ = inventory_crud.get_items(db=db, skip=0, limit=1000)
-    
-    stock_levels = []
-    for item in items:
-        if item.quantity <= item.min_stock_level:
-            status = "low"
-        elif item.quantity >= item.max_stock_level:
-            status = "high"
-        else:
-            status = "normal"
-        
-        stock_levels.append(StockLevelReport(
-            inventory_item_id=item.id,
-            item_name=item.name,
-            sku=item.sku,
-            current_quantity=item.quantity,
-            min_stock_level=item.min_stock_level,
-            max_stock_level=item.max_stock_level,
-            status=status
-        ))
-    
-    return stock_levels
+    stock_levels = await async_reports_crud.get_stock_levels(
+        db=db,
+        skip=(page - 1) * size,
+        limit=size,
+        low_stock_only=low_stock_only
+    )
+    return json_response(request, List[StockLevelReport], stock_levels)
 
 
 # Reports Routes
@@ -428,36 +547,41 @@ async def get_stock_levels(
     "/inventory-valuation",
     response_model=InventoryValuation,
     summary="Get inventory valuation",
-    description="Get current inventory valuation report"
+    description="Get current inventory valuation report",
+    dependencies=[query_budget(2)]
 )
-async def get_inventory_valuation(db: Session = Depends(get_db)):
+async def get_inventory_valuation(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get inventory valuation report."""
-    valuation_data = reports_crud.get_inventory_valuation(db=db)
+    valuation_data = await async_reports_crud.get_inventory_valuation(db=db)
     
-    return InventoryValuation(
+    return json_response(request, InventoryValuation, InventoryValuation(
         total_items=valuation_data['total_items'],
         total_quantity=valuation_data['total_quantity'],
         total_cost_value=valuation_data['total_cost_value'],
         total_retail_value=valuation_data['total_retail_value'],
         potential_profit=valuation_data['potential_profit'],
-        categories_breakdown=[]  # TODO: Implement category breakdown
-    )
+        categories_breakdown=valuation_data['categories_breakdown']
+    ))
 
 
 @reports_router.get(
     "/sales-summary",
     response_model=SalesReport,
     summary="Get sales summary",
-    description="Get sales summary for a specified period"
+    description="Get sales summary for a specified period",
+    dependencies=[query_budget(5)]
 )
 async def get_sales_summary(
+    request: Request,
     date_from: Optional[datetime] = Query(None, description="Start date"),
     date_to: Optional[datetime] = Query(None, description="End date"),
-    db: Session = Depends(get_db)
+    group_by: Optional[SalesGroupByEnum] = Query(None, description="Break down sales by day, week (labelled with its Monday), month, category or customer"),
+    top_n: int = Query(10, ge=1, le=100, description="Number of top selling items"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get sales summary report."""
-    sales_data = reports_crud.get_sales_summary(
-        db=db, date_from=date_from, date_to=date_to
+    sales_data = await async_reports_crud.get_sales_summary(
+        db=db, date_from=date_from, date_to=date_to, group_by=group_by, top_n=top_n
     )
     
     period = "All time"
@@ -468,14 +592,16 @@ async def get_sales_summary(
     elif date_to:
         period = f"Until {date_to.strftime('%Y-%m-%d')}"
     
-    return SalesReport(
+    return json_response(request, SalesReport, SalesReport(
         period=period,
         total_orders=sales_data['total_orders'],
         total_revenue=sales_data['total_revenue'],
         total_items_sold=sales_data['total_items_sold'],
         average_order_value=sales_data['average_order_value'],
-        top_selling_items=[]  # TODO: Implement top selling items
-    )
+        top_selling_items=sales_data['top_selling_items'],
+        group_by=group_by,
+        breakdown=sales_data['breakdown']
+    ))
 
 
 # Dashboard Routes
@@ -483,52 +609,245 @@ async def get_sales_summary(
     "/summary",
     response_model=DashboardSummary,
     summary="Get dashboard summary",
-    description="Get dashboard summary with key metrics and recent activity"
-)
-async def get_dashboard_summary(db: Session = Depends(get_db)):
-    """Get dashboard summary."""
-    # Get counts
-    inventory_items, total_items = inventory_crud.get_items(db=db, skip=0, limit=1)
-    customers, total_customers = customer_crud.get_customers(db=db, skip=0, limit=1)
-    suppliers, total_suppliers = supplier_crud.get_suppliers(db=db, skip=0, limit=1)
-    
-    # Get pending orders
-    pending_orders, total_pending = order_crud.get_orders(
-        db=db, skip=0, limit=1, status=OrderStatusEnum.PENDING
-    )
-    
-    # Get low stock items
-    low_stock_items = reports_crud.get_low_stock_items(db=db)
-    
-    # Get inventory valuation
-    valuation = reports_crud.get_inventory_valuation(db=db)
+    description="Get dashboard summary with key metrics and recent activity",
+    dependencies=[query_budget(6)]
+)
+async def get_dashboard_summary(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get dashboard summary.
+    Served from a snapshot that is rebuilt only after inventory, order or
+    stock movement writes, and at most once per DASHBOARD_MAX_STALENESS seconds.
+    """
+    summary = dashboard_snapshot.get()
+    if summary is not None:
+        return json_response(request, DashboardSummary, summary)
     
-    # Get recent orders
-    recent_orders, _ = order_crud.get_orders(db=db, skip=0, limit=5)
+    generations = dashboard_snapshot.begin()
+    counts = await async_reports_crud.get_dashboard_counts(db=db)
+    valuation = await async_reports_crud.get_inventory_valuation(db=db)
     
-    # Get recent stock movements
-    recent_movements, _ = stock_movement_crud.get_stock_movements(db=db, skip=0, limit=5)
+    # Get recent orders and stock movements
+    recent_orders, _ = await async_order_crud.get_orders(
+        db=db, skip=0, limit=5, count=CountModeEnum.NONE
+    )
+    recent_movements, _ = await async_stock_movement_crud.get_stock_movements(
+        db=db, skip=0, limit=5, count=CountModeEnum.NONE
+    )
     
     # Create alerts
     alerts = []
-    if len(low_stock_items) > 0:
+    if counts['low_stock_items'] > 0:
         alerts.append({
             "type": "warning",
-            "message": f"{len(low_stock_items)} items have low stock levels",
+            "message": f"{counts['low_stock_items']} items have low stock levels",
             "action_url": "/api/stock/levels?low_stock_only=true"
         })
     
-    return DashboardSummary(
-        total_inventory_items=total_items,
-        total_customers=total_customers,
-        total_suppliers=total_suppliers,
-        pending_orders=total_pending,
-        low_stock_items=len(low_stock_items),
+    summary = DashboardSummary(
+        **counts,
         total_inventory_value=valuation['total_retail_value'],
         recent_orders=recent_orders,
         recent_stock_movements=recent_movements,
         alerts=alerts
     )
+    dashboard_snapshot.set(summary, generations)
+    return json_response(request, DashboardSummary, summary)
+
+
+# Seconds before re-reading a snapshot that a write landed in, doubled on
+# each retry up to the maximum
+_SNAPSHOT_RETRY_DELAY = 0.01
+_SNAPSHOT_RETRY_MAX_DELAY = 1.0
+
+
+@dashboard_router.get(
+    "/stream",
+    summary="Stream dashboard updates",
+    description="Server-Sent Events stream of dashboard count deltas, low stock changes, new orders and stock movements"
+)
+async def stream_dashboard_updates():
+    """
+    Stream live dashboard updates.
+    The first event is a `snapshot` of the dashboard counts; after that only
+    committed changes are sent (`counts` deltas, `low_stock`, `order_created`,
+    `order_status` and `stock_movement`). A client that falls behind gets a
+    fresh `snapshot` instead of the events it missed. Each event's id is its
+    batch's sequence number; a snapshot's id is the last batch it includes.
+    """
+    async def snapshot() -> tuple:
+        """(sequence, event) of a snapshot holding exactly the batches up to `sequence`."""
+        delay = _SNAPSHOT_RETRY_DELAY
+        while True:
+            sequence = live_updates.broker.sequence
+            settled = live_updates.broker.settled
+            # A short-lived session, so open streams do not hold pool connections
+            async with AsyncSessionLocal() as db:
+                counts = await async_reports_crud.get_dashboard_counts(db=db)
+            # A write committed while the counts were read may or may not be in
+            # them, and the client would apply it twice or never: read again
+            if settled and live_updates.broker.settled and live_updates.broker.sequence == sequence:
+                return sequence, live_updates.format_sse({"type": "snapshot", "data": counts, "seq": sequence})
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _SNAPSHOT_RETRY_MAX_DELAY)
+    
+    async def events():
+        queue = live_updates.broker.subscribe()
+        try:
+            sequence, event = await snapshot()
+            yield event
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=settings.live_updates_keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item["type"] == "resync":
+                    sequence, event = await snapshot()
+                    yield event
+                elif item["seq"] > sequence:
+                    yield live_updates.format_sse(item)
+        finally:
+            live_updates.broker.unsubscribe(queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Export Routes
+@export_router.get(
+    "/inventory",
+    summary="Export inventory",
+    description="Stream every inventory item matching the filters as NDJSON or CSV"
+)
+async def export_inventory(
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.NDJSON, alias="format", description="ndjson or csv"),
+    search: Optional[str] = Query(None, description="Search in name, SKU, or description"),
+    category: Optional[CategoryEnum] = Query(None, description="Filter by category"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export inventory items."""
+    statement = await async_inventory_crud.export_items(db=db, search=search, category=category)
+    return export_response(statement, export_format, "inventory")
+
+
+@export_router.get(
+    "/customers",
+    summary="Export customers",
+    description="Stream every customer matching the filters as NDJSON or CSV"
+)
+async def export_customers(
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.NDJSON, alias="format", description="ndjson or csv"),
+    search: Optional[str] = Query(None, description="Search in name or email"),
+    is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export customers."""
+    statement = await async_customer_crud.export_customers(db=db, search=search, is_active=is_active)
+    return export_response(statement, export_format, "customers")
+
+
+@export_router.get(
+    "/orders",
+    summary="Export orders",
+    description="Stream every order matching the filters as NDJSON or CSV"
+)
+async def export_orders(
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.NDJSON, alias="format", description="ndjson or csv"),
+    status: Optional[OrderStatusEnum] = Query(None, description="Filter by status"),
+    customer_id: Optional[int] = Query(None, description="Filter by customer"),
+    date_from: Optional[datetime] = Query(None, description="Filter from date"),
+    date_to: Optional[datetime] = Query(None, description="Filter to date"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export orders."""
+    statement = await async_order_crud.export_orders(
+        db=db,
+        status=status,
+        customer_id=customer_id,
+        date_from=date_from,
+        date_to=date_to
+    )
+    return export_response(statement, export_format, "orders")
+
+
+@export_router.get(
+    "/stock-movements",
+    summary="Export stock movements",
+    description="Stream every stock movement matching the filters as NDJSON or CSV"
+)
+async def export_stock_movements(
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.NDJSON, alias="format", description="ndjson or csv"),
+    inventory_item_id: Optional[int] = Query(None, description="Filter by inventory item"),
+    movement_type: Optional[StockMovementTypeEnum] = Query(None, description="Filter by movement type"),
+    date_from: Optional[datetime] = Query(None, description="Filter from date"),
+    date_to: Optional[datetime] = Query(None, description="Filter to date"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export stock movements."""
+    statement = await async_stock_movement_crud.export_stock_movements(
+        db=db,
+        inventory_item_id=inventory_item_id,
+        movement_type=movement_type,
+        date_from=date_from,
+        date_to=date_to
+    )
+    return export_response(statement, export_format, "stock-movements")
+
+
+# Admin Routes
+@admin_router.get(
+    "/cache-stats",
+    response_model=EntityCacheStats,
+    summary="Entity cache statistics",
+    description="Hit, miss, eviction, expiration and invalidation counters of the single-entity response cache"
+)
+async def get_cache_stats():
+    """Get entity cache statistics."""
+    return entity_cache.stats()
+
+
+@admin_router.get(
+    "/slow-queries",
+    response_model=List[SlowQueryRecord],
+    summary="Slow-query log",
+    description="Recent statements slower than SLOW_QUERY_THRESHOLD_MS, newest first, with their query plans",
+    dependencies=[Depends(require_profile_token)]
+)
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000, description="Number of entries"),
+    full_scans_only: bool = Query(False, description="Only statements whose plan scans a whole table")
+):
+    """Get recent slow queries."""
+    return slow_query_log.entries(limit, full_scans_only)
+
+
+@admin_router.get(
+    "/profiles",
+    response_model=List[ProfileRecord],
+    summary="Request profiles",
+    description="Stored request profiles, newest first; enable them with PROFILE_ENABLED",
+    dependencies=[Depends(require_profile_token)]
+)
+async def get_profiles(
+    limit: int = Query(50, ge=1, le=1000, description="Number of entries")
+):
+    """Get stored request profiles."""
+    return profile_store.entries(limit)
+
+
+@admin_router.get(
+    "/profiles/{profile_id}/{kind}",
+    response_class=FileResponse,
+    summary="Download a request profile",
+    description="The cProfile stats (pstats) or folded stacks for flame graphs (collapsed) of a profile",
+    dependencies=[Depends(require_profile_token)]
+)
+async def download_profile(profile_id: str, kind: ProfileKindEnum):
+    """Download a request profile file."""
+    return profile_response(profile_id, kind)
 
 
 # Create a list of all routers for easy import
@@ -538,5 +857,7 @@ extended_routers = [
     orders_router,
     stock_router,
     reports_router,
-    dashboard_router
+    dashboard_router,
+    export_router,
+    admin_router
 ]
@@ -0,0 +1,82 @@
+"""
+Row-level change tracking for in-process caches.
+
+Objects written by the unit of work are recorded by primary key on flush;
+bulk INSERT/UPDATE/DELETE statements report the rows they wrote with
+``touch``. When the transaction commits, every callback registered with
+``subscribe`` receives ``{table_name: ids}``, where ``None`` means a bulk
+statement on that table did not report its rows, so any of them may have
+changed. Nothing is delivered for a rolled back transaction.
+"""
+from itertools import chain
+from typing import Callable, Iterable
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+_subscribers: list = []
+
+
+def subscribe(callback: Callable[[dict], None]) -> None:
+    """Call `callback` with the changes of every committed transaction."""
+    _subscribers.append(callback)
+
+
+def _pending(db: Session) -> dict:
+    return db.info.setdefault("row_changes", {"ids": {}, "bulk": {}, "touched": {}})
+
+
+def touch(db: Session, table_name: str, ids: Iterable) -> None:
+    """
+    Report the rows written by the bulk statement just executed on
+    `table_name`. Call once per statement, even when it matched no rows;
+    rows the statement inserted can be left out, as no cache holds them yet.
+    """
+    pending = _pending(db)
+    pending["ids"].setdefault(table_name, set()).update(ids)
+    pending["touched"][table_name] = pending["touched"].get(table_name, 0) + 1
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_rows(session, flush_context):
+    """Remember the primary keys of objects written by the unit of work."""
+    ids = None
+    for obj in chain(session.new, session.dirty, session.deleted):
+        mapper = inspect(obj).mapper
+        key = mapper.primary_key_from_instance(obj)
+        if None in key:
+            continue
+        if ids is None:
+            ids = _pending(session)["ids"]
+        ids.setdefault(mapper.local_table.name, set()).add(key[0] if len(key) == 1 else tuple(key))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _count_bulk_statements(orm_execute_state):
+    """Count bulk statements per table; each should be reported with ``touch``."""
+    state = orm_execute_state
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None:
+        bulk = _pending(state.session)["bulk"]
+        table_name = state.bind_mapper.local_table.name
+        bulk[table_name] = bulk.get(table_name, 0) + 1
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_changes(session):
+    """Hand the committed transaction's changes to the subscribers."""
+    pending = session.info.pop("row_changes", None)
+    if not pending:
+        return
+    changes = dict(pending["ids"])
+    for table_name, statements in pending["bulk"].items():
+        if statements > pending["touched"].get(table_name, 0):
+            changes[table_name] = None
+    if changes:
+        for callback in _subscribers:
+            callback(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    """Forget changes made by a rolled back transaction."""
+    session.info.pop("row_changes", None)
@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation.
 """
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, List
 from pydantic import BaseModel, Field, validator
 from models import CategoryEnum
 
@@ -75,10 +75,35 @@ class InventoryItemResponse(InventoryItemBase):
 class InventoryItemsResponse(BaseModel):
     """Schema for paginated inventory items response."""
     items: list[InventoryItemResponse]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
+
+
+class ItemLookupRequest(BaseModel):
+    """Schema for bulk SKU/barcode lookups."""
+    skus: List[str] = Field(default_factory=list, max_length=1000)
+    barcodes: List[str] = Field(default_factory=list, max_length=1000)
+
+
+class ItemLookupRecord(BaseModel):
+    """Compact item record returned by lookups."""
+    id: int
+    sku: str
+    barcode: Optional[str]
+    name: str
+    category: CategoryEnum
+    price: float
+    quantity: int
+    is_active: bool
+
+
+class ItemLookupResponse(BaseModel):
+    """Schema for bulk lookup responses; unknown codes map to null."""
+    skus: Dict[str, Optional[ItemLookupRecord]]
+    barcodes: Dict[str, Optional[ItemLookupRecord]]
 
 
 class HealthResponse(BaseModel):
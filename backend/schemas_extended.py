@@ -1,8 +1,9 @@
 """
 Extended Pydantic schemas for the full inventory management system.
 """
+import enum
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Union
 from decimal import Decimal
 from pydantic import BaseModel, Field, validator, EmailStr
 from models import OrderStatusEnum, StockMovementTypeEnum, CategoryEnum
@@ -202,12 +203,35 @@ class StockMovementCreate(StockMovementBase):
     pass
 
 
+class StockMovementBatchCreate(BaseModel):
+    """Schema for applying many stock movements in one request."""
+    movements: List[StockMovementCreate] = Field(..., min_items=1, max_items=10000)
+
+
+class StockMovementBatchResult(BaseModel):
+    """Schema for the outcome of one movement in a batch."""
+    index: int  # Position in the submitted list
+    inventory_item_id: int
+    status: str  # 'applied' or 'error'
+    movement_id: Optional[int] = None
+    previous_quantity: Optional[int] = None
+    new_quantity: Optional[int] = None
+    error: Optional[str] = None
+
+
+class StockMovementBatchResponse(BaseModel):
+    """Schema for batch stock movement responses."""
+    applied: int
+    failed: int
+    results: List[StockMovementBatchResult]
+
+
 class StockMovementResponse(StockMovementBase):
     """Schema for stock movement responses."""
     id: int
     previous_quantity: int
     new_quantity: int
-    inventory_item: Optional[dict] = None
+    inventory_item: Optional[InventoryItemResponse] = None
     created_at: datetime
     
     class Config:
@@ -289,6 +313,15 @@ class StockLevelReport(BaseModel):
     days_of_stock: Optional[int] = None
 
 
+class SalesGroupByEnum(str, enum.Enum):
+    """Enum for sales report grouping dimensions."""
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    CATEGORY = "category"
+    CUSTOMER = "customer"
+
+
 class SalesReport(BaseModel):
     """Schema for sales reports."""
     period: str
@@ -297,6 +330,8 @@ class SalesReport(BaseModel):
     total_items_sold: int
     average_order_value: Decimal
     top_selling_items: List[dict]
+    group_by: Optional[SalesGroupByEnum] = None
+    breakdown: List[dict] = []
 
 
 class InventoryValuation(BaseModel):
@@ -331,37 +366,41 @@ class AuditLogResponse(BaseModel):
 class PaginatedCustomersResponse(BaseModel):
     """Schema for paginated customers response."""
     items: List[CustomerResponse]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class PaginatedSuppliersResponse(BaseModel):
     """Schema for paginated suppliers response."""
     items: List[SupplierResponse]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class PaginatedOrdersResponse(BaseModel):
     """Schema for paginated orders response."""
     items: List[OrderResponse]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class PaginatedStockMovementsResponse(BaseModel):
     """Schema for paginated stock movements response."""
     items: List[StockMovementResponse]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class PaginatedPurchaseOrdersResponse(BaseModel):
@@ -385,3 +424,43 @@ class DashboardSummary(BaseModel):
     recent_orders: List[OrderResponse]
     recent_stock_movements: List[StockMovementResponse]
     alerts: List[dict]
+
+
+# Cache Statistics Schema
+class EntityCacheStats(BaseModel):
+    """Schema for entity cache counters."""
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+# Slow Query Log Schema
+class SlowQueryRecord(BaseModel):
+    """Schema for a statement recorded by the slow-query log."""
+    recorded_at: datetime
+    duration_ms: float
+    function: str
+    sql: str
+    parameters: Optional[Union[List[Any], Dict[str, Any]]] = None
+    executemany_rows: Optional[int] = None
+    plan: Optional[List[str]] = None
+    explain_error: Optional[str] = None
+    full_scans: List[str]
+
+
+# Request Profile Schema
+class ProfileRecord(BaseModel):
+    """Schema for a stored request profile."""
+    id: str
+    recorded_at: datetime
+    method: str
+    path: str
+    status: Optional[int]  # None if the profile stopped before the response started
+    trigger: str
+    duration_ms: float
+    samples: int
+    stopped: Optional[str] = None  # "event_stream" or "time_limit" if it stopped before the request ended
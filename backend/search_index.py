@@ -0,0 +1,116 @@
+"""
+SQLite FTS5 full-text search index over inventory items.
+
+The index is an external-content FTS5 table kept in sync by triggers on
+``inventory_items``, so every write path (the CRUD layer, seed scripts and
+bulk statements) updates it in the same transaction as the row itself.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import text, table, column, select, func, literal_column
+from sqlalchemy.orm import Session
+
+FTS_TABLE = "inventory_items_fts"
+
+# Column weights for BM25 ranking, in index column order (name, sku, description)
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, sku, description,
+        content='inventory_items', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2", prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON inventory_items BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON inventory_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, sku, description ON inventory_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END
+    """,
+]
+
+_fts = table(FTS_TABLE, column("rowid"))
+
+
+def install_search_index(target, connection, **kw):
+    """
+    Create the FTS table and its sync triggers if any of them are missing.
+
+    Registered as an ``after_create`` listener on the model metadata. The index
+    is rebuilt from ``inventory_items`` only when something had to be created,
+    so restarts against an existing database stay cheap.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    existing = set(connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE name LIKE :prefix"
+    ), {"prefix": f"{FTS_TABLE}%"}).scalars())
+    expected = {FTS_TABLE, f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au"}
+    if expected <= existing:
+        return
+
+    for statement in _DDL:
+        connection.execute(text(statement))
+    rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection):
+    """Repopulate the whole index from the inventory_items table."""
+    connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def build_match_expression(search: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term and all terms must match, so
+    search-as-you-type input like ``wirel head`` finds "Wireless Headphones".
+    Returns None when the input has no searchable words.
+    """
+    terms = re.findall(r"\w+", search, re.UNICODE)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def is_available(db: Session) -> bool:
+    """Whether the session's database supports the FTS index."""
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def match_items(db: Session, search: str):
+    """
+    Return a subquery of (item_id, rank) for items matching `search`, ordered
+    best-first by ascending rank, or None if the index cannot serve the search.
+    """
+    if not is_available(db):
+        return None
+
+    expression = build_match_expression(search)
+    if expression is None:
+        return None
+
+    fts = literal_column(FTS_TABLE)
+    return select(
+        _fts.c.rowid.label("item_id"),
+        func.bm25(fts, *BM25_WEIGHTS).label("rank")
+    ).where(fts.op("MATCH")(expression)).subquery()
@@ -0,0 +1,116 @@
+"""
+Race-free document number allocation (order numbers, PO numbers).
+
+Each (name, period) pair has a counter row in ``number_sequences`` that is
+bumped with a single ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING``
+statement, so allocation is one indexed write no matter how many numbers
+were already issued and concurrent callers can never receive the same value.
+"""
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import upsert
+from models import NumberSequence
+
+
+def _increment(executor, name: str, period: str, step: int, seed: Optional[Callable] = None) -> int:
+    """
+    Atomically add `step` to a counter and return its new value.
+    `executor` may be a Session or a Connection.
+    """
+    bind = executor.get_bind() if isinstance(executor, Session) else executor
+    start = seed(executor) if seed else 0
+    table = NumberSequence.__table__
+    statement = upsert(bind, table).values(name=name, period=period, value=start + step)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.name, table.c.period],
+        set_={"value": table.c.value + step}
+    ).returning(table.c.value)
+    return executor.execute(statement).scalar_one()
+
+
+class SequenceAllocator:
+    """
+    Hands out increasing numbers per (name, period).
+
+    With a block size of 1 every number is allocated inside the caller's
+    transaction, so a rolled back order also gives its number back. Larger
+    block sizes reserve that many numbers at once in a separate committed
+    transaction and serve them from memory; numbers left in a block when the
+    process exits, or when two callers reserve blocks at once, are skipped.
+    """
+
+    def __init__(self, block_size: int = 1):
+        self.block_size = max(block_size, 1)
+        self._blocks: dict = {}
+        self._seeded: set = set()
+        self._lock = threading.Lock()
+
+    def next_value(self, db, name: str, period: str, seed: Optional[Callable] = None) -> int:
+        """
+        Allocate the next number for (name, period).
+        `seed(executor)` returns the last number issued before the counter
+        existed. It is an index lookup that runs on every in-transaction
+        allocation (the counter row may have been rolled back) but only once
+        per (name, period) per process once a block has been committed.
+        """
+        if self.block_size == 1:
+            return _increment(db, name, period, 1, seed)
+
+        with self._lock:
+            block = self._blocks.get(name)
+            if block is not None and block[0] == period and block[1] <= block[2]:
+                block[1] += 1
+                return block[1] - 1
+
+        # Reserve a block on the caller's engine, without holding the lock:
+        # inside AsyncSession.run_sync that is the async engine, so waiting on
+        # the write lock yields to the event loop instead of stalling it
+        key = (name, period)
+        bind = db.get_bind() if isinstance(db, Session) else db.engine
+        with bind.begin() as connection:
+            high = _increment(connection, name, period, self.block_size,
+                              None if key in self._seeded else seed)
+        low = high - self.block_size + 1
+        with self._lock:
+            self._seeded.add(key)
+            block = self._blocks.get(name)
+            # A concurrent caller may have installed a block meanwhile; its
+            # numbers are served first and the rest of this one is skipped
+            if block is None or block[0] != period or block[1] > block[2]:
+                self._blocks[name] = [period, low + 1, high]
+        return low
+
+
+allocator = SequenceAllocator(block_size=settings.sequence_block_size)
+
+
+def next_document_number(db, prefix: str, number_column) -> str:
+    """
+    Allocate a number like ``ORD-20240131-0001`` for today.
+
+    `number_column` is the column holding existing numbers (for example
+    ``Order.order_number`` or ``PurchaseOrder.po_number``); it is read once to
+    continue numbering for days that started before the counter existed.
+    """
+    period = datetime.now().strftime("%Y%m%d")
+    stem = f"{prefix}-{period}-"
+
+    def seed(executor) -> int:
+        # Range predicate so the unique index on the number column is used
+        last = executor.execute(
+            select(func.max(number_column)).where(
+                number_column >= stem,
+                number_column < f"{prefix}-{period}."
+            )
+        ).scalar()
+        suffix = last[len(stem):] if last else ""
+        return int(suffix) if suffix.isdigit() else 0
+
+    value = allocator.next_value(db, prefix, period, seed)
+    return f"{stem}{value:04d}"
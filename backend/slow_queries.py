@@ -0,0 +1,177 @@
+"""
+Slow-query log with query plans.
+
+Engine listeners in ``database`` time every statement; one slower than
+``slow_query_threshold_ms`` is queued with its SQL, redacted parameters,
+duration and the CRUD method that ran it. A background thread then runs
+``EXPLAIN QUERY PLAN`` for it on a separate connection, so requests never
+wait on the plan, flags full table scans, and writes the record to a
+rotating JSON-lines file and the in-memory list served by
+``/api/admin/slow-queries``.
+"""
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, List, Optional
+
+from config import settings
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Statements that are not worth explaining
+_NO_PLAN = ("EXPLAIN", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+# "SCAN inventory_items" (or "SCAN TABLE ..." before SQLite 3.36) without an
+# index; "SCAN x USING [COVERING] INDEX", virtual tables and subqueries are not flagged
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+# Slow statements waiting for their plan; more are dropped
+_QUEUE_SIZE = 1000
+
+
+def redact(value: Any) -> Any:
+    """Keep NULL, booleans, numbers and dates; replace text and blobs with their type name."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if not settings.slow_query_redact:
+        return value if isinstance(value, str) else repr(value)
+    return f"<{type(value).__name__}>"
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Tables read by a full scan in an ``EXPLAIN QUERY PLAN`` result."""
+    subqueries = {detail.split()[-1] for detail in plan if detail.startswith(("CO-ROUTINE", "MATERIALIZE"))}
+    return [
+        match.group(1) for match in map(_FULL_SCAN.match, plan)
+        if match and match.group(1) not in subqueries
+    ]
+
+
+class SlowQueryLog:
+    """Recent slow statements with their plans, explained on a background thread."""
+
+    def __init__(self, max_entries: int):
+        self.engine = None  # Sync engine used for EXPLAIN QUERY PLAN
+        self.dropped = 0
+        self._entries: deque = deque(maxlen=max_entries)
+        self._queue: queue.Queue = queue.Queue(maxsize=_QUEUE_SIZE)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._file_logger: Optional[logging.Logger] = None
+
+    def record(self, statement: str, parameters: Any, executemany: bool, duration: float) -> None:
+        """Queue a slow statement for explaining and logging."""
+        if statement.startswith("EXPLAIN QUERY PLAN"):
+            return  # The log's own plan lookups
+        entry = {
+            "recorded_at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "function": metrics.current_db_function(),
+            "sql": statement,
+            "parameters": None,
+            "executemany_rows": None,
+        }
+        if executemany:
+            entry["executemany_rows"] = len(parameters)
+            parameters = parameters[0] if parameters else ()
+        if isinstance(parameters, dict):
+            entry["parameters"] = {name: redact(value) for name, value in parameters.items()}
+        elif parameters:
+            entry["parameters"] = [redact(value) for value in parameters]
+        try:
+            self._queue.put_nowait((entry, parameters))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._start_worker()
+
+    def _start_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            entry, parameters = self._queue.get()
+            try:
+                self._process(entry, parameters)
+            except Exception:  # Keep the worker alive for the next statements
+                logger.exception("Could not log slow query: %s", entry["sql"][:200])
+
+    def _process(self, entry: dict, parameters: Any) -> None:
+        entry["plan"], entry["explain_error"] = self._explain(entry["sql"], parameters)
+        entry["full_scans"] = full_scans(entry["plan"] or [])
+        with self._lock:
+            self._entries.append(entry)
+        if entry["full_scans"]:
+            logger.warning(
+                "Slow query (%.1f ms) in %s scans %s: %s",
+                entry["duration_ms"], entry["function"], ", ".join(entry["full_scans"]), entry["sql"][:200]
+            )
+        self._write(entry)
+
+    def _explain(self, statement: str, parameters: Any) -> tuple:
+        if self.engine is None or self.engine.dialect.name != "sqlite":
+            return None, None
+        if statement.lstrip().upper().startswith(_NO_PLAN):
+            return None, None
+        try:
+            with self.engine.connect() as connection:
+                rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).all()
+        except Exception as exc:  # The plan is best effort, e.g. temp tables of another connection
+            return None, str(exc)
+        return [row[-1] for row in rows], None
+
+    def _write(self, entry: dict) -> None:
+        if not settings.slow_query_log_file:
+            return
+        if self._file_logger is None:
+            file_logger = logging.getLogger(f"{__name__}.file")
+            file_logger.propagate = False
+            file_logger.setLevel(logging.INFO)
+            file_logger.addHandler(RotatingFileHandler(
+                settings.slow_query_log_file,
+                maxBytes=settings.slow_query_log_max_bytes,
+                backupCount=settings.slow_query_log_backups
+            ))
+            self._file_logger = file_logger
+        self._file_logger.info(json.dumps(entry))
+
+    def entries(self, limit: int, full_scans_only: bool = False) -> List[dict]:
+        """Most recent slow statements first."""
+        with self._lock:
+            recent = list(self._entries)
+        entries = [entry for entry in reversed(recent) if entry["full_scans"] or not full_scans_only]
+        return entries[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(max_entries=settings.slow_query_log_size)
+
+
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info["slow_query_started"] = time.perf_counter()
+
+
+def finish_statement(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("slow_query_started", None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    if duration * 1000 >= settings.slow_query_threshold_ms:
+        slow_query_log.record(statement, parameters, executemany, duration)
@@ -0,0 +1,125 @@
+"""
+Materialized stock status ('low', 'normal', 'high') for inventory items.
+
+The ``stock_status`` table (``models.StockStatus``) holds one row per item
+with its status, quantity and active flag, indexed on (status, is_active).
+Triggers on ``inventory_items`` keep it in step with every quantity, stock
+level or active flag change in the same transaction, whichever write path
+made it, so low stock lookups are index reads instead of a column-to-column
+comparison over the whole catalog.
+"""
+from sqlalchemy import text, table, column, select, case, literal, Integer, Boolean
+from sqlalchemy.orm import Session
+
+LOW = "low"
+NORMAL = "normal"
+HIGH = "high"
+
+
+def _status_sql(row: str) -> str:
+    return f"""
+        CASE
+            WHEN {row}.quantity <= {row}.min_stock_level THEN 'low'
+            WHEN {row}.quantity >= {row}.max_stock_level THEN 'high'
+            ELSE 'normal'
+        END
+    """
+
+
+_UPSERT = f"""
+    INSERT OR REPLACE INTO stock_status(inventory_item_id, status, quantity, is_active)
+    VALUES (new.id, {_status_sql("new")}, new.quantity, coalesce(new.is_active, 1));
+"""
+
+_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_status_ai AFTER INSERT ON inventory_items BEGIN
+        {_UPSERT}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_status_au
+    AFTER UPDATE OF quantity, min_stock_level, max_stock_level, is_active ON inventory_items BEGIN
+        {_UPSERT}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stock_status_ad AFTER DELETE ON inventory_items BEGIN
+        DELETE FROM stock_status WHERE inventory_item_id = old.id;
+    END
+    """,
+]
+
+_items = table(
+    "inventory_items",
+    column("id", Integer),
+    column("quantity", Integer),
+    column("min_stock_level", Integer),
+    column("max_stock_level", Integer),
+    column("is_active", Boolean),
+)
+
+
+def install_stock_status(target, connection, **kw):
+    """
+    Create the sync triggers if any of them are missing.
+
+    Registered as an ``after_create`` listener on the model metadata. The
+    table is backfilled from ``inventory_items`` only when a trigger had to be
+    created, so restarts against an existing database stay cheap.
+    """
+    if connection.dialect.name != "sqlite" or "stock_status" not in target.tables:
+        return
+
+    existing = set(connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'stock_status_%'"
+    )).scalars())
+    if {"stock_status_ai", "stock_status_au", "stock_status_ad"} <= existing:
+        return
+
+    for statement in _DDL:
+        connection.execute(text(statement))
+    rebuild_stock_status(connection)
+
+
+def rebuild_stock_status(connection):
+    """Repopulate the whole table from inventory_items."""
+    connection.execute(text("DELETE FROM stock_status"))
+    connection.execute(text(f"""
+        INSERT INTO stock_status(inventory_item_id, status, quantity, is_active)
+        SELECT id, {_status_sql("inventory_items")}, quantity, coalesce(is_active, 1)
+        FROM inventory_items
+    """))
+
+
+def is_available(db: Session) -> bool:
+    """Whether the session's database maintains the stock_status table."""
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def status_source(db: Session):
+    """
+    Return a selectable with columns (inventory_item_id, status, quantity,
+    is_active): the maintained table where triggers keep it current,
+    otherwise the same values computed from inventory_items.
+    """
+    if is_available(db):
+        return table(
+            "stock_status",
+            column("inventory_item_id", Integer),
+            column("status"),
+            column("quantity", Integer),
+            column("is_active", Boolean),
+        )
+
+    status = case(
+        (_items.c.quantity <= _items.c.min_stock_level, literal(LOW)),
+        (_items.c.quantity >= _items.c.max_stock_level, literal(HIGH)),
+        else_=literal(NORMAL)
+    )
+    return select(
+        _items.c.id.label("inventory_item_id"),
+        status.label("status"),
+        _items.c.quantity,
+        _items.c.is_active
+    ).subquery("stock_status")
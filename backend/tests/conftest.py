@@ -0,0 +1,35 @@
+"""
+Shared fixtures: the app on a seeded SQLite database in a temporary directory.
+
+The settings are read when ``config`` is first imported, so the environment
+is set up here, before any backend module is loaded. Query budgets are
+enforced, so a route that runs more statements than its budget fails.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+_DATA_DIR = tempfile.mkdtemp(prefix="inventory-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_DATA_DIR, 'inventory.db')}",
+    "DEBUG": "false",
+    "QUERY_BUDGET_ENFORCE": "true",
+    "SLOW_QUERY_LOG_FILE": "",
+    "PROFILE_DIR": os.path.join(_DATA_DIR, "profiles"),
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from init_extended_db import init_extended_database  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient for the app, started on the sample data."""
+    init_extended_database()
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,66 @@
+"""
+Bulk inventory import.
+"""
+import json
+
+import pytest
+
+
+def _row(sku: str, name: str = "Imported", **fields) -> dict:
+    return {"sku": sku, "name": name, "category": "electronics", "quantity": 3, "price": 4.5, **fields}
+
+
+def _import(client, lines: list, **params) -> list:
+    response = client.post(
+        "/api/inventory/import",
+        params={"format": "ndjson", **params},
+        content="".join((line if isinstance(line, str) else json.dumps(line)) + "\n" for line in lines)
+    )
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def _check_totals(reports: list) -> dict:
+    summary = reports[-1]
+    assert summary["type"] == "summary"
+    assert summary["processed"] == summary["inserted"] + summary["updated"] + summary["failed"]
+    errors = {error["row"]: error["error"] for report in reports for error in report["errors"]}
+    assert len(errors) == summary["failed"]
+    return errors
+
+
+@pytest.mark.parametrize("chunk_size", [100, 2])
+def test_update_totals_add_up(client, chunk_size):
+    prefix = f"IMPORT-UPDATE-{chunk_size}"
+    _import(client, [_row(f"{prefix}-OLD")])
+
+    reports = _import(client, [
+        _row(f"{prefix}-NEW", "First"),
+        _row(f"{prefix}-NEW", "Second"),
+        _row(f"{prefix}-OLD", "Updated"),
+        _row(f"{prefix}-BAD", price=-1),
+        "{not json",
+    ], on_conflict="update", chunk_size=chunk_size)
+
+    errors = _check_totals(reports)
+    summary = reports[-1]
+    assert summary["processed"] == 5
+    assert (summary["inserted"], summary["updated"], summary["failed"]) == (1, 1, 3)
+    assert errors[1] == "Superseded by row 2"
+    assert "price" in errors[4] and errors[5].startswith("Invalid JSON")
+    items = client.get("/api/inventory", params={"search": prefix}).json()["items"]
+    assert {item["sku"]: item["name"] for item in items} == {f"{prefix}-OLD": "Updated", f"{prefix}-NEW": "Second"}
+
+
+def test_error_mode_totals_add_up(client):
+    _import(client, [_row("IMPORT-ERROR-OLD")])
+
+    reports = _import(client, [
+        _row("IMPORT-ERROR-NEW"),
+        _row("IMPORT-ERROR-NEW"),
+        _row("IMPORT-ERROR-OLD"),
+    ])
+
+    errors = _check_totals(reports)
+    assert (reports[-1]["inserted"], reports[-1]["updated"], reports[-1]["failed"]) == (1, 0, 2)
+    assert errors == {2: "Duplicate SKU in import", 3: "Item with SKU 'IMPORT-ERROR-OLD' already exists"}
@@ -0,0 +1,71 @@
+"""
+Supplier catalog sync.
+"""
+import json
+
+from database import SessionLocal
+from models import InventoryItem
+
+
+def _sync(client, supplier_id: int, rows: list, **params) -> list:
+    response = client.post(
+        f"/api/suppliers/{supplier_id}/catalog-sync",
+        params={"format": "ndjson", **params},
+        content="".join(json.dumps(row) + "\n" for row in rows)
+    )
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def _item(item_id: int) -> InventoryItem:
+    with SessionLocal() as db:
+        return db.get(InventoryItem, item_id)
+
+
+def _errors(reports: list) -> list:
+    return [error for report in reports for error in report["errors"]]
+
+
+def test_sync_cannot_take_over_another_suppliers_item(client):
+    before = _item(1)
+    assert before.sku == "WH-001" and before.supplier_id == 1
+
+    reports = _sync(client, 2, [{"sku": "wh-001", "name": "Hijacked", "quantity": 0}])
+
+    assert reports[-1]["failed"] == 1 and reports[-1]["updated"] == 0
+    assert "another supplier" in _errors(reports)[0]["error"]
+    after = _item(1)
+    assert (after.name, after.quantity, after.supplier_id) == (before.name, before.quantity, 1)
+
+
+def test_deactivate_missing_only_touches_own_items(client):
+    _sync(client, 2, [{"sku": "wh-001", "name": "Hijacked"}, {"sku": "TS-002", "name": "Supplier Two Shirt"}])
+
+    reports = _sync(client, 2, [], deactivate_missing="true")
+
+    assert reports[-1]["deactivated"] == 1
+    assert _item(2).is_active is False
+    assert _item(1).is_active is True
+
+
+def test_unowned_item_needs_claim(client):
+    item = _item(3)
+    assert item.supplier_id is None
+
+    reports = _sync(client, 2, [{"sku": item.sku, "name": "Claimed"}])
+    assert reports[-1]["failed"] == 1
+    assert _item(3).name == item.name
+
+    reports = _sync(client, 2, [{"sku": item.sku, "name": "Claimed"}], claim_unowned="true")
+    assert reports[-1]["updated"] == 1
+    claimed = _item(3)
+    assert (claimed.name, claimed.supplier_id) == ("Claimed", 2)
+
+
+def test_repeated_sku_is_reported_as_superseded(client):
+    reports = _sync(client, 2, [{"sku": "TS-002", "name": "First"}, {"sku": "ts-002", "name": "Second"}])
+
+    summary = reports[-1]
+    assert summary["processed"] == summary["unchanged"] + summary["created"] + summary["updated"] + summary["failed"]
+    assert _errors(reports) == [{"row": 1, "sku": "TS-002", "error": "Superseded by row 2"}]
+    assert _item(2).name == "Second"
@@ -0,0 +1,35 @@
+"""
+Cached list counts.
+"""
+from sqlalchemy.orm import Query
+
+from count_cache import count_cache, count_rows
+from crud_extended import customer_crud
+from database import SessionLocal
+from models import Customer
+from schemas_extended import CustomerCreate
+
+
+def test_commit_during_count_is_not_cached_as_current(client, monkeypatch):
+    count = Query.count
+    commits = []
+
+    def count_then_commit(query):
+        total = count(query)
+        if not commits:
+            commits.append(1)
+            with SessionLocal() as other:  # Lands after the count, before it is cached
+                customer_crud.create_customer(
+                    other, CustomerCreate(first_name="Count", last_name="Race", email="count-race@example.com")
+                )
+        return total
+
+    count_cache.clear()
+    monkeypatch.setattr(Query, "count", count_then_commit)
+    with SessionLocal() as db:
+        before = count_rows(db.query(Customer), Customer)
+        monkeypatch.undo()
+        after = count_rows(db.query(Customer), Customer)
+
+    assert commits
+    assert after == before + 1
@@ -0,0 +1,106 @@
+"""
+Invalidation of the cached single-entity GET responses.
+"""
+from entity_cache import EntityCache, entity_cache
+
+
+def _create_item(client, sku: str) -> dict:
+    response = client.post(
+        "/api/inventory",
+        json={"name": "Cache Probe", "category": "electronics", "quantity": 5, "price": 9.99, "sku": sku}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _cached_get(client, item_id: int) -> dict:
+    """GET the item twice, so the second response is served from the cache."""
+    client.get(f"/api/inventory/{item_id}")
+    assert entity_cache.get("inventory_items", item_id) is not None
+    return client.get(f"/api/inventory/{item_id}").json()
+
+
+def test_update_invalidates(client):
+    item = _create_item(client, "CACHE-UPDATE")
+    assert _cached_get(client, item["id"])["name"] == "Cache Probe"
+
+    response = client.put(f"/api/inventory/{item['id']}", json={"name": "Renamed"})
+    assert response.status_code == 200, response.text
+
+    assert entity_cache.get("inventory_items", item["id"]) is None
+    assert client.get(f"/api/inventory/{item['id']}").json()["name"] == "Renamed"
+
+
+def test_delete_invalidates(client):
+    item = _create_item(client, "CACHE-DELETE")
+    _cached_get(client, item["id"])
+
+    assert client.delete(f"/api/inventory/{item['id']}").status_code == 204
+
+    assert entity_cache.get("inventory_items", item["id"]) is None
+
+
+def test_stock_movement_invalidates(client):
+    item = _create_item(client, "CACHE-MOVEMENT")
+    _cached_get(client, item["id"])
+
+    response = client.post(
+        "/api/stock/movements/",
+        json={"inventory_item_id": item["id"], "movement_type": "in", "quantity": 4}
+    )
+    assert response.status_code == 201, response.text
+
+    assert client.get(f"/api/inventory/{item['id']}").json()["quantity"] == 9
+
+
+def test_import_invalidates(client):
+    item = _create_item(client, "CACHE-IMPORT")
+    _cached_get(client, item["id"])
+
+    response = client.post(
+        "/api/inventory/import",
+        params={"format": "ndjson", "on_conflict": "update"},
+        content='{"sku": "CACHE-IMPORT", "name": "Imported", "category": "electronics", "quantity": 1, "price": 9.99}\n'
+    )
+    assert response.status_code == 200, response.text
+
+    assert client.get(f"/api/inventory/{item['id']}").json()["name"] == "Imported"
+
+
+def test_order_depends_on_customer(client):
+    order = client.get("/api/orders/1").json()
+    customer_id = order["customer"]["id"]
+    assert entity_cache.get("orders", 1) is not None
+
+    response = client.put(f"/api/customers/{customer_id}", json={"city": "Renamed City"})
+    assert response.status_code == 200, response.text
+
+    assert entity_cache.get("orders", 1) is None
+    assert client.get("/api/orders/1").json()["customer"]["city"] == "Renamed City"
+
+
+def test_overlapping_load_is_not_stored():
+    cache = EntityCache(max_entries=10, ttl=60)
+    version = cache.begin()
+    cache.invalidate({"inventory_items": [1]})  # Committed while the load ran
+    cache.set("inventory_items", 1, "stale", [], version)
+    assert cache.get("inventory_items", 1) is None
+
+    version = cache.begin()
+    cache.invalidate({"inventory_items": [2], "customers": None})
+    cache.set("orders", 1, "stale", [("customers", 3)], version)
+    assert cache.get("orders", 1) is None
+
+    version = cache.begin()
+    cache.invalidate({"inventory_items": [2]})  # Unrelated row
+    cache.set("inventory_items", 1, "fresh", [], version)
+    assert cache.get("inventory_items", 1) == "fresh"
+
+
+def test_load_older_than_history_is_not_stored():
+    cache = EntityCache(max_entries=10, ttl=60)
+    version = cache.begin()
+    for row_id in range(1000, 1300):
+        cache.invalidate({"inventory_items": [row_id]})
+    cache.set("inventory_items", 1, "unknown", [], version)
+    assert cache.get("inventory_items", 1) is None
@@ -0,0 +1,32 @@
+"""
+Conditional GETs on the list endpoints.
+"""
+from sqlalchemy import text
+
+from count_cache import count_cache
+from database import SessionLocal
+
+
+def _touch(table_name: str, row_id: int) -> None:
+    """Bump a row's updated_at with plain SQL, as another process would."""
+    with SessionLocal() as db:
+        db.execute(
+            text(f"UPDATE {table_name} SET updated_at = datetime(updated_at, '+1 day') WHERE id = :id"),
+            {"id": row_id}
+        )
+        db.commit()
+
+
+def test_orders_etag_follows_embedded_rows(client):
+    order = client.get("/api/orders/1").json()
+    etag = client.get("/api/orders").headers["etag"]
+    assert client.get("/api/orders", headers={"If-None-Match": etag}).status_code == 304
+
+    for table_name, row_id in (("customers", order["customer_id"]),
+                               ("inventory_items", order["order_items"][0]["inventory_item_id"])):
+        _touch(table_name, row_id)
+        count_cache.clear()  # As if COUNT_CACHE_TTL had passed
+        changed = client.get("/api/orders", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        etag = changed.headers["etag"]
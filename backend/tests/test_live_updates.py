@@ -0,0 +1,66 @@
+"""
+Live dashboard stream.
+"""
+import asyncio
+import json
+
+import pytest
+
+from async_crud import async_reports_crud
+from crud_extended import customer_crud, supplier_crud
+from database import SessionLocal
+from models import Customer
+from routes_extended import stream_dashboard_updates
+from schemas_extended import CustomerCreate, SupplierCreate
+
+
+def _parse(chunk: str) -> tuple:
+    """(id, type, data) of one server-sent event."""
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return fields.get("id"), fields["event"], json.loads(fields["data"])
+
+
+def _create_customer(email: str) -> None:
+    with SessionLocal() as db:
+        customer_crud.create_customer(db, CustomerCreate(first_name="Live", last_name="Update", email=email))
+
+
+def _create_supplier(email: str) -> None:
+    with SessionLocal() as db:
+        supplier_crud.create_supplier(db, SupplierCreate(name="Live Update Supply", email=email))
+
+
+@pytest.mark.parametrize("racing_writes", [1, 5])
+def test_write_during_snapshot_is_not_counted_twice(client, monkeypatch, racing_writes):
+    """A commit that lands while the snapshot is read is in the snapshot or in a delta, never both."""
+    get_counts = async_reports_crud.get_dashboard_counts
+    writes = []
+
+    async def counts_with_concurrent_write(db):
+        if len(writes) < racing_writes:
+            writes.append(1)
+            _create_customer(f"snapshot-race-{racing_writes}-{len(writes)}@example.com")
+        return await get_counts(db=db)
+
+    monkeypatch.setattr(async_reports_crud, "get_dashboard_counts", counts_with_concurrent_write)
+
+    async def read_stream():
+        # TestClient buffers whole response bodies, so iterate the endless stream directly
+        events = (await stream_dashboard_updates()).body_iterator
+        try:
+            first = _parse(await events.__anext__())
+            monkeypatch.undo()
+            _create_supplier(f"after-snapshot-{racing_writes}@example.com")
+            return first, _parse(await asyncio.wait_for(events.__anext__(), timeout=5))
+        finally:
+            await events.aclose()
+
+    (snapshot_id, snapshot_type, snapshot), (event_id, event_type, data) = asyncio.run(read_stream())
+
+    assert len(writes) == racing_writes
+    assert snapshot_type == "snapshot"
+    assert event_type == "counts"
+    assert data == {"total_suppliers": 1}  # Not the customer already in the snapshot
+    assert int(event_id) > int(snapshot_id)
+    with SessionLocal() as db:
+        assert snapshot["total_customers"] == db.query(Customer).count()
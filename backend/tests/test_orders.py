@@ -0,0 +1,76 @@
+"""
+Order creation: stock checks, stock movements and change tracking.
+"""
+from sqlalchemy import func, select
+
+import row_changes
+from crud_extended import StockMovementCRUD
+from database import SessionLocal
+from models import InventoryItem, Order, OrderItem, StockMovement
+
+
+def _create_item(client, sku: str, quantity: int) -> int:
+    response = client.post(
+        "/api/inventory",
+        json={"name": "Order Probe", "category": "electronics", "quantity": quantity, "price": 5.0, "sku": sku}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _order(item_id: int, *quantities: int) -> dict:
+    return {
+        "customer_id": 1,
+        "items": [{"inventory_item_id": item_id, "quantity": quantity, "unit_price": "5.00"} for quantity in quantities]
+    }
+
+
+def _row_counts(item_id: int) -> tuple:
+    with SessionLocal() as db:
+        return (
+            db.get(InventoryItem, item_id).quantity,
+            db.scalar(select(func.count(Order.id))),
+            db.scalar(select(func.count(OrderItem.id))),
+            db.scalar(select(func.count(StockMovement.id)).where(StockMovement.inventory_item_id == item_id)),
+        )
+
+
+def test_duplicate_lines_are_checked_together(client):
+    item_id = _create_item(client, "ORDER-DUPLICATE", 4)
+    before = _row_counts(item_id)
+
+    response = client.post("/api/orders/", json=_order(item_id, 2, 3))
+
+    assert response.status_code == 400
+    assert "Insufficient stock" in response.json()["detail"]
+    assert _row_counts(item_id) == before
+
+
+def test_duplicate_lines_chain_movements(client, monkeypatch):
+    item_id = _create_item(client, "ORDER-CHAIN", 10)
+    delivered = []
+    monkeypatch.setattr(row_changes, "_subscribers", [*row_changes._subscribers, delivered.append])
+
+    response = client.post("/api/orders/", json=_order(item_id, 2, 3))
+
+    assert response.status_code == 201, response.text
+    with SessionLocal() as db:
+        assert db.get(InventoryItem, item_id).quantity == 5
+        movements = db.scalars(
+            select(StockMovement).where(StockMovement.inventory_item_id == item_id).order_by(StockMovement.id)
+        ).all()
+    assert [(m.quantity, m.previous_quantity, m.new_quantity) for m in movements] == [(-2, 10, 8), (-3, 8, 5)]
+    # Every bulk statement reported its rows, so no table is marked as wholly changed
+    assert delivered and all(ids is not None for changes in delivered for ids in changes.values())
+
+
+def test_stock_taken_concurrently_leaves_nothing_behind(client, monkeypatch):
+    item_id = _create_item(client, "ORDER-RACE", 10)
+    before = _row_counts(item_id)
+    # As if another order took the stock between the check and the update
+    monkeypatch.setattr(StockMovementCRUD, "adjust_quantities", staticmethod(lambda db, deltas: {}))
+
+    response = client.post("/api/orders/", json=_order(item_id, 2))
+
+    assert response.status_code == 400
+    assert _row_counts(item_id) == before
@@ -0,0 +1,89 @@
+"""
+Request profiler and its endpoints.
+"""
+import asyncio
+import sys
+import time
+
+import aiosqlite
+
+from config import settings
+from profiler import ProfilerMiddleware, _busy, _is_idle, profile_store
+
+
+def test_profile_endpoints_need_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "profile_enabled", True)
+    monkeypatch.setattr(settings, "profile_token", "secret")
+    token = {"X-Profile": "secret"}
+
+    profiled = client.get("/api/inventory/1", headers=token)
+    profile_id = profiled.headers["X-Profile-Id"]
+
+    assert client.get("/api/admin/profiles").status_code == 403
+    assert client.get(f"/api/admin/profiles/{profile_id}/collapsed").status_code == 403
+    assert client.get(f"/api/admin/profiles/{profile_id}/collapsed", headers={"X-Profile": "wrong"}).status_code == 403
+
+    listed = client.get("/api/admin/profiles", headers=token)
+    assert listed.status_code == 200
+    assert "X-Profile-Id" not in listed.headers
+    assert [profile["id"] for profile in listed.json()] == [profile_id]
+    downloaded = client.get(f"/api/admin/profiles/{profile_id}/collapsed", params={"profile": "secret"})
+    assert downloaded.status_code == 200
+
+
+def test_profile_endpoints_closed_without_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "profile_token", "")
+    assert client.get("/api/admin/profiles").status_code == 403
+    assert client.get("/api/admin/profiles", headers={"X-Profile": ""}).status_code == 403
+
+
+def test_waiting_aiosqlite_thread_is_idle():
+    async def connection_is_idle():
+        async with aiosqlite.connect(":memory:") as connection:
+            await connection.execute("SELECT 1")
+            time.sleep(0.05)  # Let the thread go back to waiting for work
+            return _is_idle(sys._current_frames()[connection.ident])  # The connection is its own thread
+
+    assert asyncio.run(connection_is_idle())
+
+
+def _run_profiled(app, monkeypatch, **settings_values) -> list:
+    """Call `app` through the middleware with the profile token; return the busy flag it saw."""
+    monkeypatch.setattr(settings, "profile_enabled", True)
+    monkeypatch.setattr(settings, "profile_token", "secret")
+    for name, value in settings_values.items():
+        monkeypatch.setattr(settings, name, value)
+    scope = {"type": "http", "method": "GET", "path": "/probe", "query_string": b"", "headers": [(b"x-profile", b"secret")]}
+    seen = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    async def probe(scope, receive, send):
+        await app(scope, receive, send)
+        seen.append(_busy.locked())
+
+    asyncio.run(ProfilerMiddleware(probe)(scope, receive, send))
+    assert not _busy.locked()
+    return seen
+
+
+def test_event_stream_ends_profile(monkeypatch):
+    async def stream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        await asyncio.sleep(0.05)  # Still streaming
+
+    assert _run_profiled(stream, monkeypatch) == [False]
+    assert profile_store.entries(1)[0]["stopped"] == "event_stream"
+
+
+def test_time_limit_ends_profile(monkeypatch):
+    async def slow(scope, receive, send):
+        await asyncio.sleep(0.2)
+
+    assert _run_profiled(slow, monkeypatch, profile_max_seconds=0.05) == [False]
+    record = profile_store.entries(1)[0]
+    assert (record["stopped"], record["status"]) == ("time_limit", None)
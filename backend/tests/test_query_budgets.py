@@ -0,0 +1,57 @@
+"""
+Every route with a declared query budget stays within it, whether its
+caches are cold or warm. Budgets are enforced in the tests, so a route
+going over one fails with a 500 before ``assert_query_budget`` runs.
+"""
+import pytest
+
+from count_cache import count_cache, report_cache
+from entity_cache import entity_cache
+from item_index import item_index
+from query_stats import assert_query_budget
+from routes_extended import dashboard_snapshot
+
+BUDGETED_ROUTES = [
+    "/api/inventory",
+    "/api/inventory?category=electronics&search=a&page=2&size=2",
+    "/api/inventory/low-stock",
+    "/api/inventory/lookup?sku=WH-001&sku=TS-002&barcode=0000000000000",
+    "/api/inventory/1",
+    "/api/customers/",
+    "/api/customers/?search=a&is_active=true",
+    "/api/customers/1",
+    "/api/suppliers/",
+    "/api/suppliers/1",
+    "/api/orders/",
+    "/api/orders/?status=delivered",
+    "/api/orders/1",
+    "/api/stock/movements",
+    "/api/stock/levels",
+    "/api/reports/inventory-valuation",
+    "/api/reports/sales-summary",
+    "/api/reports/sales-summary?group_by=week",
+    "/api/reports/sales-summary?group_by=customer",
+    "/api/dashboard/summary",
+]
+
+
+def _clear_caches() -> None:
+    count_cache.clear()
+    report_cache.clear()
+    entity_cache.clear()
+    dashboard_snapshot.clear()
+    item_index.invalidate()
+
+
+@pytest.mark.parametrize("url", BUDGETED_ROUTES)
+def test_route_within_budget(client, url):
+    _clear_caches()
+    cold = client.get(url)
+    assert cold.status_code == 200, cold.text
+    assert "X-Query-Budget" in cold.headers
+    assert_query_budget(cold)
+
+    cached = client.get(url)
+    assert cached.status_code == 200, cached.text
+    assert_query_budget(cached)
+    assert int(cached.headers["X-Query-Count"]) <= int(cold.headers["X-Query-Count"])
@@ -0,0 +1,56 @@
+"""
+Report routes.
+"""
+import threading
+from datetime import date
+
+from sqlalchemy.orm import Query
+
+from count_cache import report_cache
+from database import SessionLocal
+from models import InventoryItem
+
+
+def test_sales_summary_by_week_uses_monday_labels(client):
+    response = client.get("/api/reports/sales-summary?group_by=week")
+    assert response.status_code == 200, response.text
+    breakdown = response.json()["breakdown"]
+    assert breakdown
+    for entry in breakdown:
+        assert date.fromisoformat(entry["group"]).weekday() == 0
+
+
+def test_sales_summary_by_week_matches_total(client):
+    summary = client.get("/api/reports/sales-summary").json()
+    weekly = client.get("/api/reports/sales-summary?group_by=week").json()["breakdown"]
+    assert sum(entry["total_orders"] for entry in weekly) == summary["total_orders"]
+
+
+def _restock(item_id: int, quantity: int) -> None:
+    with SessionLocal() as db:
+        db.get(InventoryItem, item_id).quantity += quantity
+        db.commit()
+
+
+def test_write_during_valuation_is_not_cached_as_current(client, monkeypatch):
+    all_rows = Query.all
+    writes = []
+
+    def rows_then_write(query):
+        rows = all_rows(query)
+        if not writes:
+            writes.append(1)
+            # Another request's write, landing after the query and before the result is cached
+            writer = threading.Thread(target=_restock, args=(1, 10))
+            writer.start()
+            writer.join()
+        return rows
+
+    report_cache.clear()
+    monkeypatch.setattr(Query, "all", rows_then_write)
+    before = client.get("/api/reports/inventory-valuation").json()["total_quantity"]
+    monkeypatch.undo()
+    after = client.get("/api/reports/inventory-valuation").json()["total_quantity"]
+
+    assert writes
+    assert after == before + 10
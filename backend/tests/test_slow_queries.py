@@ -0,0 +1,40 @@
+"""
+Slow-query log worker.
+"""
+import time
+
+from config import settings
+from slow_queries import SlowQueryLog
+
+
+def test_worker_survives_a_failing_entry(monkeypatch):
+    log = SlowQueryLog(max_entries=10)
+    explain = log._explain
+
+    def failing_explain(statement, parameters):
+        if statement == "SELECT broken":
+            raise RuntimeError("plan lookup failed")
+        return explain(statement, parameters)
+
+    monkeypatch.setattr(log, "_explain", failing_explain)
+    log.record("SELECT broken", (), False, 0.5)
+    log.record("SELECT 1", (), False, 0.5)
+
+    deadline = time.monotonic() + 5
+    while not log.entries(10) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [entry["sql"] for entry in log.entries(10)] == ["SELECT 1"]
+
+
+def test_endpoint_needs_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "profile_enabled", True)
+    monkeypatch.setattr(settings, "profile_token", "secret")
+
+    assert client.get("/api/admin/slow-queries").status_code == 403
+    assert client.get("/api/admin/slow-queries", headers={"X-Profile": "wrong"}).status_code == 403
+    response = client.get("/api/admin/slow-queries", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+    monkeypatch.setattr(settings, "profile_token", None)
+    assert client.get("/api/admin/slow-queries").status_code == 403
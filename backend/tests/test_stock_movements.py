@@ -0,0 +1,41 @@
+"""
+Stock movement routes.
+"""
+import row_changes
+
+
+def test_create_movement_returns_item(client):
+    """The async route serializes the movement's item, which must be loaded eagerly."""
+    before = client.get("/api/inventory/1").json()["quantity"]
+    response = client.post(
+        "/api/stock/movements/",
+        json={"inventory_item_id": 1, "movement_type": "in", "quantity": 3, "notes": "restock"}
+    )
+    assert response.status_code == 201, response.text
+    movement = response.json()
+    assert movement["inventory_item"]["id"] == 1
+    assert movement["previous_quantity"] == before
+    assert movement["new_quantity"] == before + 3
+
+
+def test_create_movement_rejects_negative_stock(client):
+    quantity = client.get("/api/inventory/1").json()["quantity"]
+    response = client.post(
+        "/api/stock/movements/",
+        json={"inventory_item_id": 1, "movement_type": "out", "quantity": -(quantity + 1)}
+    )
+    assert response.status_code == 400
+
+
+def test_batch_reports_its_movements(client, monkeypatch):
+    delivered = []
+    monkeypatch.setattr(row_changes, "_subscribers", [*row_changes._subscribers, delivered.append])
+
+    response = client.post("/api/stock/movements/batch", json={"movements": [
+        {"inventory_item_id": 1, "movement_type": "in", "quantity": 2},
+        {"inventory_item_id": 2, "movement_type": "in", "quantity": 1},
+    ]})
+
+    assert response.status_code == 200, response.text
+    movement_ids = {result["movement_id"] for result in response.json()["results"]}
+    assert [changes["stock_movements"] for changes in delivered] == [movement_ids]